@@ -0,0 +1,108 @@
+# benchmarks/bench_chat.py
+"""/api/chat latency under N concurrent simulated users, fully offline."""
+import asyncio
+import os
+import time
+import uuid
+
+import httpx
+
+from benchmarks.fakes import FakeChatModel, FakeEmbeddings
+from benchmarks.synthetic_pdf import page_lines, write_synthetic_pdf
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(p / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def summarize(latencies: list[float], wall_s: float) -> dict:
+    return {
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / wall_s, 2) if wall_s else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2) if latencies else 0.0,
+    }
+
+
+async def _prepare_user(app, work_dir: str, index: int, pdf_pages: int) -> tuple[httpx.AsyncClient, str]:
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver", timeout=120)
+    email = f"bench-user-{index}-{os.getpid()}@example.com"
+    await client.post("/auth/signup", json={"email": email, "password": "benchmark"})
+    response = await client.post("/auth/login", json={"email": email, "password": "benchmark"})
+    response.raise_for_status()
+
+    session_id = str(uuid.uuid4())
+    pdf_path = write_synthetic_pdf(os.path.join(work_dir, f"chat_user_{index}.pdf"), pages=pdf_pages, seed=index)
+    with open(pdf_path, "rb") as f:
+        response = await client.post(
+            "/api/upload", data={"session_id": session_id}, files={"file": (f"user_{index}.pdf", f.read(), "application/pdf")}
+        )
+    response.raise_for_status()
+    job_id = response.json()["job_id"]
+    while True:
+        job = (await client.get(f"/api/upload/jobs/{job_id}")).json()
+        if job["state"] == "completed":
+            break
+        if job["state"] == "failed":
+            raise RuntimeError(f"Benchmark upload failed: {job['error']}")
+        await asyncio.sleep(0.05)
+    return client, session_id
+
+
+async def _user_loop(client: httpx.AsyncClient, session_id: str, index: int, requests: int, latencies: list[float], errors: list[str]):
+    for n in range(requests):
+        # Distinct questions so the query caches don't hide retrieval cost
+        words = page_lines(n % 7, seed=index)[1].split()[:6]
+        query = f"Question {index}-{n}: what does it say about {' '.join(words)}?"
+        started = time.perf_counter()
+        response = await client.post("/api/chat", json={"query": query, "session_id": session_id})
+        latencies.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            errors.append(f"{response.status_code}: {response.text[:200]}")
+
+
+async def run(work_dir: str, users: int = 8, requests_per_user: int = 10, llm_latency_s: float = 0.05,
+              embed_latency_s: float = 0.01, pdf_pages: int = 5) -> dict:
+    import main
+    from routers import chat
+    from services import clients
+
+    fake_llm = FakeChatModel(latency_s=llm_latency_s)
+    fake_embeddings = FakeEmbeddings(latency_s=embed_latency_s)
+    main.app.dependency_overrides[chat.get_chat_llm] = lambda: fake_llm
+    try:
+        async with main.app.router.lifespan_context(main.app):
+            # Swap the shared clients the lifespan just created for the fakes
+            clients.embeddings_model = fake_embeddings
+            prepared = await asyncio.gather(*(_prepare_user(main.app, work_dir, i, pdf_pages) for i in range(users)))
+            latencies, errors = [], []
+            calls_before = fake_embeddings.calls
+            started = time.perf_counter()
+            await asyncio.gather(*(
+                _user_loop(client, session_id, i, requests_per_user, latencies, errors)
+                for i, (client, session_id) in enumerate(prepared)
+            ))
+            wall_s = time.perf_counter() - started
+            query_embedding_calls = fake_embeddings.calls - calls_before
+            for client, _ in prepared:
+                await client.aclose()
+    finally:
+        main.app.dependency_overrides.pop(chat.get_chat_llm, None)
+
+    return {
+        "users": users,
+        "requests_per_user": requests_per_user,
+        "llm_latency_ms": llm_latency_s * 1000,
+        "embed_latency_ms": embed_latency_s * 1000,
+        "wall_s": round(wall_s, 3),
+        "query_embedding_calls": query_embedding_calls,
+        "errors": len(errors),
+        "error_samples": errors[:3],
+        **summarize(latencies, wall_s),
+    }
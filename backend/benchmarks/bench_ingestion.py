@@ -0,0 +1,93 @@
+# benchmarks/bench_ingestion.py
+"""Ingestion throughput on synthetic PDFs with fake embeddings and the local vector store."""
+import os
+import time
+import uuid
+
+from benchmarks.fakes import FakeEmbeddings
+from benchmarks.synthetic_pdf import write_synthetic_pdf
+
+
+class _TimedEmbeddings:
+    def __init__(self, inner):
+        self.inner = inner
+        self.model = inner.model
+        self.seconds = 0.0
+
+    def embed_documents(self, texts):
+        started = time.perf_counter()
+        try:
+            return self.inner.embed_documents(texts)
+        finally:
+            self.seconds += time.perf_counter() - started
+
+
+class _TimedStore:
+    def __init__(self, inner):
+        self.inner = inner
+        self.seconds = 0.0
+
+    def add_chunks(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self.inner.add_chunks(*args, **kwargs)
+        finally:
+            self.seconds += time.perf_counter() - started
+
+
+def _ingest_once(rag_service, pdf_path: str, embeddings, store) -> dict:
+    from services import clients
+
+    timed_embeddings, timed_store = _TimedEmbeddings(embeddings), _TimedStore(store)
+    clients.embeddings_model, rag_service.vector_store = timed_embeddings, timed_store
+    batches = []
+    started = time.perf_counter()
+    result = rag_service.process_and_embed_file(
+        pdf_path, uuid.uuid4(), uuid.uuid4(), progress_callback=lambda pages, done: batches.append(done)
+    )
+    total = time.perf_counter() - started
+    return {
+        "chunks": result.chunks,
+        "duplicate_fraction": round(result.duplicate_fraction, 4),
+        "batches": max(len(batches) - 1, 0),
+        "total_s": round(total, 4),
+        "embed_s": round(timed_embeddings.seconds, 4),
+        "insert_s": round(timed_store.seconds, 4),
+        "embedding_api_calls": embeddings.calls,
+    }
+
+
+def run(work_dir: str, page_counts: list[int], embed_latency_s: float = 0.05) -> list[dict]:
+    from services import clients, pdf_parsing, rag_service
+    from services.embedding_cache import EmbeddingCache
+    from services.vector_store import LocalVectorStore
+
+    original = (clients.embeddings_model, rag_service.vector_store, rag_service.embedding_cache)
+    results = []
+    try:
+        for pages in page_counts:
+            pdf_path = write_synthetic_pdf(os.path.join(work_dir, f"ingest_{pages}.pdf"), pages=pages, seed=pages)
+
+            started = time.perf_counter()
+            chunk_count = sum(len(texts) for _, texts in pdf_parsing.iter_page_chunks(pdf_path))
+            parse_s = time.perf_counter() - started
+
+            # Cold: empty embedding cache. Warm: the same document uploaded again.
+            rag_service.embedding_cache = EmbeddingCache(os.path.join(work_dir, f"embed_cache_{pages}.sqlite3"))
+            store = LocalVectorStore(os.path.join(work_dir, f"vectors_{pages}"))
+            runs = {}
+            for label in ("cold", "warm"):
+                runs[label] = _ingest_once(rag_service, pdf_path, FakeEmbeddings(latency_s=embed_latency_s), store)
+                runs[label]["pages_per_s"] = round(pages / runs[label]["total_s"], 2)
+                runs[label]["chunks_per_s"] = round(runs[label]["chunks"] / runs[label]["total_s"], 2)
+
+            results.append({
+                "pages": pages,
+                "chunks": chunk_count,
+                "parse_split_s": round(parse_s, 4),
+                "cold": runs["cold"],
+                "warm": runs["warm"],
+            })
+    finally:
+        clients.embeddings_model, rag_service.vector_store, rag_service.embedding_cache = original
+    return results
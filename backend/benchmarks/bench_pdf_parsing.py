@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Compare sequential and process-pool PDF parsing on synthetic documents.
+
+Usage: python -m benchmarks.bench_pdf_parsing [--pages 200 400] [--workers 4]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic_pdf import write_synthetic_pdf
+from services import pdf_parsing
+
+
+def run(page_counts: list[int], pages_per_task: int) -> list[dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Warm the pool so worker start-up isn't billed to the first document
+        warmup_path = write_synthetic_pdf(os.path.join(tmp_dir, "warmup.pdf"), pages=pdf_parsing.PDF_PARSE_WORKERS)
+        list(pdf_parsing.iter_page_chunks(warmup_path, parallel=True, pages_per_task=1))
+
+        for pages in page_counts:
+            pdf_path = write_synthetic_pdf(os.path.join(tmp_dir, f"synthetic_{pages}.pdf"), pages=pages)
+            timings, outputs = {}, {}
+            for mode, parallel in (("sequential", False), ("parallel", True)):
+                started = time.perf_counter()
+                outputs[mode] = list(pdf_parsing.iter_page_chunks(pdf_path, parallel=parallel, pages_per_task=pages_per_task))
+                timings[mode] = time.perf_counter() - started
+
+            chunks = sum(len(texts) for _, texts in outputs["sequential"])
+            results.append({
+                "pages": pages,
+                "chunks": chunks,
+                "identical_output": outputs["sequential"] == outputs["parallel"],
+                "sequential_s": round(timings["sequential"], 3),
+                "parallel_s": round(timings["parallel"], 3),
+                "speedup": round(timings["sequential"] / timings["parallel"], 2),
+                "sequential_pages_per_s": round(pages / timings["sequential"], 1),
+                "parallel_pages_per_s": round(pages / timings["parallel"], 1),
+            })
+    pdf_parsing.shutdown_parse_pool()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[200, 400])
+    parser.add_argument("--workers", type=int, default=pdf_parsing.PDF_PARSE_WORKERS)
+    parser.add_argument("--pages-per-task", type=int, default=pdf_parsing.PDF_PAGES_PER_TASK)
+    args = parser.parse_args()
+    pdf_parsing.PDF_PARSE_WORKERS = args.workers
+
+    print(f"=== PDF parsing: sequential vs {args.workers} worker processes ===")
+    for row in run(args.pages, args.pages_per_task):
+        print(
+            f"{row['pages']:>5} pages  {row['chunks']:>5} chunks  "
+            f"sequential {row['sequential_s']:>7.2f}s  parallel {row['parallel_s']:>7.2f}s  "
+            f"speedup {row['speedup']:.2f}x  identical={row['identical_output']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
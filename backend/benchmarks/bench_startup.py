@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Cold-start time of the app and an import-time profile, each in a fresh interpreter.
+
+Usage: python -m benchmarks.bench_startup [--runs 5] [--top 15]
+
+Each run measures, in a new process: importing main, running the lifespan
+startup, and polling /readyz until every dependency reports ready.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_STARTUP_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+from benchmarks import offline_env
+offline_env.configure(sys.argv[1])
+import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    started_up = time.perf_counter()
+    while client.get("/readyz").status_code != 200:
+        time.sleep(0.005)
+    ready = time.perf_counter()
+print(json.dumps({"import_s": imported - started, "startup_s": started_up - imported, "ready_s": ready - started}))
+"""
+
+_IMPORT_SCRIPT = "from benchmarks import offline_env; offline_env.configure(); import main"
+
+
+def _python(args: list[str]) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+
+
+def measure_startup(work_dir: str, runs: int = 5) -> dict:
+    samples = []
+    for i in range(runs):
+        run_dir = os.path.join(work_dir, f"startup-{i}")
+        os.makedirs(run_dir, exist_ok=True)
+        started = time.perf_counter()
+        output = _python(["-c", _STARTUP_SCRIPT, run_dir]).stdout
+        sample = json.loads(output.strip().splitlines()[-1])
+        # Includes interpreter start-up, which the in-process timings can't see
+        sample["process_to_ready_s"] = time.perf_counter() - started
+        samples.append(sample)
+    return {
+        "runs": runs,
+        **{key: round(statistics.median(s[key] for s in samples), 3) for key in samples[0]},
+    }
+
+
+def import_profile(top: int = 15) -> list[dict]:
+    """Own import time per top-level package for `import main`, slowest first (python -X importtime)."""
+    stderr = _python(["-X", "importtime", "-c", _IMPORT_SCRIPT]).stderr
+    per_package = defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        per_package[name.strip().split(".")[0]] += int(self_us)
+    ranked = sorted(per_package.items(), key=lambda item: item[1], reverse=True)[:top]
+    return [{"package": package, "ms": round(us / 1000, 1)} for package, us in ranked]
+
+
+def run(work_dir: str, runs: int = 5, top: int = 15) -> dict:
+    return {**measure_startup(work_dir, runs), "import_profile": import_profile(top)}
+
+
+def print_results(results: dict):
+    print(
+        f"startup (median of {results['runs']}) | import main {results['import_s']:.3f}s | "
+        f"lifespan {results['startup_s']:.3f}s | ready {results['ready_s']:.3f}s | "
+        f"process to ready {results['process_to_ready_s']:.3f}s"
+    )
+    print("import time by package: " + ", ".join(f"{row['package']} {row['ms']:.0f}ms" for row in results["import_profile"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="packages listed in the import profile")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as work_dir:
+        print_results(run(work_dir, args.runs, args.top))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# benchmarks/fakes.py
+"""Deterministic, offline stand-ins for the OpenAI embedding and chat models."""
+import asyncio
+import hashlib
+import math
+import time
+from typing import Any
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+class FakeEmbeddings:
+    """Hashed bag-of-words vectors: texts sharing words get similar vectors.
+
+    latency_s simulates the API round trip per call (not per text).
+    """
+
+    def __init__(self, dim: int = 256, latency_s: float = 0.0, model: str = "fake-embedding"):
+        self.dim = dim
+        self.latency_s = latency_s
+        self.model = model
+        self.calls = 0
+        self.texts_embedded = 0
+
+    def _vector(self, text: str) -> list[float]:
+        vector = [0.0] * self.dim
+        for word in text.lower().split():
+            digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dim
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.calls += 1
+        self.texts_embedded += len(texts)
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.calls += 1
+        self.texts_embedded += len(texts)
+        if self.latency_s:
+            await asyncio.sleep(self.latency_s)
+        return [self._vector(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return (await self.aembed_documents([text]))[0]
+
+
+class FakeChatModel(BaseChatModel):
+    """Echoes a fixed-length answer after a simulated generation delay.
+
+    The sync path blocks with time.sleep and the async path awaits asyncio.sleep,
+    just like a real HTTP-backed model would.
+    """
+
+    latency_s: float = 0.05
+    answer_words: int = 40
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-benchmark-chat"
+
+    def _answer(self, messages) -> str:
+        prompt = str(messages[-1].content)
+        words = (prompt.split() or ["answer"]) * self.answer_words
+        return " ".join(words[:self.answer_words])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency_s)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._answer(messages)))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency_s)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._answer(messages)))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        words = self._answer(messages).split(" ")
+        for i, word in enumerate(words):
+            time.sleep(self.latency_s / len(words))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word if i == 0 else " " + word))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        words = self._answer(messages).split(" ")
+        for i, word in enumerate(words):
+            await asyncio.sleep(self.latency_s / len(words))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word if i == 0 else " " + word))
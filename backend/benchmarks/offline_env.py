@@ -0,0 +1,35 @@
+# benchmarks/offline_env.py
+"""Point the app at throwaway local storage before it is imported.
+
+Call configure() before importing main / services: the app reads its
+configuration at import time.
+"""
+import logging
+import os
+import tempfile
+
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.compiler import compiles
+
+
+@compiles(UUID, "sqlite")
+def _compile_uuid_for_sqlite(type_, compiler, **kw):
+    return "CHAR(36)"
+
+
+def configure(work_dir: str | None = None) -> str:
+    work_dir = work_dir or tempfile.mkdtemp(prefix="chatbot-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{work_dir}/bench.db"
+    os.environ["VECTOR_STORE_BACKEND"] = "local"
+    os.environ["LOCAL_VECTOR_STORE_DIR"] = os.path.join(work_dir, "vector_store")
+    os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(work_dir, "embeddings.sqlite3")
+    os.environ["CHUNK_SIGNATURE_INDEX_PATH"] = os.path.join(work_dir, "chunk_signatures.sqlite3")
+    os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
+    return work_dir
+
+
+def quiet_sql_echo():
+    # Silence SQL logging for timing runs even when DB_ECHO is set
+    from db.database import engine
+    engine.echo = False
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Offline benchmark suite: ingestion throughput, /api/chat latency and cold start.
+
+Everything runs in-process against SQLite, the local vector store and
+deterministic fake embedding/LLM models, so no OpenAI, Weaviate or Postgres
+is needed. Results are written as JSON so runs can be compared:
+
+    python -m benchmarks.run                       # writes benchmarks/results/<timestamp>.json
+    python -m benchmarks.run --users 16 --requests 20
+    python -m benchmarks.run --suite startup       # import/startup/readiness times + import profile
+    python -m benchmarks.run --compare benchmarks/results/<older>.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+from benchmarks import offline_env
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# (path in the results JSON, higher is better)
+COMPARED_METRICS = [
+    (("chat", "throughput_rps"), True),
+    (("chat", "p50_ms"), False),
+    (("chat", "p95_ms"), False),
+    (("chat", "p99_ms"), False),
+    (("startup", "import_s"), False),
+    (("startup", "startup_s"), False),
+    (("startup", "ready_s"), False),
+]
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _lookup(results: dict, path: tuple):
+    for key in path:
+        if not isinstance(results, dict) or key not in results:
+            return None
+        results = results[key]
+    return results
+
+
+def _ingestion_metrics(results: dict):
+    for row in results.get("ingestion", []):
+        for label in ("cold", "warm"):
+            yield (f"ingestion[{row['pages']}p].{label}.pages_per_s", row[label]["pages_per_s"], True)
+
+
+def compare(current: dict, baseline: dict):
+    print(f"\n=== Compared with {baseline.get('commit') or 'baseline'} ({baseline.get('started_at')}) ===")
+    rows = [(".".join(path), _lookup(current, path), _lookup(baseline, path), better) for path, better in COMPARED_METRICS]
+    baseline_ingestion = {name: value for name, value, _ in _ingestion_metrics(baseline)}
+    rows += [(name, value, baseline_ingestion.get(name), better) for name, value, better in _ingestion_metrics(current)]
+    for name, now, before, higher_is_better in rows:
+        if now is None or before is None:
+            continue
+        change = (now - before) / before * 100 if before else 0.0
+        improved = change > 0 if higher_is_better else change < 0
+        print(f"{name:<40} {before:>10.2f} -> {now:>10.2f}  ({change:+.1f}%{' better' if improved and change else ''})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline ingestion and chat benchmarks")
+    parser.add_argument("--suite", choices=["all", "ingestion", "chat", "startup"], default="all")
+    parser.add_argument("--pages", type=int, nargs="+", default=[50, 200], help="synthetic PDF sizes for ingestion")
+    parser.add_argument("--users", type=int, default=8, help="concurrent simulated chat users")
+    parser.add_argument("--requests", type=int, default=10, help="chat requests per user")
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0)
+    parser.add_argument("--embed-latency-ms", type=float, default=10.0)
+    parser.add_argument("--startup-runs", type=int, default=5, help="fresh processes timed by the startup suite")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    args = parser.parse_args()
+
+    work_dir = offline_env.configure(tempfile.mkdtemp(prefix="chatbot-bench-"))
+    offline_env.quiet_sql_echo()
+    from benchmarks import bench_chat, bench_ingestion, bench_startup
+
+    started_at = datetime.now(timezone.utc)
+    results = {
+        "started_at": started_at.isoformat(),
+        "commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "parameters": vars(args),
+    }
+
+    if args.suite in ("all", "ingestion"):
+        results["ingestion"] = bench_ingestion.run(work_dir, args.pages, embed_latency_s=args.embed_latency_ms / 1000)
+        for row in results["ingestion"]:
+            print(
+                f"ingestion {row['pages']:>4} pages {row['chunks']:>5} chunks | parse+split {row['parse_split_s']:.2f}s | "
+                f"cold {row['cold']['total_s']:.2f}s ({row['cold']['pages_per_s']} pages/s, {row['cold']['chunks_per_s']} chunks/s, "
+                f"{row['cold']['duplicate_fraction']:.1%} near-duplicates, "
+                f"embed {row['cold']['embed_s']:.2f}s, insert {row['cold']['insert_s']:.2f}s) | "
+                f"warm {row['warm']['total_s']:.2f}s ({row['warm']['embedding_api_calls']} embedding calls)"
+            )
+
+    if args.suite in ("all", "chat"):
+        results["chat"] = asyncio.run(bench_chat.run(
+            work_dir,
+            users=args.users,
+            requests_per_user=args.requests,
+            llm_latency_s=args.llm_latency_ms / 1000,
+            embed_latency_s=args.embed_latency_ms / 1000,
+        ))
+        chat = results["chat"]
+        print(
+            f"chat {chat['users']} users x {chat['requests_per_user']} requests | {chat['throughput_rps']} req/s | "
+            f"p50 {chat['p50_ms']}ms p95 {chat['p95_ms']}ms p99 {chat['p99_ms']}ms | "
+            f"{chat['query_embedding_calls']} query embedding calls | errors {chat['errors']}"
+        )
+
+    if args.suite in ("all", "startup"):
+        results["startup"] = bench_startup.run(work_dir, runs=args.startup_runs)
+        bench_startup.print_results(results["startup"])
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{started_at.strftime('%Y%m%dT%H%M%SZ')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2, default=str)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
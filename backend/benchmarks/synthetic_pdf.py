@@ -0,0 +1,57 @@
+# benchmarks/synthetic_pdf.py
+"""Write deterministic multi-page text PDFs without any PDF library."""
+import random
+
+WORDS = (
+    "retrieval augmented generation vector index embedding chunk query context "
+    "latency throughput session upload document page paragraph model answer "
+    "weaviate postgres cache batch token stream worker process pipeline filter"
+).split()
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def page_lines(page_number: int, seed: int = 0, lines_per_page: int = 45) -> list[str]:
+    rng = random.Random(seed * 100_003 + page_number)
+    lines = [f"Section {page_number + 1}"]
+    for _ in range(lines_per_page):
+        lines.append(" ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 14))) + ".")
+    return lines
+
+
+def write_synthetic_pdf(path: str, pages: int, seed: int = 0, lines_per_page: int = 45) -> str:
+    """Write a PDF with `pages` pages of pseudo-random prose; returns path."""
+    objects = []
+    # 1: catalog, 2: page tree, 3: font; then a (page, content) pair per page
+    page_ids = [4 + 2 * i for i in range(pages)]
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids)
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode())
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    for i in range(pages):
+        content_id = page_ids[i] + 1
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>".encode()
+        )
+        text_ops = "\n".join(f"({_escape(line)}) Tj T*" for line in page_lines(i, seed, lines_per_page))
+        stream = f"BT /F1 9 Tf 11 TL 40 760 Td\n{text_ops}\nET".encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_offset = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+
+    with open(path, "wb") as f:
+        f.write(out)
+    return path
@@ -1,25 +1,86 @@
 # db/database.py
 import os
-import weaviate
+import threading
 from dotenv import load_dotenv
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from models.base import Base
+from services.metrics import instrument_engine
 
 load_dotenv()
 
 # PostgreSQL Connection
 DATABASE_URL = os.getenv("DATABASE_URL")
-engine = create_async_engine(DATABASE_URL, echo=True)
+# Logging every statement is costly under load; turn on for debugging only
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+engine_options = {"echo": DB_ECHO}
+if not DATABASE_URL.startswith("sqlite"):
+    engine_options.update(
+        pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        # Recycle before servers/proxies drop idle connections
+        pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        pool_pre_ping=os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+    )
+engine = create_async_engine(DATABASE_URL, **engine_options)
+instrument_engine(engine)
 async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
-# Weaviate v4 Connection
-# Key Change: Use connect_to_local() for the modern v4 client
-weaviate_client = weaviate.connect_to_local()
+# Vector store backend: "weaviate" (default) or "local" (in-process NumPy store)
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "weaviate").lower()
+
+# Weaviate v4 clients, created on first use so importing the app neither
+# loads the client library nor opens a connection
+weaviate_client = None
+weaviate_async_client = None
+_weaviate_lock = threading.Lock()
+
+def get_weaviate_client():
+    global weaviate_client
+    with _weaviate_lock:
+        if weaviate_client is None:
+            import weaviate
+            # Key Change: Use connect_to_local() for the modern v4 client
+            weaviate_client = weaviate.connect_to_local()
+    return weaviate_client
+
+def get_weaviate_async_client():
+    """Async client for searches on the request path; connected in the app lifespan."""
+    global weaviate_async_client
+    with _weaviate_lock:
+        if weaviate_async_client is None:
+            import weaviate
+            weaviate_async_client = weaviate.use_async_with_local()
+    return weaviate_async_client
+
+# create_all doesn't alter existing tables; columns/indexes added since the
+# first deploy are applied here (idempotent, Postgres only)
+SCHEMA_UPGRADES = [
+    "ALTER TABLE chat_history ADD COLUMN IF NOT EXISTS token_count INTEGER",
+    "CREATE INDEX IF NOT EXISTS ix_chat_history_session_timestamp_id ON chat_history (session_id, timestamp, id)",
+    "ALTER TABLE files ADD COLUMN IF NOT EXISTS content_sha256 VARCHAR(64)",
+    "ALTER TABLE files ADD COLUMN IF NOT EXISTS chunk_file_id UUID",
+    "ALTER TABLE files ADD COLUMN IF NOT EXISTS chunk_count INTEGER",
+    "CREATE INDEX IF NOT EXISTS ix_files_user_id_content_sha256 ON files (user_id, content_sha256)",
+    "CREATE INDEX IF NOT EXISTS ix_files_chunk_file_id ON files (chunk_file_id)",
+    # chat_sessions used to be keyed by session_id alone
+    """DO $$ BEGIN
+        IF (SELECT count(*) FROM information_schema.key_column_usage
+            WHERE table_name = 'chat_sessions' AND constraint_name = 'chat_sessions_pkey') = 1 THEN
+            ALTER TABLE chat_sessions DROP CONSTRAINT chat_sessions_pkey;
+            ALTER TABLE chat_sessions ADD PRIMARY KEY (user_id, session_id);
+        END IF;
+    END $$""",
+]
 
 async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        if conn.dialect.name == "postgresql":
+            for statement in SCHEMA_UPGRADES:
+                await conn.execute(text(statement))
 
 async def get_db_session() -> AsyncSession:
     async with async_session() as session:
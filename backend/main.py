@@ -1,20 +1,46 @@
 # main.py
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
-from db.database import init_db, weaviate_client # Import the client
-from routers import auth, chat
-from services.rag_service import create_weaviate_schema
+from db.database import init_db, async_session
+from routers import auth, chat, health
+from services.rag_service import create_weaviate_schema, connect_vector_store, close_vector_store
+from services.clients import start_client_warm_up, close_clients
+from services.ingestion_queue import shutdown_ingestion, remove_interrupted_ingestions
+from services.pdf_parsing import shutdown_parse_pool
+from services import metrics
+from services.chat_history_service import backfill_chat_sessions
+from services.orphan_sweeper import start_orphan_sweeper, stop_orphan_sweeper
+from services.tenant_offloader import start_tenant_offloader, stop_tenant_offloader
+from services.chat_history_buffer import start_history_flusher, stop_history_flusher
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # On startup
     await init_db()
+    async with async_session() as db:
+        # One-off: populate the session summaries from existing chat history
+        await backfill_chat_sessions(db)
+    # Uploads a crashed or killed process never finished indexing
+    await remove_interrupted_ingestions()
     create_weaviate_schema()
+    await connect_vector_store()
+    # Shared, pooled OpenAI clients for every request; built in the background
+    # (slow imports), /readyz reports them once they exist
+    start_client_warm_up()
+    start_orphan_sweeper()
+    start_tenant_offloader()
+    start_history_flusher()
     yield
     # On shutdown
-    weaviate_client.close() # Key Change: Close the client connection
+    await stop_history_flusher()  # writes buffered chat messages
+    await stop_tenant_offloader()
+    await stop_orphan_sweeper()
+    await shutdown_ingestion()
+    shutdown_parse_pool()
+    await close_vector_store() # Key Change: Close the vector store (Weaviate client connections)
+    await close_clients()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -29,6 +55,14 @@ app.add_middleware(
 
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
 app.include_router(chat.router, prefix="/api", tags=["chat"])
+app.include_router(health.router, tags=["health"])
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    if not metrics.ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    body, content_type = metrics.render_latest()
+    return Response(content=body, media_type=content_type)
 
 @app.get("/")
 def read_root():
@@ -1,8 +1,14 @@
 import uuid
-from sqlalchemy import Column, String, DateTime, Text, func
+from datetime import datetime, timezone
+from sqlalchemy import Column, String, DateTime, Text, Integer, Index
 from sqlalchemy.dialects.postgresql import UUID
 from .base import Base
 
+def utcnow():
+    # Set per row in Python: Postgres now() is the transaction start time, which
+    # gave both turns of an exchange the same timestamp
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
 class ChatHistory(Base):
     __tablename__ = 'chat_history'
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -10,4 +16,28 @@ class ChatHistory(Base):
     session_id = Column(UUID(as_uuid=True)) # links to sessions table id
     role = Column(String) # 'user' or 'assistant'
     message = Column(Text)
-    timestamp = Column(DateTime, default=func.now())
\ No newline at end of file
+    token_count = Column(Integer) # tiktoken count, stored on write for conversation memory
+    timestamp = Column(DateTime, default=utcnow)
+
+    __table_args__ = (
+        # Keyset pagination and memory lookups scan (session_id, timestamp, id)
+        Index('ix_chat_history_session_timestamp_id', 'session_id', 'timestamp', 'id'),
+    )
+
+
+class ChatSession(Base):
+    """Per-session summary kept in step with chat_history, so the sidebar
+    doesn't have to scan every message a user has sent."""
+    __tablename__ = 'chat_sessions'
+    # Keyed per user: session ids come from the client, so another user
+    # posting to the same id gets a row of their own
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    session_id = Column(UUID(as_uuid=True), primary_key=True)
+    title = Column(Text) # first message of the session
+    last_message = Column(Text)
+    last_timestamp = Column(DateTime)
+    message_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index('ix_chat_sessions_user_last_timestamp', 'user_id', 'last_timestamp'),
+    )
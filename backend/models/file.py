@@ -1,6 +1,6 @@
 # backend/models/file.py
 import uuid
-from sqlalchemy import Column, String, DateTime, func
+from sqlalchemy import Column, String, DateTime, Integer, Float, Index, func
 from sqlalchemy.dialects.postgresql import UUID
 from .base import Base
 
@@ -10,4 +10,37 @@ class File(Base):
     user_id = Column(UUID(as_uuid=True), index=True)
     session_id = Column(UUID(as_uuid=True), index=True) # <-- ADD THIS LINE
     filename = Column(String)
-    uploaded_at = Column(DateTime, default=func.now())
\ No newline at end of file
+    uploaded_at = Column(DateTime, default=func.now())
+    content_sha256 = Column(String(64)) # hash of the uploaded bytes, for dedupe
+    # File id the chunks are stored under in the vector store: this file's own id,
+    # or the id of an identical earlier upload whose chunks are reused
+    chunk_file_id = Column(UUID(as_uuid=True))
+    chunk_count = Column(Integer) # set once ingestion has finished
+
+    __table_args__ = (
+        Index('ix_files_user_id_content_sha256', 'user_id', 'content_sha256'),
+        Index('ix_files_chunk_file_id', 'chunk_file_id'),
+    )
+
+    @property
+    def vector_file_id(self):
+        # Rows from before chunk_file_id existed own their chunks
+        return self.chunk_file_id or self.id
+
+
+class ChunkDuplicate(Base):
+    """Back-reference for a chunk that wasn't stored because a near-identical
+    chunk (same file or an earlier file of the user) already was."""
+    __tablename__ = 'chunk_duplicates'
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), nullable=False)
+    file_id = Column(UUID(as_uuid=True), nullable=False) # chunk file id the duplicate was found in
+    chunk_index = Column(Integer, nullable=False) # its position in that file's chunks
+    canonical_file_id = Column(UUID(as_uuid=True), nullable=False) # where the stored copy lives
+    canonical_chunk_index = Column(Integer, nullable=False)
+    similarity = Column(Float) # estimated Jaccard similarity of the two chunks
+
+    __table_args__ = (
+        Index('ix_chunk_duplicates_file_id', 'file_id'),
+        Index('ix_chunk_duplicates_canonical_file_id', 'canonical_file_id'),
+    )
@@ -1,10 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi import APIRouter, Cookie, Depends, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from pydantic import BaseModel, EmailStr
 from db.database import get_db_session
 from models.user import User, Session
-from services.auth_service import hash_password, verify_password, generate_session_token
+from services.auth_service import hash_password, verify_password, generate_session_token, delete_session
 import uuid
 
 router = APIRouter()
@@ -49,7 +49,9 @@ async def login(user_data: UserLogin, response: Response, db: AsyncSession = Dep
     return {"message": "Login successful", "session_id": new_session.id}
 
 @router.post("/logout")
-async def logout(response: Response, db: AsyncSession = Depends(get_db_session)):
-    # In a real app, you would get session_token from cookie/header to invalidate it
+async def logout(response: Response, session_token: str = Cookie(None), db: AsyncSession = Depends(get_db_session)):
+    # Remove the session row and its cached lookup so the token stops working right away
+    if session_token:
+        await delete_session(db, session_token)
     response.delete_cookie("session_token")
     return {"message": "Logout successful"}
\ No newline at end of file
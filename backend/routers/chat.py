@@ -1,24 +1,48 @@
 # routers/chat.py
+import asyncio
+import json
+import logging
 import os
-import shutil
+import time
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File as FastAPIFile, Cookie, Form
+from contextlib import ExitStack
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, Cookie, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from pydantic import BaseModel
-from sqlalchemy import desc, distinct, func
+from sqlalchemy import delete, desc, distinct, func
 
 # Import the OpenAI chat model class
-from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
-from langchain.schema.runnable import RunnablePassthrough
-from langchain.schema.output_parser import StrOutputParser
-
-from db.database import get_db_session
-from models.user import Session, User
+# langchain_core directly: the langchain package and langchain_openai are slow
+# to import, and the OpenAI clients are created in services.clients
+from langchain_core.language_models import BaseChatModel
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.runnables import RunnablePassthrough
+from sse_starlette.sse import EventSourceResponse
+from starlette.background import BackgroundTask
+
+from db.database import get_db_session, async_session
+from models.user import User
 from models.file import File as FileModel
-from models.chat import ChatHistory
-from services.rag_service import process_and_embed_file, query_weaviate
+from models.chat import ChatHistory, ChatSession
+from services.rag_service import retrieve_context, get_cache_stats, invalidate_retrieval_cache, delete_file_chunks
+from services import metrics
+from services.clients import get_chat_model
+from services.auth_service import get_user_for_session, session_cache
+from services.chat_history_service import (
+    new_chat_message, fetch_history_page, load_conversation_memory,
+)
+from services.chat_history_buffer import history_buffer, save_chat_messages, flush_pending
+from services.upload_service import (
+    save_upload, find_indexed_duplicate, unreferenced_chunk_file_ids, delete_chunk_duplicates, shared_chunks, UploadTooLarge,
+)
+from services.ingestion_queue import (
+    submit_ingestion, get_job, pending_ingestions, MAX_CONCURRENT_INGESTIONS, MAX_PENDING_INGESTIONS_PER_USER,
+)
+from services.admission import admission_controller, AdmissionRejected, INTERACTIVE, CHAT, INGEST
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 UPLOAD_DIR = "uploaded_files"
@@ -31,173 +55,359 @@ class ChatQuery(BaseModel):
 async def get_current_user(session_token: str = Cookie(None), db: AsyncSession = Depends(get_db_session)):
     if not session_token:
         raise HTTPException(status_code=401, detail="Not authenticated")
-    result = await db.execute(select(Session).where(Session.session_token == session_token))
-    session = result.scalars().first()
-    if not session:
-        raise HTTPException(status_code=401, detail="Invalid session")
-    result = await db.execute(select(User).where(User.id == session.user_id))
-    user = result.scalars().first()
+    user = await get_user_for_session(db, session_token)
     if not user:
-        raise HTTPException(status_code=401, detail="User not found")
+        raise HTTPException(status_code=401, detail="Invalid session")
     return user
 
+def track_in_flight(endpoint: str):
+    """Dependency that counts the request in the in-flight gauge while it runs."""
+    async def dependency():
+        with metrics.in_flight(endpoint):
+            yield
+    return dependency
+
+async def _acquire_slot(user_id: uuid.UUID, priority: int, endpoint: str):
+    try:
+        await admission_controller.acquire(user_id, priority, endpoint)
+    except AdmissionRejected as e:
+        detail = "Too many concurrent requests" if e.status_code == 429 else "Server is busy"
+        raise HTTPException(status_code=e.status_code, detail=detail, headers={"Retry-After": str(e.retry_after)})
+
+def admit(endpoint: str, priority: int):
+    """Dependency that holds an admission slot until the response is sent (or refuses the request)."""
+    async def dependency(current_user: User = Depends(get_current_user)):
+        await _acquire_slot(current_user.id, priority, endpoint)
+        try:
+            yield
+        finally:
+            admission_controller.release(current_user.id, priority)
+    return dependency
+
 # File size limits (in bytes)
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB limit
 MAX_PAGES_ESTIMATE = 300  # Rough estimate for reasonable processing time
+MAX_BATCH_FILES = int(os.getenv("MAX_BATCH_FILES", "20"))
 
-@router.post("/upload")
+def _file_too_large(file_size: int | None = None) -> HTTPException:
+    detail = f"File too large. Maximum size is {MAX_FILE_SIZE // (1024*1024)}MB."
+    if file_size is not None:
+        detail += f" Your file is {file_size // (1024*1024)}MB."
+    return HTTPException(status_code=413, detail=detail)
+
+def _upload_form_fields(form, field: str) -> tuple[uuid.UUID, list[UploadFile]]:
+    try:
+        session_id = uuid.UUID(form.get("session_id") or "")
+    except ValueError:
+        raise HTTPException(status_code=422, detail="A valid session_id is required")
+    files = [value for value in form.getlist(field) if not isinstance(value, str)]
+    if not files:
+        raise HTTPException(status_code=422, detail=f"No file in the {field!r} field")
+    return session_id, files
+
+# The upload routes parse their multipart body themselves: with Form/File
+# parameters FastAPI reads the whole body before the admit dependency runs
+@router.post("/upload", dependencies=[Depends(admit("upload", INGEST)), Depends(track_in_flight("upload"))])
 async def upload_file(
-    session_id: str = Form(...), # <-- ADD session_id from form data
-    file: UploadFile = FastAPIFile(...),
+    request: Request,
     db: AsyncSession = Depends(get_db_session),
     current_user: User = Depends(get_current_user),
 ):
-    # Check file size before processing
-    file_size = 0
-    if hasattr(file, 'size') and file.size:
-        file_size = file.size
-    else:
-        # Fallback: read file to check size
-        content = await file.read()
-        file_size = len(content)
-        # Reset file pointer
-        await file.seek(0)
-
-    if file_size > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=413,
-            detail=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024*1024)}MB. Your file is {file_size // (1024*1024)}MB."
-        )
-
+    """Form fields: session_id and one PDF in "file"."""
+    async with request.form(max_files=1) as form:
+        session_id, files = _upload_form_fields(form, "file")
+        return await _accept_upload(files[0], session_id, db, current_user)
+
+@router.post("/upload/batch", dependencies=[Depends(admit("upload", INGEST)), Depends(track_in_flight("upload"))])
+async def upload_files(
+    request: Request,
+    db: AsyncSession = Depends(get_db_session),
+    current_user: User = Depends(get_current_user),
+):
+    """Queue several PDFs at once (form fields: session_id and the PDFs in "files");
+    each gets its own job (or error) in "files".
+
+    Jobs run concurrently up to MAX_CONCURRENT_INGESTIONS, sharing the
+    embedding rate limit.
+    """
+    # One over the limit, so an oversized batch gets the message below
+    async with request.form(max_files=MAX_BATCH_FILES + 1) as form:
+        session_id, files = _upload_form_fields(form, "files")
+        if len(files) > MAX_BATCH_FILES:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_FILES} files per batch")
+
+        results = []
+        for file in files:
+            try:
+                results.append(await _accept_upload(file, session_id, db, current_user))
+            except HTTPException as e:
+                results.append({"filename": file.filename, "state": "rejected", "status_code": e.status_code, "error": e.detail})
+        return {"files": results}
+
+async def _accept_upload(file: UploadFile, session_id: uuid.UUID, db: AsyncSession, current_user: User) -> dict:
+    """Validate and save one upload, then link it to identical indexed content or queue its ingestion."""
     # Check if file is PDF
     if not file.filename.lower().endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Only PDF files are supported")
 
-    # Save the file locally
-    file_path = os.path.join(UPLOAD_DIR, file.filename)
-    with open(file_path, "wb") as buffer:
-        if hasattr(file, 'size') and file.size:
-            shutil.copyfileobj(file.file, buffer)
-        else:
-            buffer.write(content)
+    # One user's uploads can't fill the ingestion queue for everyone
+    if pending_ingestions(current_user.id) >= MAX_PENDING_INGESTIONS_PER_USER:
+        admission_controller.record_rejection("upload", "ingestion_backlog")
+        raise HTTPException(
+            status_code=429,
+            detail=f"At most {MAX_PENDING_INGESTIONS_PER_USER} files can be processing at once",
+            headers={"Retry-After": str(admission_controller.retry_after)},
+        )
+
+    # Reject early when the client told us the size
+    if file.size and file.size > MAX_FILE_SIZE:
+        raise _file_too_large(file.size)
+
+    # Stream to a unique file (concurrent uploads with the same name can't collide)
+    # while hashing and enforcing the size limit
+    try:
+        with metrics.stage_timer("upload_save"):
+            file_path, content_sha256, file_size = await asyncio.to_thread(save_upload, file.file, UPLOAD_DIR, MAX_FILE_SIZE)
+    except UploadTooLarge:
+        raise _file_too_large()
+
+    response = {
+        "filename": file.filename,
+        "file_size_mb": round(file_size / (1024*1024), 2),
+    }
+
+    # Same bytes already indexed for this user: reuse those chunks
+    duplicate = await find_indexed_duplicate(db, current_user.id, content_sha256)
+    if duplicate:
+        os.remove(file_path)
+        new_file = FileModel(
+            user_id=current_user.id,
+            session_id=session_id,
+            filename=file.filename,
+            content_sha256=content_sha256,
+            chunk_file_id=duplicate.vector_file_id,
+            chunk_count=duplicate.chunk_count,
+        )
+        db.add(new_file)
+        await db.commit()
+        invalidate_retrieval_cache(current_user.id)
+        return {
+            **response,
+            "file_id": new_file.id,
+            "job_id": None,
+            "state": "completed",
+            "chunks_processed": new_file.chunk_count,
+            "deduplicated": True,
+            "message": "Identical file already processed; its indexed content was reused."
+        }
 
     # Create file record in PostgreSQL, now with session_id
+    file_id = uuid.uuid4()
     new_file = FileModel(
+        id=file_id,
         user_id=current_user.id,
-        session_id=uuid.UUID(session_id), # <-- ADD this
-        filename=file.filename
+        session_id=session_id, # <-- ADD this
+        filename=file.filename,
+        content_sha256=content_sha256,
+        chunk_file_id=file_id,
     )
     db.add(new_file)
     await db.commit()
-    await db.refresh(new_file)
 
-    # Process and embed the file
-    try:
-        # Pass file_id to link chunks in Weaviate
-        chunks_created = process_and_embed_file(file_path, current_user.id, new_file.id)
-    except Exception as e:
-        await db.delete(new_file)
-        await db.commit()
-        raise HTTPException(status_code=500, detail=f"Failed to process file: {e}")
-    finally:
-        os.remove(file_path)
+    # Parsing and embedding run in the ingestion worker pool; the client polls the job
+    job = submit_ingestion(file_path, current_user.id, new_file.id, file.filename)
 
     return {
-        "filename": file.filename,
+        **response,
         "file_id": new_file.id,
-        "chunks_created": chunks_created,
-        "file_size_mb": round(file_size / (1024*1024), 2),
-        "message": f"File uploaded and processed successfully. Created {chunks_created} text chunks for analysis."
+        "job_id": job["job_id"],
+        "state": job["state"],
+        "deduplicated": False,
+        "message": "File uploaded. Processing has been queued."
+    }
+
+@router.get("/upload/jobs/{job_id}", dependencies=[Depends(admit("upload_jobs", INTERACTIVE))])
+async def get_upload_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+):
+    job = get_job(job_id)
+    if not job or job["user_id"] != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return {
+        "job_id": job["job_id"],
+        "file_id": job["file_id"],
+        "filename": job["filename"],
+        "state": job["state"],
+        "pages_processed": job["pages_processed"],
+        "chunks_processed": job["chunks_processed"],
+        "duplicate_chunks": job["duplicate_chunks"],
+        "duplicate_fraction": job["duplicate_fraction"],
+        "error": job["error"],
     }
 
 
+def get_chat_llm():
+    # One long-lived client for all requests, created in the app lifespan
+    return get_chat_model()
+
+async def build_chat_chain(query: str, user_id: uuid.UUID, session_id: uuid.UUID, db: AsyncSession, llm,
+                           exclude_message_id: uuid.UUID | None = None):
+    """Return a runnable mapping the question to the answer text, in RAG mode if the session has files.
+
+    Recent turns of the session (minus exclude_message_id, the current question)
+    are added ahead of the question within CHAT_MEMORY_TOKEN_BUDGET.
+    """
+    history = await load_conversation_memory(
+        db, user_id, session_id, exclude_id=exclude_message_id, pending=history_buffer.pending(user_id, session_id),
+    )
+
+    # Files uploaded *for this specific session*; one query decides the mode and feeds the search
+    # Deduplicated uploads point at the chunks of an identical earlier file
+    files_in_session = await db.execute(
+        select(func.coalesce(FileModel.chunk_file_id, FileModel.id))
+        .where(FileModel.user_id == user_id, FileModel.session_id == session_id)
+        .distinct()
+    )
+    file_ids = files_in_session.scalars().all()
+
+    if file_ids:
+        # RAG Mode: Query Weaviate using file_ids from the current session
+        # Near-duplicate chunks of these files may be stored under the user's other files
+        shared = await shared_chunks(db, file_ids)
+        context = await retrieve_context(query, user_id, file_ids, shared) # Pass file_ids to query
+
+        template = "Answer the question based only on the following context:\n{context}\n\nQuestion: {question}"
+        prompt = ChatPromptTemplate.from_messages([MessagesPlaceholder("history"), ("human", template)])
+        return {"context": lambda x: context, "history": lambda x: history, "question": RunnablePassthrough()} | prompt | llm | StrOutputParser()
+
+    # Normal Chat Mode
+    prompt = ChatPromptTemplate.from_messages([MessagesPlaceholder("history"), ("human", "{question}")])
+    return {"history": lambda x: history, "question": RunnablePassthrough()} | prompt | llm | StrOutputParser()
+
 # --- UPDATE THE /chat ENDPOINT ---
-@router.post("/chat")
+@router.post("/chat", dependencies=[Depends(admit("chat", CHAT)), Depends(track_in_flight("chat"))])
 async def chat(
     chat_query: ChatQuery,
     db: AsyncSession = Depends(get_db_session),
     current_user: User = Depends(get_current_user),
+    llm: BaseChatModel = Depends(get_chat_llm),
 ):
     user_id = current_user.id
     session_id = chat_query.session_id # Use the session_id from the request
 
-    # Save user message
-    user_message = ChatHistory(user_id=user_id, session_id=session_id, role="user", message=chat_query.query)
-    db.add(user_message)
+    user_message = new_chat_message(user_id, session_id, "user", chat_query.query)
 
-    # Check if files have been uploaded *for this specific session*
-    result = await db.execute(select(FileModel).where(FileModel.user_id == user_id, FileModel.session_id == session_id))
-    session_has_files = result.scalars().first() is not None
+    chat_chain = await build_chat_chain(chat_query.query, user_id, session_id, db, llm, exclude_message_id=user_message.id)
+    with metrics.stage_timer("llm"):
+        response_message = await chat_chain.ainvoke(chat_query.query, config={"callbacks": metrics.llm_callbacks()})
 
-    llm = ChatOpenAI(model_name="gpt-3.5-turbo", temperature=0)
-
-    if session_has_files:
-        # RAG Mode: Query Weaviate using file_ids from the current session
-        files_in_session = await db.execute(select(FileModel.id).where(FileModel.user_id == user_id, FileModel.session_id == session_id))
-        file_ids = [row[0] for row in files_in_session.all()]
+    # Save both turns (and the session summary) in one transaction, or hand
+    # them to the write-behind buffer
+    assistant_message = new_chat_message(user_id, session_id, "assistant", response_message)
+    await save_chat_messages(db, user_message, assistant_message)
 
-        context_chunks = query_weaviate(chat_query.query, user_id, file_ids) # Pass file_ids to query
-        context = "\n---\n".join([chunk['content'] for chunk in context_chunks])
+    return {"response": response_message}
 
-        template = "Answer the question based only on the following context:\n{context}\n\nQuestion: {question}"
-        prompt = ChatPromptTemplate.from_template(template)
-        rag_chain = ({"context": lambda x: context, "question": RunnablePassthrough()} | prompt | llm | StrOutputParser())
-        response_message = rag_chain.invoke(chat_query.query)
-    else:
-        # Normal Chat Mode
-        response = llm.invoke(chat_query.query)
-        response_message = response.content
-
-    # Save assistant message
-    assistant_message = ChatHistory(user_id=user_id, session_id=session_id, role="assistant", message=response_message)
-    db.add(assistant_message)
-    await db.commit()
+@router.post("/chat/stream")
+async def chat_stream(
+    chat_query: ChatQuery,
+    db: AsyncSession = Depends(get_db_session),
+    current_user: User = Depends(get_current_user),
+    llm: BaseChatModel = Depends(get_chat_llm),
+):
+    """Same as /chat, but sends tokens as Server-Sent Events while the model generates them."""
+    user_id = current_user.id
+    session_id = chat_query.session_id
 
-    return {"response": response_message}
+    # The slot and the in-flight gauge are released when the stream ends, not
+    # when the handler returns (where a `yield` dependency's exit code may run
+    # on older FastAPI); closing the stack a second time does nothing
+    await _acquire_slot(user_id, CHAT, "chat_stream")
+    stream_scope = ExitStack()
+    stream_scope.callback(admission_controller.release, user_id, CHAT)
+    stream_scope.enter_context(metrics.in_flight("chat_stream"))
 
-@router.get("/chat/history/{session_id}")
+    try:
+        # The user message is committed up front so it survives a dropped stream
+        user_message = new_chat_message(user_id, session_id, "user", chat_query.query)
+        await save_chat_messages(db, user_message)
+
+        chat_chain = await build_chat_chain(chat_query.query, user_id, session_id, db, llm, exclude_message_id=user_message.id)
+    except BaseException:
+        stream_scope.close()
+        raise
+
+    async def event_generator():
+        try:
+            tokens = []
+            started = time.perf_counter()
+            try:
+                async for token in chat_chain.astream(chat_query.query, config={"callbacks": metrics.llm_callbacks()}):
+                    if not tokens:
+                        metrics.observe_stage("llm_first_token", time.perf_counter() - started)
+                    tokens.append(token)
+                    yield {"event": "token", "data": token}
+            except Exception as e:
+                yield {"event": "error", "data": json.dumps({"detail": f"Failed to generate response: {e}"})}
+                return
+            metrics.observe_stage("llm", time.perf_counter() - started)
+
+            # Persist the assistant message once the full answer is known. The
+            # request-scoped session may already be closed here, so use our own.
+            response_message = "".join(tokens)
+            async with async_session() as write_db:
+                assistant_message = new_chat_message(user_id, session_id, "assistant", response_message)
+                await save_chat_messages(write_db, assistant_message)
+
+            yield {"event": "done", "data": json.dumps({"chat_history_id": str(assistant_message.id), "response": response_message})}
+        finally:
+            stream_scope.close()
+
+    # The background task covers a stream that is cancelled before it starts
+    return EventSourceResponse(event_generator(), background=BackgroundTask(stream_scope.close))
+
+@router.get("/chat/history/{session_id}", dependencies=[Depends(admit("chat_history", INTERACTIVE))])
 async def get_chat_history(
     session_id: uuid.UUID,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = None,
     db: AsyncSession = Depends(get_db_session),
     current_user: User = Depends(get_current_user)
 ):
-    result = await db.execute(
-        select(ChatHistory)
-        .where(ChatHistory.user_id == current_user.id, ChatHistory.session_id == session_id)
-        .order_by(ChatHistory.timestamp)
-    )
-    history = result.scalars().all()
-    return history
+    """Newest `limit` messages (oldest first); pass next_cursor back to page further into the past."""
+    try:
+        messages, next_cursor = await fetch_history_page(
+            db, current_user.id, session_id, limit, cursor, pending=history_buffer.pending(current_user.id, session_id),
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"messages": messages, "next_cursor": next_cursor}
 
-@router.get("/chat/sessions")
+@router.get("/chat/sessions", dependencies=[Depends(admit("chat_sessions", INTERACTIVE))])
 async def get_chat_sessions(
     db: AsyncSession = Depends(get_db_session),
     current_user: User = Depends(get_current_user)
 ):
-    # This query gets the most recent message for each session
-    subquery = (
-        select(
-            ChatHistory.session_id,
-            ChatHistory.message,
-            ChatHistory.timestamp,
-            func.row_number().over(
-                partition_by=ChatHistory.session_id,
-                order_by=desc(ChatHistory.timestamp)
-            ).label('rn')
-        )
-        .where(ChatHistory.user_id == current_user.id)
-        .subquery()
-    )
-
+    # chat_sessions is kept up to date on every insert, so this is one range
+    # scan of the (user_id, last_timestamp) index
+    await flush_pending(current_user.id)
     result = await db.execute(
-        select(subquery.c.session_id, subquery.c.message, subquery.c.timestamp)
-        .where(subquery.c.rn == 1)
-        .order_by(desc(subquery.c.timestamp))
+        select(ChatSession)
+        .where(ChatSession.user_id == current_user.id)
+        .order_by(desc(ChatSession.last_timestamp))
     )
-
-    sessions = result.all()
-    # Format the data for the frontend
-    return [{"id": str(s.session_id), "title": s.message} for s in sessions]
+    return [
+        {
+            "id": str(s.session_id),
+            "title": s.title,
+            "last_message": s.last_message,
+            "last_timestamp": s.last_timestamp,
+            "message_count": s.message_count,
+        }
+        for s in result.scalars().all()
+    ]
 
 @router.delete("/chat/sessions/{session_id}")
 async def delete_chat_session(
@@ -205,38 +415,50 @@ async def delete_chat_session(
     db: AsyncSession = Depends(get_db_session),
     current_user: User = Depends(get_current_user)
 ):
-    # Delete all chat history for this session
-    result = await db.execute(
-        select(ChatHistory).where(
-            ChatHistory.user_id == current_user.id,
-            ChatHistory.session_id == session_id
-        )
+    # Buffered messages would otherwise bring the session back once flushed
+    await flush_pending(current_user.id)
+    # Set-based deletes: nothing is loaded into the ORM
+    history = await db.execute(
+        delete(ChatHistory).where(ChatHistory.user_id == current_user.id, ChatHistory.session_id == session_id)
     )
-    chat_messages = result.scalars().all()
-
-    if not chat_messages:
+    deleted_files = (await db.execute(
+        delete(FileModel)
+        .where(FileModel.user_id == current_user.id, FileModel.session_id == session_id)
+        .returning(FileModel.id, FileModel.chunk_file_id)
+    )).all()
+
+    if history.rowcount == 0 and not deleted_files:
+        await db.rollback()
         raise HTTPException(status_code=404, detail="Session not found")
 
-    # Delete chat history
-    for message in chat_messages:
-        await db.delete(message)
-
-    # Delete associated files for this session
-    result = await db.execute(
-        select(FileModel).where(
-            FileModel.user_id == current_user.id,
-            FileModel.session_id == session_id
-        )
+    await db.execute(
+        delete(ChatSession).where(ChatSession.user_id == current_user.id, ChatSession.session_id == session_id)
     )
-    files = result.scalars().all()
-
-    for file in files:
-        await db.delete(file)
-
+    # Chunks shared with deduplicated uploads in other sessions stay
+    file_ids = await unreferenced_chunk_file_ids(db, [chunk_file_id or file_id for file_id, chunk_file_id in deleted_files])
+    await delete_chunk_duplicates(db, file_ids)
     await db.commit()
 
+    # Purge the files' chunks from the vector store; if this fails the orphan
+    # sweep removes them later
+    try:
+        await asyncio.to_thread(delete_file_chunks, current_user.id, file_ids)
+    except Exception:
+        logger.exception("Failed to delete chunks for session %s", session_id)
+        invalidate_retrieval_cache(current_user.id)
+
     return {"message": "Session deleted successfully"}
 
+@router.get("/cache/stats")
+async def cache_stats():
+    """Hit/miss counters for the RAG and session caches"""
+    return {**get_cache_stats(), "session_cache": session_cache.stats()}
+
+@router.get("/admission/stats")
+async def admission_stats():
+    """Requests holding or waiting for an admission slot, and rejections so far"""
+    return admission_controller.stats()
+
 @router.get("/upload/limits")
 async def get_upload_limits():
     """Get current upload limits and recommendations"""
@@ -254,6 +476,14 @@ async def get_upload_limits():
             "Batch embedding processing",
             "Larger chunk sizes (2000 chars)",
             "Smart text splitting",
-            "File size validation"
-        ]
+            "File size validation",
+            "Background ingestion queue",
+            "Persistent chunk embedding cache",
+            "Query embedding and retrieval caches",
+            "Streaming page-by-page ingestion with overlapped embed/insert batches",
+            "Parallel PDF parsing for large documents",
+            "Shared embedding rate limit with 429 backoff"
+        ],
+        "max_concurrent_ingestions": MAX_CONCURRENT_INGESTIONS,
+        "max_batch_files": MAX_BATCH_FILES
     }
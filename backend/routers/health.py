@@ -0,0 +1,73 @@
+# routers/health.py
+"""Liveness and readiness probes.
+
+/healthz only says the process is serving requests. /readyz checks every
+dependency and answers 503 until all of them are usable, so a load balancer
+holds traffic back while the app warms up or a dependency is down.
+"""
+import asyncio
+import os
+import time
+
+from fastapi import APIRouter, Response
+from sqlalchemy import text
+
+from db.database import async_session
+from services.clients import clients_ready
+from services.rag_service import vector_store
+
+router = APIRouter()
+
+# Per-check limit, so a hung dependency can't hang the probe
+READINESS_TIMEOUT_SECONDS = float(os.getenv("READINESS_TIMEOUT_SECONDS", "2"))
+
+
+async def _check_database():
+    async with async_session() as db:
+        await db.execute(text("SELECT 1"))
+
+
+async def _check_vector_store():
+    if not await asyncio.to_thread(vector_store.ping):
+        raise RuntimeError("vector store is not ready")
+
+
+async def _check_openai_clients():
+    # Built on a background thread after startup; no request is sent to OpenAI
+    if not clients_ready():
+        raise RuntimeError("clients are still being created")
+
+
+CHECKS = {
+    "database": _check_database,
+    "vector_store": _check_vector_store,
+    "openai_clients": _check_openai_clients,
+}
+
+
+async def _run_check(check) -> dict:
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(check(), timeout=READINESS_TIMEOUT_SECONDS)
+        result = {"ready": True}
+    except asyncio.TimeoutError:
+        result = {"ready": False, "error": f"timed out after {READINESS_TIMEOUT_SECONDS}s"}
+    except Exception as e:
+        result = {"ready": False, "error": str(e) or type(e).__name__}
+    result["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+@router.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+
+@router.get("/readyz")
+async def readyz(response: Response):
+    results = await asyncio.gather(*(_run_check(check) for check in CHECKS.values()))
+    checks = dict(zip(CHECKS, results))
+    ready = all(result["ready"] for result in results)
+    if not ready:
+        response.status_code = 503
+    return {"status": "ready" if ready else "not_ready", "checks": checks}
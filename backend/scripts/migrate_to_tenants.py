@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Copy chunks from the shared DocumentChunk collection into per-user tenants.
+
+Run once before switching WEAVIATE_MULTI_TENANCY on:
+
+    python -m scripts.migrate_to_tenants              # copy, then compare counts
+    python -m scripts.migrate_to_tenants --dry-run    # only report per-user counts
+    python -m scripts.migrate_to_tenants --drop-source
+
+Objects keep their UUIDs, so the copy can be re-run after an interruption
+without creating duplicates. The source collection is only dropped with
+--drop-source and when every tenant holds as many objects as were copied.
+"""
+import argparse
+import os
+from collections import Counter, defaultdict
+
+# The tenant store only exists for the Weaviate backend
+os.environ["VECTOR_STORE_BACKEND"] = "weaviate"
+
+from db.database import get_weaviate_client  # noqa: E402
+from services.weaviate_store import COLLECTION_NAME, MultiTenantWeaviateVectorStore  # noqa: E402
+
+BATCH_SIZE = 500
+
+
+def _flush(store: MultiTenantWeaviateVectorStore, pending: dict[str, list]):
+    for user_id, objects in pending.items():
+        tenant = store._collection(user_id, create=True)
+        with tenant.batch.fixed_size(batch_size=BATCH_SIZE) as batch:
+            for obj in objects:
+                batch.add_object(properties=obj.properties, vector=obj.vector["default"], uuid=obj.uuid)
+        if tenant.batch.failed_objects:
+            raise RuntimeError(f"{len(tenant.batch.failed_objects)} objects failed for tenant {user_id}")
+    pending.clear()
+
+
+def migrate(dry_run: bool = False, drop_source: bool = False) -> Counter:
+    weaviate_client = get_weaviate_client()
+    source = weaviate_client.collections.get(COLLECTION_NAME)
+    store = MultiTenantWeaviateVectorStore(weaviate_client)
+    if not dry_run:
+        store.create_schema()
+
+    copied = Counter()
+    pending = defaultdict(list)
+    buffered = 0
+    for obj in source.iterator(include_vector=True):
+        user_id = str(obj.properties["user_id"])
+        copied[user_id] += 1
+        if dry_run:
+            continue
+        pending[user_id].append(obj)
+        buffered += 1
+        if buffered >= BATCH_SIZE:
+            _flush(store, pending)
+            buffered = 0
+    if pending:
+        _flush(store, pending)
+
+    print(f"{sum(copied.values())} chunks across {len(copied)} users{' (dry run)' if dry_run else ''}")
+    if dry_run:
+        return copied
+
+    tenant_collection = weaviate_client.collections.get(store.collection_name)
+    mismatched = {
+        user_id: count for user_id, count in copied.items()
+        if tenant_collection.with_tenant(user_id).aggregate.over_all(total_count=True).total_count < count
+    }
+    if mismatched:
+        print(f"Tenants missing objects, source kept: {mismatched}")
+    elif drop_source:
+        weaviate_client.collections.delete(COLLECTION_NAME)
+        print(f"Dropped {COLLECTION_NAME}")
+    return copied
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="count chunks per user without copying")
+    parser.add_argument("--drop-source", action="store_true", help=f"delete {COLLECTION_NAME} after a verified copy")
+    args = parser.parse_args()
+    try:
+        migrate(dry_run=args.dry_run, drop_source=args.drop_source)
+    finally:
+        get_weaviate_client().close()
+
+
+if __name__ == "__main__":
+    main()
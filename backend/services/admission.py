@@ -0,0 +1,156 @@
+# services/admission.py
+"""Admission control for the expensive endpoints.
+
+Every admitted request holds one of ADMISSION_MAX_CONCURRENT slots until its
+response is sent. A user may hold or wait for at most ADMISSION_MAX_PER_USER
+slots; past that the request is refused at once with 429. When all slots are
+taken, requests wait in a bounded queue, highest priority first. If the
+queue is full, or the wait lasts longer than ADMISSION_QUEUE_TIMEOUT_SECONDS,
+the request gets a 503. Both responses carry Retry-After. INTERACTIVE
+requests (session lists, history pages, job polls) skip the per-user limit
+and may also use the ADMISSION_RESERVED_SLOTS that chat and uploads can't
+take, so they stay fast while a user's uploads pile up.
+"""
+import asyncio
+import itertools
+import os
+import time
+import uuid
+
+from services import metrics
+
+ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", "64"))
+ADMISSION_MAX_PER_USER = int(os.getenv("ADMISSION_MAX_PER_USER", "4"))
+ADMISSION_RESERVED_SLOTS = int(os.getenv("ADMISSION_RESERVED_SLOTS", "8"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "128"))
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "5"))
+ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "1"))
+
+# Lower runs first
+INTERACTIVE, CHAT, INGEST = 0, 1, 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", CHAT: "chat", INGEST: "ingest"}
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code: int, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_concurrent: int = ADMISSION_MAX_CONCURRENT,
+        max_per_user: int = ADMISSION_MAX_PER_USER,
+        reserved_slots: int = ADMISSION_RESERVED_SLOTS,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT_SECONDS,
+        retry_after: int = ADMISSION_RETRY_AFTER_SECONDS,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_per_user = max_per_user
+        self.reserved_slots = reserved_slots
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.active = 0
+        self._active_by_user: dict[uuid.UUID, int] = {}
+        # (priority, arrival, user_id, future); sorted on dispatch, so FIFO within a priority
+        self._waiters: list[tuple] = []
+        self._arrivals = itertools.count()
+        self.rejected = {"user_limit": 0, "queue_full": 0, "queue_timeout": 0, "ingestion_backlog": 0}
+
+    def _user_blocked(self, user_id: uuid.UUID, priority: int) -> bool:
+        return priority != INTERACTIVE and self._active_by_user.get(user_id, 0) >= self.max_per_user
+
+    def _user_over_limit(self, user_id: uuid.UUID, priority: int) -> bool:
+        # Queued requests count too, so one user can't fill the shared queue
+        if priority == INTERACTIVE:
+            return False
+        queued = sum(1 for w in self._waiters if w[2] == user_id and w[0] != INTERACTIVE)
+        return self._active_by_user.get(user_id, 0) + queued >= self.max_per_user
+
+    def _can_run(self, user_id: uuid.UUID, priority: int) -> bool:
+        limit = self.max_concurrent if priority == INTERACTIVE else self.max_concurrent - self.reserved_slots
+        return self.active < limit and not self._user_blocked(user_id, priority)
+
+    def _grant(self, user_id: uuid.UUID, priority: int):
+        self.active += 1
+        if priority != INTERACTIVE:
+            self._active_by_user[user_id] = self._active_by_user.get(user_id, 0) + 1
+
+    def record_rejection(self, endpoint: str, reason: str):
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+        metrics.record_admission_rejected(endpoint, reason)
+
+    def _reject(self, status_code: int, reason: str, endpoint: str):
+        self.record_rejection(endpoint, reason)
+        raise AdmissionRejected(status_code, reason, self.retry_after)
+
+    def _update_queue_depth(self):
+        for priority, name in PRIORITY_NAMES.items():
+            metrics.set_admission_queue_depth(name, sum(1 for w in self._waiters if w[0] == priority))
+
+    def _dispatch(self):
+        for waiter in sorted(self._waiters, key=lambda w: w[:2]):
+            priority, _, user_id, future = waiter
+            if self._can_run(user_id, priority):
+                self._waiters.remove(waiter)
+                self._grant(user_id, priority)
+                future.set_result(None)
+        self._update_queue_depth()
+
+    async def acquire(self, user_id: uuid.UUID, priority: int, endpoint: str):
+        """Take a slot, waiting in the queue if needed; raises AdmissionRejected when refused."""
+        if self._user_over_limit(user_id, priority):
+            self._reject(429, "user_limit", endpoint)
+        if self._can_run(user_id, priority):
+            self._grant(user_id, priority)
+            return
+        if len(self._waiters) >= self.max_queue:
+            self._reject(503, "queue_full", endpoint)
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = (priority, next(self._arrivals), user_id, future)
+        self._waiters.append(waiter)
+        self._update_queue_depth()
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.queue_timeout)
+        except BaseException as e:
+            if future.done():
+                # Granted just as we gave up: hand the slot back
+                self.release(user_id, priority)
+            else:
+                self._waiters.remove(waiter)
+                self._update_queue_depth()
+            if isinstance(e, asyncio.TimeoutError):
+                self._reject(503, "queue_timeout", endpoint)
+            raise
+        finally:
+            metrics.observe_stage(f"admission_wait_{PRIORITY_NAMES[priority]}", time.perf_counter() - started)
+
+    def release(self, user_id: uuid.UUID, priority: int):
+        self.active -= 1
+        if priority != INTERACTIVE:
+            remaining = self._active_by_user[user_id] - 1
+            if remaining:
+                self._active_by_user[user_id] = remaining
+            else:
+                del self._active_by_user[user_id]
+        self._dispatch()
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "max_concurrent": self.max_concurrent,
+            "max_per_user": self.max_per_user,
+            "queued": {name: sum(1 for w in self._waiters if w[0] == p) for p, name in PRIORITY_NAMES.items()},
+            "max_queue": self.max_queue,
+            "rejected": dict(self.rejected),
+        }
+
+
+admission_controller = AdmissionController()
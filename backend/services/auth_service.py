@@ -1,5 +1,20 @@
+import os
+import time
 import bcrypt
 import uuid
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from models.user import User, Session
+from services.cache import TTLCache
+
+# Session token -> User. Logout invalidates the entry in this process; other
+# workers keep serving it until the TTL runs out, so keep the TTL short.
+session_cache = TTLCache(
+    max_size=int(os.getenv("SESSION_CACHE_SIZE", "10000")),
+    ttl_seconds=float(os.getenv("SESSION_CACHE_TTL", "60")),
+)
 
 # Helper functions for password hashing and verification
 def hash_password(password: str) -> str:
@@ -10,4 +25,30 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 # Helper for session token generation
 def generate_session_token() -> str:
-    return str(uuid.uuid4())
\ No newline at end of file
+    return str(uuid.uuid4())
+
+async def get_user_for_session(db: AsyncSession, session_token: str) -> User | None:
+    """Resolve a session token to its user with one joined query, cached per token."""
+    user = session_cache.get(session_token)
+    if user is not None:
+        return user
+
+    started = time.perf_counter()
+    result = await db.execute(
+        select(User)
+        .join(Session, Session.user_id == User.id)
+        .where(Session.session_token == session_token)
+    )
+    user = result.scalars().first()
+    if user is None:
+        return None
+
+    # Detach so the cached instance outlives this request's DB session
+    db.expunge(user)
+    session_cache.set(session_token, user, cost_seconds=time.perf_counter() - started)
+    return user
+
+async def delete_session(db: AsyncSession, session_token: str):
+    await db.execute(delete(Session).where(Session.session_token == session_token))
+    await db.commit()
+    session_cache.pop(session_token)
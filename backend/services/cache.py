@@ -0,0 +1,68 @@
+# services/cache.py
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe in-process LRU cache whose entries also expire after ttl_seconds.
+
+    Each entry remembers how long it took to compute, so a hit can report the
+    latency it saved.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            self.saved_seconds += entry[2]
+            return entry[0]
+
+    def set(self, key, value, cost_seconds: float = 0.0):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl_seconds, cost_seconds)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return entry[0] if entry else None
+
+    def invalidate(self, predicate):
+        """Drop every entry whose key matches predicate(key)."""
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "latency_saved_seconds": round(self.saved_seconds, 4),
+        }
@@ -0,0 +1,151 @@
+# services/chat_history_buffer.py
+"""Optional write-behind persistence for chat messages.
+
+With CHAT_HISTORY_WRITE_BEHIND=true, /chat hands its messages to an in-process
+buffer instead of committing inside the request. The buffer is written with one
+bulk INSERT (plus one chat_sessions upsert) every CHAT_HISTORY_FLUSH_INTERVAL_MS,
+or as soon as CHAT_HISTORY_FLUSH_SIZE messages are waiting, and drained on
+shutdown. Reads merge in the session's pending messages, so a client always
+sees what it just wrote.
+"""
+import asyncio
+import logging
+import os
+import uuid
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.database import async_session
+from models.chat import ChatHistory
+from services import metrics
+from services.chat_history_service import add_chat_messages, upsert_chat_sessions
+
+logger = logging.getLogger(__name__)
+
+CHAT_HISTORY_WRITE_BEHIND = os.getenv("CHAT_HISTORY_WRITE_BEHIND", "false").lower() == "true"
+CHAT_HISTORY_FLUSH_INTERVAL_MS = int(os.getenv("CHAT_HISTORY_FLUSH_INTERVAL_MS", "200"))
+CHAT_HISTORY_FLUSH_SIZE = int(os.getenv("CHAT_HISTORY_FLUSH_SIZE", "500"))
+# Past this many unflushed messages (e.g. the database is down) writes go
+# straight to the database again, so memory use stays bounded
+CHAT_HISTORY_MAX_PENDING = int(os.getenv("CHAT_HISTORY_MAX_PENDING", "10000"))
+
+_COLUMNS = [column.key for column in ChatHistory.__table__.columns]
+
+
+class ChatHistoryBuffer:
+    def __init__(self, flush_size: int = CHAT_HISTORY_FLUSH_SIZE, max_pending: int = CHAT_HISTORY_MAX_PENDING):
+        self.flush_size = flush_size
+        self.max_pending = max_pending
+        self._pending: list[ChatHistory] = []
+        # Taken by the running flush; still readable until its commit lands
+        self._in_flight: list[ChatHistory] = []
+        self._lock = None
+        self._flush_task = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, *messages: ChatHistory) -> bool:
+        """Queue messages for the next flush; False if the buffer is full and the caller must write them."""
+        if len(self._pending) + len(messages) > self.max_pending:
+            return False
+        self._pending.extend(messages)
+        if len(self._pending) >= self.flush_size and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.create_task(self._flush_logged())
+        return True
+
+    @property
+    def flushing(self) -> bool:
+        return self._lock is not None and self._lock.locked()
+
+    def pending(self, user_id: uuid.UUID, session_id: uuid.UUID | None = None) -> list[ChatHistory]:
+        return [
+            m for m in self._in_flight + self._pending
+            if m.user_id == user_id and (session_id is None or m.session_id == session_id)
+        ]
+
+    async def flush(self) -> int:
+        """Write everything queued so far; returns the number of messages written.
+
+        Flushes run one at a time, so when this returns every message added
+        before the call is in the database (or back in the buffer on failure).
+        """
+        # Created lazily so the lock binds to the running event loop
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            self._in_flight = batch
+            try:
+                with metrics.stage_timer("chat_history_flush"):
+                    async with async_session() as db:
+                        await db.execute(insert(ChatHistory), [{key: getattr(m, key) for key in _COLUMNS} for m in batch])
+                        await upsert_chat_sessions(db, batch)
+                        await db.commit()
+            except BaseException:
+                # Keep them (ahead of newer messages) for the next attempt, also when cancelled
+                self._pending[:0] = batch
+                raise
+            finally:
+                self._in_flight = []
+            return len(batch)
+
+    async def _flush_logged(self):
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Chat history flush failed; %d messages kept for retry", len(self))
+
+    def reset(self):
+        self._pending = []
+        self._in_flight = []
+        self._lock = self._flush_task = None
+
+
+history_buffer = ChatHistoryBuffer()
+_flusher_task = None
+
+
+async def save_chat_messages(db: AsyncSession, *messages: ChatHistory):
+    """Persist messages of a chat turn, through the write-behind buffer when it is enabled."""
+    if CHAT_HISTORY_WRITE_BEHIND and history_buffer.add(*messages):
+        return
+    await add_chat_messages(db, *messages)
+    await db.commit()
+
+
+async def flush_pending(user_id: uuid.UUID):
+    """Write the user's buffered (or in-flight) messages before reading or
+    deleting rows the pending merge doesn't cover."""
+    if history_buffer.pending(user_id) or history_buffer.flushing:
+        await history_buffer.flush()
+
+
+async def _flush_forever():
+    while True:
+        await asyncio.sleep(CHAT_HISTORY_FLUSH_INTERVAL_MS / 1000)
+        await history_buffer._flush_logged()
+
+
+def start_history_flusher():
+    global _flusher_task
+    if CHAT_HISTORY_WRITE_BEHIND and _flusher_task is None:
+        _flusher_task = asyncio.create_task(_flush_forever())
+
+
+async def stop_history_flusher():
+    global _flusher_task
+    if _flusher_task is not None:
+        _flusher_task.cancel()
+        try:
+            await _flusher_task
+        except asyncio.CancelledError:
+            pass
+        _flusher_task = None
+    # Drain whatever is still queued before the process exits
+    if len(history_buffer):
+        await history_buffer.flush()
+    history_buffer.reset()
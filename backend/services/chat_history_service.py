@@ -0,0 +1,195 @@
+# services/chat_history_service.py
+import base64
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy import case, func, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from models.chat import ChatHistory, ChatSession, utcnow
+from services.tokens import count_tokens
+
+# Earlier turns added to the prompt, newest first, until this many tokens
+CHAT_MEMORY_TOKEN_BUDGET = int(os.getenv("CHAT_MEMORY_TOKEN_BUDGET", "1500"))
+CHAT_MEMORY_MAX_TURNS = int(os.getenv("CHAT_MEMORY_MAX_TURNS", "20"))
+
+
+def new_chat_message(user_id: uuid.UUID, session_id: uuid.UUID, role: str, message: str) -> ChatHistory:
+    """Build a ChatHistory row with its token count, so it is never re-tokenized."""
+    return ChatHistory(
+        id=uuid.uuid4(),
+        user_id=user_id,
+        session_id=session_id,
+        role=role,
+        message=message,
+        token_count=count_tokens(message),
+        # Set here rather than at flush so the session summary can use it
+        timestamp=utcnow(),
+    )
+
+
+def _upsert(db: AsyncSession):
+    return postgresql.insert if db.bind.dialect.name == "postgresql" else sqlite.insert
+
+
+async def add_chat_messages(db: AsyncSession, *messages: ChatHistory):
+    """Add messages and update their chat_sessions rows in the same transaction.
+
+    The caller commits. Concurrent writers to the same session are handled by
+    the upsert: counts add up and the newest message wins.
+    """
+    db.add_all(messages)
+    await upsert_chat_sessions(db, messages)
+
+
+async def upsert_chat_sessions(db: AsyncSession, messages: Iterable[ChatHistory]):
+    """Fold messages (of any number of sessions) into chat_sessions with one statement."""
+    by_session = {}
+    for message in sorted(messages, key=lambda m: (m.timestamp, m.id)):
+        by_session.setdefault((message.user_id, message.session_id), []).append(message)
+    if not by_session:
+        return
+
+    table = ChatSession.__table__
+    insert = _upsert(db)(table).values([
+        {
+            "user_id": user_id,
+            "session_id": session_id,
+            "title": session_messages[0].message,
+            "last_message": session_messages[-1].message,
+            "last_timestamp": session_messages[-1].timestamp,
+            "message_count": len(session_messages),
+        }
+        for (user_id, session_id), session_messages in by_session.items()
+    ])
+    is_newer = insert.excluded.last_timestamp >= table.c.last_timestamp
+    await db.execute(insert.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.session_id],
+        set_={
+            "last_message": case((is_newer, insert.excluded.last_message), else_=table.c.last_message),
+            "last_timestamp": case((is_newer, insert.excluded.last_timestamp), else_=table.c.last_timestamp),
+            "message_count": table.c.message_count + insert.excluded.message_count,
+        },
+    ))
+
+
+def _newest_first(rows, pending: Iterable[ChatHistory]) -> list:
+    """Merge stored rows with not-yet-flushed messages, newest first, each id once."""
+    merged = {row.id: row for row in pending}
+    merged.update((row.id, row) for row in rows)
+    return sorted(merged.values(), key=lambda m: (m.timestamp, m.id), reverse=True)
+
+
+async def backfill_chat_sessions(db: AsyncSession) -> int:
+    """Build chat_sessions from chat_history if the summary table is empty.
+
+    Returns the number of sessions written (0 if the table was already populated).
+    """
+    if (await db.execute(select(ChatSession.session_id).limit(1))).first():
+        return 0
+
+    newest_first = (ChatHistory.timestamp.desc(), ChatHistory.id.desc())
+    session = (ChatHistory.user_id, ChatHistory.session_id)
+    per_message = select(
+        ChatHistory.session_id,
+        ChatHistory.user_id,
+        ChatHistory.message,
+        ChatHistory.timestamp,
+        func.first_value(ChatHistory.message).over(
+            partition_by=session,
+            order_by=(ChatHistory.timestamp, ChatHistory.id),
+        ).label("title"),
+        func.count().over(partition_by=session).label("message_count"),
+        func.row_number().over(partition_by=session, order_by=newest_first).label("rn"),
+    ).subquery()
+    latest = select(
+        per_message.c.session_id,
+        per_message.c.user_id,
+        per_message.c.title,
+        per_message.c.message,
+        per_message.c.timestamp,
+        per_message.c.message_count,
+    ).where(per_message.c.rn == 1)
+
+    # Several workers may start at once and all find the table empty; rows
+    # another worker (or a live chat) has written already are kept as they are
+    table = ChatSession.__table__
+    result = await db.execute(_upsert(db)(table).from_select(
+        ["session_id", "user_id", "title", "last_message", "last_timestamp", "message_count"], latest,
+    ).on_conflict_do_nothing(index_elements=[table.c.user_id, table.c.session_id]))
+    await db.commit()
+    return result.rowcount
+
+
+def encode_cursor(message: ChatHistory) -> str:
+    raw = json.dumps([message.timestamp.isoformat(), str(message.id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    """Raises ValueError for malformed cursors."""
+    try:
+        timestamp, message_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(timestamp), uuid.UUID(message_id)
+    except (TypeError, ValueError, json.JSONDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+async def fetch_history_page(db: AsyncSession, user_id: uuid.UUID, session_id: uuid.UUID, limit: int,
+                             cursor: str | None = None, pending: Iterable[ChatHistory] = ()):
+    """Return (messages oldest-first, cursor for the next older page or None).
+
+    Pages walk backwards from the newest message using the
+    (session_id, timestamp, id) index, so each page costs the same. pending
+    are this session's messages still in the write-behind buffer.
+    """
+    query = (
+        select(ChatHistory)
+        .where(ChatHistory.session_id == session_id, ChatHistory.user_id == user_id)
+        .order_by(ChatHistory.timestamp.desc(), ChatHistory.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        timestamp, message_id = decode_cursor(cursor)
+        query = query.where(tuple_(ChatHistory.timestamp, ChatHistory.id) < tuple_(timestamp, message_id))
+        pending = [m for m in pending if (m.timestamp, m.id) < (timestamp, message_id)]
+
+    rows = _newest_first((await db.execute(query)).scalars().all(), pending)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(rows[-1]) if has_more else None
+    return list(reversed(rows)), next_cursor
+
+
+async def load_conversation_memory(db: AsyncSession, user_id: uuid.UUID, session_id: uuid.UUID,
+                                   exclude_id: uuid.UUID | None = None,
+                                   token_budget: int | None = None,
+                                   pending: Iterable[ChatHistory] = ()) -> list[tuple[str, str]]:
+    """Most recent (role, message) turns of the session that fit the token budget, oldest first.
+
+    pending are this session's messages still in the write-behind buffer.
+    """
+    if token_budget is None:
+        token_budget = CHAT_MEMORY_TOKEN_BUDGET
+    query = (
+        select(ChatHistory.id, ChatHistory.role, ChatHistory.message, ChatHistory.token_count, ChatHistory.timestamp)
+        .where(ChatHistory.session_id == session_id, ChatHistory.user_id == user_id)
+        .order_by(ChatHistory.timestamp.desc(), ChatHistory.id.desc())
+        .limit(CHAT_MEMORY_MAX_TURNS + 1)
+    )
+    turns, used = [], 0
+    for row in _newest_first((await db.execute(query)).all(), pending):
+        if row.id == exclude_id:
+            continue
+        # Rows written before token_count existed are counted on the fly
+        tokens = row.token_count if row.token_count is not None else count_tokens(row.message)
+        if used + tokens > token_budget or len(turns) == CHAT_MEMORY_MAX_TURNS:
+            break
+        used += tokens
+        turns.append((row.role, row.message))
+    return list(reversed(turns))
@@ -0,0 +1,196 @@
+# services/chunk_dedupe.py
+"""Near-duplicate chunk detection with MinHash signatures and LSH banding.
+
+Each chunk gets a MinHash signature over its word shingles; signatures are cut
+into bands and chunks sharing a band bucket are candidates, kept only if their
+estimated Jaccard similarity reaches CHUNK_DEDUPE_THRESHOLD. During ingestion a
+ChunkDeduper checks every chunk against the earlier chunks of the same file (in
+memory) and against the user's stored chunks (ChunkSignatureIndex, SQLite), so
+repeated headers, disclaimers and tables are embedded and stored once.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import uuid
+import zlib
+
+import numpy as np
+
+CHUNK_DEDUPE_ENABLED = os.getenv("CHUNK_DEDUPE_ENABLED", "true").lower() == "true"
+CHUNK_DEDUPE_THRESHOLD = float(os.getenv("CHUNK_DEDUPE_THRESHOLD", "0.9"))
+SHINGLE_WORDS = 5
+NUM_PERMUTATIONS = 128
+# 32 bands of 4 rows: pairs at the threshold almost always share a bucket,
+# and the signature check weeds out the extra candidates
+LSH_BANDS = 32
+_ROWS_PER_BAND = NUM_PERMUTATIONS // LSH_BANDS
+
+# Fixed seed: signatures are persisted, so every process must hash the same way
+_rng = np.random.default_rng(0x5EED)
+_A = _rng.integers(1, 2**63, size=NUM_PERMUTATIONS, dtype=np.uint64) | np.uint64(1)
+_B = _rng.integers(0, 2**63, size=NUM_PERMUTATIONS, dtype=np.uint64)
+_EMPTY = np.full(NUM_PERMUTATIONS, np.iinfo(np.uint32).max, dtype=np.uint32)
+
+
+def _shingles(text: str) -> np.ndarray:
+    words = text.lower().split()
+    grams = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(max(1, len(words) - SHINGLE_WORDS + 1))}
+    return np.fromiter((zlib.crc32(gram.encode("utf-8")) for gram in grams), dtype=np.uint64, count=len(grams))
+
+
+def minhash(text: str) -> np.ndarray:
+    """NUM_PERMUTATIONS uint32 minimums of multiply-shift hashes of the text's shingles."""
+    if not text.strip():
+        return _EMPTY
+    # uint64 multiplication wraps around; the high 32 bits are the hash
+    hashes = (_shingles(text)[:, None] * _A + _B) >> np.uint64(32)
+    return hashes.min(axis=0).astype(np.uint32)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity: the fraction of matching signature slots."""
+    return float(np.count_nonzero(a == b)) / NUM_PERMUTATIONS
+
+
+def band_keys(signature: np.ndarray) -> list[int]:
+    """One signed 64-bit bucket key per band (fits an SQLite INTEGER)."""
+    keys = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * _ROWS_PER_BAND:(band + 1) * _ROWS_PER_BAND]
+        digest = hashlib.blake2b(bytes([band]) + rows.tobytes(), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "big", signed=True))
+    return keys
+
+
+class ChunkSignatureIndex:
+    """Persistent per-user LSH index over the signatures of stored chunks.
+
+    Only an index: losing the file just means earlier uploads stop being
+    matched. Opened on first use, like the embedding cache.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS signatures ("
+                " user_id TEXT NOT NULL, file_id TEXT NOT NULL, chunk_index INTEGER NOT NULL,"
+                " signature BLOB NOT NULL, PRIMARY KEY (user_id, file_id, chunk_index))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS bands ("
+                " user_id TEXT NOT NULL, band_key INTEGER NOT NULL, file_id TEXT NOT NULL, chunk_index INTEGER NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_bands_user_key ON bands (user_id, band_key)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_bands_file ON bands (file_id)")
+        return self._conn
+
+    def find(self, user_id: uuid.UUID, signature: np.ndarray, keys: list[int], threshold: float):
+        """Best stored (file_id, chunk_index, similarity) of the user at or above threshold, or None."""
+        placeholders = ",".join("?" * len(keys))
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT DISTINCT s.file_id, s.chunk_index, s.signature FROM bands b"
+                " JOIN signatures s ON s.user_id = b.user_id AND s.file_id = b.file_id AND s.chunk_index = b.chunk_index"
+                f" WHERE b.user_id = ? AND b.band_key IN ({placeholders})",
+                [str(user_id), *keys],
+            ).fetchall()
+        best = None
+        for file_id, chunk_index, blob in rows:
+            score = similarity(signature, np.frombuffer(blob, dtype=np.uint32))
+            if score >= threshold and (best is None or score > best[2]):
+                best = (uuid.UUID(file_id), chunk_index, score)
+        return best
+
+    def add(self, user_id: uuid.UUID, file_id: uuid.UUID, entries: list[tuple[int, np.ndarray, list[int]]]):
+        """Index (chunk_index, signature, band keys) of a file's stored chunks."""
+        if not entries:
+            return
+        user, file = str(user_id), str(file_id)
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO signatures (user_id, file_id, chunk_index, signature) VALUES (?, ?, ?, ?)",
+                [(user, file, chunk_index, signature.tobytes()) for chunk_index, signature, _ in entries],
+            )
+            conn.executemany(
+                "INSERT INTO bands (user_id, band_key, file_id, chunk_index) VALUES (?, ?, ?, ?)",
+                [(user, key, file, chunk_index) for chunk_index, _, keys in entries for key in keys],
+            )
+            conn.commit()
+
+    def remove_files(self, file_ids: list):
+        file_ids = [str(fid) for fid in file_ids]
+        with self._lock:
+            conn = self._connect()
+            for i in range(0, len(file_ids), 500):
+                batch = file_ids[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                conn.execute(f"DELETE FROM bands WHERE file_id IN ({placeholders})", batch)
+                conn.execute(f"DELETE FROM signatures WHERE file_id IN ({placeholders})", batch)
+            conn.commit()
+
+
+class ChunkDeduper:
+    """Drops near-duplicate chunks while one file is ingested.
+
+    filter() returns the chunks to embed and store; the dropped ones are
+    collected in `duplicates` as back-references to the stored copy. commit()
+    adds the file's stored chunks to the user's index once ingestion succeeded.
+    """
+
+    def __init__(self, index: ChunkSignatureIndex | None, user_id: uuid.UUID, file_id: uuid.UUID,
+                 threshold: float = CHUNK_DEDUPE_THRESHOLD):
+        self.index = index
+        self.user_id = user_id
+        self.file_id = file_id
+        self.threshold = threshold
+        self.duplicates: list[dict] = []
+        self._stored: list[tuple[int, np.ndarray, list[int]]] = []
+        self._buckets: dict[int, list[int]] = {}  # band key -> positions in _stored
+
+    def _find_in_file(self, signature: np.ndarray, keys: list[int]):
+        best = None
+        for position in {p for key in keys for p in self._buckets.get(key, ())}:
+            chunk_index, stored_signature, _ = self._stored[position]
+            score = similarity(signature, stored_signature)
+            if score >= self.threshold and (best is None or score > best[2]):
+                best = (self.file_id, chunk_index, score)
+        return best
+
+    def filter(self, chunk_indexes: list[int], texts: list[str]) -> tuple[list[int], list[str]]:
+        kept_indexes, kept_texts = [], []
+        for chunk_index, text in zip(chunk_indexes, texts):
+            signature = minhash(text)
+            keys = band_keys(signature)
+            match = self._find_in_file(signature, keys)
+            if match is None and self.index is not None:
+                match = self.index.find(self.user_id, signature, keys, self.threshold)
+            if match is not None:
+                canonical_file_id, canonical_chunk_index, score = match
+                self.duplicates.append({
+                    "chunk_index": chunk_index,
+                    "canonical_file_id": canonical_file_id,
+                    "canonical_chunk_index": canonical_chunk_index,
+                    "similarity": round(score, 4),
+                })
+                continue
+            for key in keys:
+                self._buckets.setdefault(key, []).append(len(self._stored))
+            self._stored.append((chunk_index, signature, keys))
+            kept_indexes.append(chunk_index)
+            kept_texts.append(text)
+        return kept_indexes, kept_texts
+
+    def commit(self):
+        if self.index is not None:
+            self.index.add(self.user_id, self.file_id, self._stored)
@@ -0,0 +1,113 @@
+# services/clients.py
+"""Long-lived OpenAI chat and embedding clients sharing pooled HTTP connections.
+
+langchain_openai (and the openai SDK behind it) is slow to import, so nothing
+here is loaded at import time: the app lifespan warms the clients up on a
+background thread (start_client_warm_up) and the getters create them on first
+use, so ingestion workers and scripts work without the app.
+"""
+import asyncio
+import os
+import threading
+
+import httpx
+
+CHAT_MODEL = os.getenv("CHAT_MODEL", "gpt-3.5-turbo")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-ada-002")
+# Connection pool shared by every OpenAI call in the process
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "30"))
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))
+
+chat_llm = None
+embeddings_model = None
+_http_client = None
+_http_async_client = None
+_lock = threading.RLock()
+_warm_up_task = None
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY,
+    )
+
+
+def _http_clients() -> tuple[httpx.Client, httpx.AsyncClient]:
+    global _http_client, _http_async_client
+    if _http_client is None:
+        # Sync client for the ingestion threads, async client for request handlers
+        _http_client = httpx.Client(limits=_limits(), timeout=OPENAI_TIMEOUT)
+        _http_async_client = httpx.AsyncClient(limits=_limits(), timeout=OPENAI_TIMEOUT)
+    return _http_client, _http_async_client
+
+
+def get_chat_model():
+    global chat_llm
+    if chat_llm is not None:
+        return chat_llm
+    with _lock:
+        if chat_llm is None:
+            from langchain_openai import ChatOpenAI
+
+            http_client, http_async_client = _http_clients()
+            # stream_usage makes streamed responses report token usage too
+            chat_llm = ChatOpenAI(
+                model_name=CHAT_MODEL,
+                temperature=0,
+                stream_usage=True,
+                http_client=http_client,
+                http_async_client=http_async_client,
+            )
+    return chat_llm
+
+
+def get_embeddings_model():
+    global embeddings_model
+    if embeddings_model is not None:
+        return embeddings_model
+    # Also taken by the warm-up thread, so only one of each client is ever built
+    with _lock:
+        if embeddings_model is None:
+            from langchain_openai import OpenAIEmbeddings
+
+            http_client, http_async_client = _http_clients()
+            # Retries are left to services.rate_limiter, so every attempt goes
+            # through the token bucket instead of the SDK's own backoff
+            embeddings_model = OpenAIEmbeddings(
+                model=EMBEDDING_MODEL,
+                max_retries=0,
+                http_client=http_client,
+                http_async_client=http_async_client,
+            )
+    return embeddings_model
+
+
+def init_clients():
+    get_chat_model()
+    get_embeddings_model()
+
+
+def start_client_warm_up():
+    """Create the clients on a worker thread so startup doesn't wait for the imports."""
+    global _warm_up_task
+    if _warm_up_task is None:
+        _warm_up_task = asyncio.create_task(asyncio.to_thread(init_clients))
+
+
+def clients_ready() -> bool:
+    return chat_llm is not None and embeddings_model is not None
+
+
+async def close_clients():
+    global chat_llm, embeddings_model, _http_client, _http_async_client, _warm_up_task
+    if _warm_up_task is not None:
+        await asyncio.gather(_warm_up_task, return_exceptions=True)
+        _warm_up_task = None
+    if _http_client is not None:
+        _http_client.close()
+        await _http_async_client.aclose()
+    chat_llm = embeddings_model = _http_client = _http_async_client = None
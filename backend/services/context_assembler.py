@@ -0,0 +1,93 @@
+# services/context_assembler.py
+"""Turn over-fetched search candidates into a prompt context that fits a token budget.
+
+1. Rescore: candidates are re-ranked with maximal marginal relevance over the
+   vectors the search already returned, so near-identical chunks don't crowd
+   out other relevant ones. No extra API calls.
+2. Merge: adjacent chunks of the same file (consecutive chunk_index) are joined
+   into one span with the text they share through the splitter's chunk_overlap
+   included once.
+3. Pack: chunks are added in rank order while the merged context still fits
+   the token budget.
+"""
+import numpy as np
+
+from services.pdf_parsing import CHUNK_OVERLAP
+from services.tokens import count_tokens
+
+SEPARATOR = "\n---\n"
+# Prefix of the next chunk looked for in the tail of the previous one
+_OVERLAP_PROBE_CHARS = 40
+
+
+def merge_adjacent(first: str, second: str) -> str:
+    """Join consecutive chunks, dropping the overlap the splitter repeated."""
+    probe = second[:_OVERLAP_PROBE_CHARS]
+    if probe:
+        start = first.find(probe, max(0, len(first) - 2 * CHUNK_OVERLAP))
+        while start != -1:
+            if second.startswith(first[start:]):
+                return first[:start] + second
+            start = first.find(probe, start + 1)
+    return first + "\n" + second
+
+
+def _normalized(vectors) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+
+def rerank(query_vector, candidates: list[dict], diversity: float = 0.3) -> list[dict]:
+    """Order candidates by maximal marginal relevance using their stored vectors."""
+    if len(candidates) < 2 or any(c.get("vector") is None for c in candidates):
+        return list(candidates)
+    vectors = _normalized([c["vector"] for c in candidates])
+    relevance = vectors @ _normalized([query_vector])[0]
+    similarity = vectors @ vectors.T
+
+    remaining = list(range(len(candidates)))
+    order = []
+    max_similarity = np.full(len(candidates), -1.0, dtype=np.float32)
+    while remaining:
+        scores = (1 - diversity) * relevance[remaining] - diversity * np.maximum(max_similarity[remaining], 0)
+        best = remaining.pop(int(np.argmax(scores)))
+        order.append(best)
+        max_similarity = np.maximum(max_similarity, similarity[best])
+    return [candidates[i] for i in order]
+
+
+def _spans(selected: list[dict]) -> list[str]:
+    """Merge runs of consecutive chunks per file; spans keep the rank of their best chunk."""
+    by_position = {}
+    for rank, chunk in enumerate(selected):
+        by_position.setdefault((chunk.get("file_id"), chunk.get("chunk_index")), (rank, chunk["content"]))
+
+    spans = []  # [best rank, text, file_id, last chunk_index]
+    for (file_id, index), (rank, text) in sorted(
+        by_position.items(), key=lambda item: (str(item[0][0]), item[0][1] if item[0][1] is not None else -1)
+    ):
+        last = spans[-1] if spans else None
+        if last and index is not None and last[2] == file_id and last[3] is not None and index == last[3] + 1:
+            last[0] = min(last[0], rank)
+            last[1] = merge_adjacent(last[1], text)
+            last[3] = index
+        else:
+            spans.append([rank, text, file_id, index])
+    return [text for _, text, _, _ in sorted(spans, key=lambda span: span[0])]
+
+
+def assemble_context(query_vector, candidates: list[dict], token_budget: int, diversity: float = 0.3) -> str:
+    """Pack the best candidates into a context string of at most token_budget tokens."""
+    selected, context = [], ""
+    seen_texts = set()
+    for chunk in rerank(query_vector, candidates, diversity):
+        # Identical text (e.g. the same page in two files) is only paid for once
+        if chunk["content"] in seen_texts:
+            continue
+        trial = SEPARATOR.join(_spans(selected + [chunk]))
+        if count_tokens(trial) > token_budget:
+            continue
+        selected.append(chunk)
+        seen_texts.add(chunk["content"])
+        context = trial
+    return context
@@ -0,0 +1,64 @@
+# services/embedding_batcher.py
+import asyncio
+import time
+
+from services import metrics
+from services.rate_limiter import limited_aembed_documents
+
+
+class QueryEmbeddingBatcher:
+    """Coalesces concurrent query embeddings into one embed_documents call.
+
+    The first request in an empty queue opens a window of window_ms; everything
+    queued before it closes (or until max_batch_size items are waiting) is sent
+    as a single batch and each caller gets its own vector back. Identical texts
+    in a batch are embedded once.
+    """
+
+    def __init__(self, get_model, window_ms: float = 5.0, max_batch_size: int = 64):
+        self.get_model = get_model
+        self.window_seconds = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+
+    async def embed(self, text: str) -> list[float]:
+        if self.window_seconds <= 0 or self.max_batch_size <= 1:
+            return (await limited_aembed_documents(self.get_model(), [text]))[0]
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future, time.perf_counter()))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._send(batch))
+            # Keep a strong reference until the batch has been answered
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: list):
+        sent_at = time.perf_counter()
+        texts = list(dict.fromkeys(text for text, _, _ in batch))
+        metrics.record_query_embedding_batch(len(texts), [sent_at - queued_at for _, _, queued_at in batch])
+        try:
+            vectors = dict(zip(texts, await limited_aembed_documents(self.get_model(), texts)))
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for text, future, _ in batch:
+            # Callers that went away (e.g. a dropped request) leave a cancelled future
+            if not future.done():
+                future.set_result(vectors[text])
@@ -0,0 +1,126 @@
+# services/embedding_cache.py
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+
+from services.rate_limiter import limited_embed_documents
+
+
+def cache_key(text: str, model: str) -> str:
+    return hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Persistent chunk-embedding cache keyed by sha256(model + chunk text).
+
+    Vectors are stored as packed float32 blobs in SQLite. When the cache grows past
+    max_entries the least recently used rows are evicted down to 90% of the limit.
+    """
+
+    def __init__(self, path: str, max_entries: int = 200_000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Opened on first use so importing the service doesn't touch the disk
+        if self._conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " key TEXT PRIMARY KEY,"
+                " vector BLOB NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used)")
+        return self._conn
+
+    def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        found = {}
+        with self._lock:
+            conn = self._connect()
+            unique_keys = list(dict.fromkeys(keys))
+            # Stay well under SQLite's bound-parameter limit
+            for i in range(0, len(unique_keys), 500):
+                batch = unique_keys[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch)
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+            if found:
+                now = time.time()
+                conn.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?", [(now, key) for key in found])
+                conn.commit()
+            hits = sum(1 for key in keys if key in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return found
+
+    def put_many(self, items: dict[str, list[float]]):
+        if not items:
+            return
+        with self._lock:
+            conn = self._connect()
+            now = time.time()
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, array("f", vector).tobytes(), now) for key, vector in items.items()],
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection):
+        count = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        # Evict a little extra so we don't run this on every insert at the limit
+        to_remove = count - int(self.max_entries * 0.9)
+        conn.execute(
+            "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+            (to_remove,),
+        )
+        self.evictions += to_remove
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._connect().execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def embed_documents_cached(embeddings_model, cache: EmbeddingCache, texts: list[str]) -> list[list[float]]:
+    """Embed texts, only sending cache misses to embeddings_model.embed_documents."""
+    model_name = getattr(embeddings_model, "model", type(embeddings_model).__name__)
+    keys = [cache_key(text, model_name) for text in texts]
+    cached = cache.get_many(keys)
+
+    # Dedupe misses too, so repeated chunks within a file are embedded once
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in cached and key not in missing:
+            missing[key] = text
+    if missing:
+        # Shares the embedding quota with every other upload and query
+        new_vectors = limited_embed_documents(embeddings_model, list(missing.values()))
+        fresh = dict(zip(missing.keys(), new_vectors))
+        cache.put_many(fresh)
+        cached.update(fresh)
+
+    return [cached[key] for key in keys]
@@ -0,0 +1,212 @@
+# services/ingestion_queue.py
+import asyncio
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from sqlalchemy import delete, insert, update
+
+from db.database import async_session
+from models.chat import utcnow
+from models.file import ChunkDuplicate, File as FileModel
+from services import metrics
+from services.rag_service import process_and_embed_file, invalidate_retrieval_cache, delete_file_chunks
+
+logger = logging.getLogger(__name__)
+
+# Cap on how many PDFs are parsed/embedded at the same time. Everything above
+# this waits in the queue instead of competing for CPU and the OpenAI quota.
+MAX_CONCURRENT_INGESTIONS = int(os.getenv("MAX_CONCURRENT_INGESTIONS", "2"))
+# Slots one user's jobs may hold at a time. Defaults to all of them, so a
+# batch upload ingests its files concurrently; lower it to keep other users'
+# uploads from waiting behind a whole batch
+MAX_CONCURRENT_INGESTIONS_PER_USER = int(os.getenv("MAX_CONCURRENT_INGESTIONS_PER_USER", str(MAX_CONCURRENT_INGESTIONS)))
+# Queued plus running jobs one user may have; further uploads get a 429
+MAX_PENDING_INGESTIONS_PER_USER = int(os.getenv("MAX_PENDING_INGESTIONS_PER_USER", "20"))
+# Finished jobs are kept around this long so clients can still poll them
+JOB_RETENTION_SECONDS = int(os.getenv("INGESTION_JOB_RETENTION_SECONDS", "3600"))
+# On startup, files uploaded longer ago than this that never finished ingesting
+# (the process died) are removed. Other workers may still be ingesting younger ones
+INTERRUPTED_INGESTION_SECONDS = int(os.getenv("INTERRUPTED_INGESTION_SECONDS", "3600"))
+
+_executor = None
+_slots = None
+_user_slots: dict[uuid.UUID, asyncio.Semaphore] = {}
+_jobs: dict[str, dict] = {}
+_tasks: dict[asyncio.Task, dict] = {}
+
+
+def _get_slots() -> asyncio.Semaphore:
+    # Created lazily so the semaphore binds to the running event loop
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(MAX_CONCURRENT_INGESTIONS)
+    return _slots
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    # Created on first use (and again after a shutdown) so the app can be restarted in-process
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_INGESTIONS, thread_name_prefix="ingest")
+    return _executor
+
+
+def _prune_finished_jobs():
+    cutoff = time.time() - JOB_RETENTION_SECONDS
+    for job_id in [jid for jid, job in _jobs.items() if job["finished_at"] and job["finished_at"] < cutoff]:
+        del _jobs[job_id]
+
+
+def get_job(job_id: str) -> dict | None:
+    return _jobs.get(job_id)
+
+
+def pending_ingestions(user_id: uuid.UUID) -> int:
+    return sum(1 for job in _jobs.values() if job["user_id"] == user_id and not job["finished_at"])
+
+
+def submit_ingestion(file_path: str, user_id: uuid.UUID, file_id: uuid.UUID, filename: str) -> dict:
+    """Queue a saved PDF for ingestion and return its job record immediately."""
+    _prune_finished_jobs()
+    job = {
+        "job_id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "file_id": file_id,
+        "filename": filename,
+        "state": "queued",
+        "pages_processed": 0,
+        "chunks_processed": 0,
+        # Near-duplicate chunks that weren't stored, and their share of all chunks
+        "duplicate_chunks": 0,
+        "duplicate_fraction": 0.0,
+        "error": None,
+        "created_at": time.time(),
+        "started_at": None,
+        "finished_at": None,
+    }
+    _jobs[job["job_id"]] = job
+
+    task = asyncio.create_task(_run_job(job, file_path))
+    # Keep a strong reference so the task isn't garbage collected mid-run
+    _tasks[task] = job
+    task.add_done_callback(lambda done: _tasks.pop(done, None))
+    return job
+
+
+async def _discard_queued_job(job: dict, file_path: str):
+    """Drop a job that never started: its file record and upload go, nothing was indexed yet."""
+    job["state"] = "cancelled"
+    job["error"] = "Server shut down before processing started"
+    job["finished_at"] = time.time()
+    async with async_session() as db:
+        await db.execute(delete(FileModel).where(FileModel.id == job["file_id"]))
+        await db.commit()
+    if os.path.exists(file_path):
+        os.remove(file_path)
+
+
+async def _run_job(job: dict, file_path: str):
+    loop = asyncio.get_running_loop()
+
+    def on_progress(pages_processed: int, chunks_processed: int):
+        # Called from the worker thread; plain int assignments are safe here
+        job["pages_processed"] = pages_processed
+        job["chunks_processed"] = chunks_processed
+
+    user_slots = _user_slots.setdefault(job["user_id"], asyncio.Semaphore(MAX_CONCURRENT_INGESTIONS_PER_USER))
+    try:
+        async with user_slots, _get_slots():
+            job["state"] = "running"
+            job["started_at"] = time.time()
+            try:
+                with metrics.stage_timer("ingestion_total"):
+                    result = await loop.run_in_executor(
+                        _get_executor(),
+                        lambda: process_and_embed_file(file_path, job["user_id"], job["file_id"], progress_callback=on_progress),
+                    )
+                job["chunks_processed"] = result.chunks
+                job["duplicate_chunks"] = len(result.duplicates)
+                job["duplicate_fraction"] = round(result.duplicate_fraction, 4)
+                # Marks the file as fully indexed, so identical uploads can reuse its chunks
+                async with async_session() as db:
+                    await db.execute(update(FileModel).where(FileModel.id == job["file_id"]).values(chunk_count=result.chunks))
+                    if result.duplicates:
+                        await db.execute(insert(ChunkDuplicate), [
+                            {"user_id": job["user_id"], "file_id": job["file_id"], **duplicate} for duplicate in result.duplicates
+                        ])
+                    await db.commit()
+                job["state"] = "completed"
+            except Exception as e:
+                job["state"] = "failed"
+                job["error"] = str(e)
+                # Don't leave a file record behind that has no chunks, nor the
+                # chunks of the batches that did get stored
+                async with async_session() as db:
+                    file_record = await db.get(FileModel, job["file_id"])
+                    if file_record:
+                        await db.delete(file_record)
+                        await db.commit()
+                try:
+                    await loop.run_in_executor(_get_executor(), delete_file_chunks, job["user_id"], [job["file_id"]])
+                except Exception:
+                    pass  # the orphan sweep picks these up
+            finally:
+                # Searches that ran while the file was half-indexed must not be served again
+                invalidate_retrieval_cache(job["user_id"])
+                job["finished_at"] = time.time()
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+    except asyncio.CancelledError:
+        # shutdown_ingestion cancels jobs that are still waiting for a slot
+        if job["state"] == "queued":
+            await _discard_queued_job(job, file_path)
+        raise
+    if not pending_ingestions(job["user_id"]):
+        _user_slots.pop(job["user_id"], None)
+
+
+async def shutdown_ingestion():
+    # Let running jobs finish so files aren't left half-indexed; queued ones
+    # could take hours, so they are dropped
+    global _executor, _slots
+    for task, job in list(_tasks.items()):
+        if job["state"] == "queued":
+            task.cancel()
+    if _tasks:
+        await asyncio.gather(*_tasks, return_exceptions=True)
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+    _executor = _slots = None
+    _user_slots.clear()
+
+
+async def remove_interrupted_ingestions() -> int:
+    """Delete files whose ingestion never finished because the process died; returns files removed.
+
+    Only uploads older than INTERRUPTED_INGESTION_SECONDS, so jobs running in
+    other workers are left alone. Their partly stored chunks are deleted too.
+    """
+    cutoff = utcnow() - timedelta(seconds=INTERRUPTED_INGESTION_SECONDS)
+    async with async_session() as db:
+        interrupted = (await db.execute(
+            delete(FileModel)
+            .where(
+                FileModel.content_sha256.isnot(None),
+                FileModel.chunk_count.is_(None),
+                FileModel.uploaded_at < cutoff,
+            )
+            .returning(FileModel.id, FileModel.user_id)
+        )).all()
+        await db.commit()
+    for file_id, user_id in interrupted:
+        try:
+            await asyncio.to_thread(delete_file_chunks, user_id, [file_id])
+        except Exception:
+            logger.exception("Failed to delete chunks of interrupted upload %s", file_id)  # the orphan sweep retries
+    if interrupted:
+        logger.info("Removed %d uploads whose ingestion was interrupted", len(interrupted))
+    return len(interrupted)
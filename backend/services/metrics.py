@@ -0,0 +1,180 @@
+# services/metrics.py
+"""Prometheus instrumentation for the RAG hot paths.
+
+When METRICS_ENABLED is false (or prometheus_client isn't installed) every helper
+here is a no-op that returns immediately, so call sites don't need to check.
+"""
+import os
+import time
+from contextlib import contextmanager, nullcontext
+
+try:
+    import prometheus_client
+except ImportError:  # optional dependency
+    prometheus_client = None
+
+ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true" and prometheus_client is not None
+
+_NOOP = nullcontext()
+
+if ENABLED:
+    from prometheus_client import Counter, Gauge, Histogram
+
+    STAGE_SECONDS = Histogram(
+        "chatbot_stage_duration_seconds",
+        "Time spent per pipeline stage",
+        ["stage"],
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+    )
+    PAGES_INGESTED = Counter("chatbot_pages_ingested_total", "PDF pages parsed during ingestion")
+    CHUNKS_INGESTED = Counter("chatbot_chunks_ingested_total", "Chunks embedded and stored during ingestion")
+    DUPLICATE_CHUNKS = Counter("chatbot_duplicate_chunks_total", "Near-duplicate chunks skipped during ingestion")
+    CHUNKS_RETRIEVED = Counter("chatbot_chunks_retrieved_total", "Chunks returned by vector searches")
+    TOKENS = Counter("chatbot_tokens_total", "Tokens sent to / received from OpenAI", ["kind"])
+    IN_FLIGHT = Gauge("chatbot_in_flight_requests", "Requests currently being handled", ["endpoint"])
+    RATE_LIMITED = Counter("chatbot_embedding_rate_limited_total", "Embedding calls answered with HTTP 429")
+    ADMISSION_QUEUE_DEPTH = Gauge("chatbot_admission_queue_depth", "Requests waiting for an admission slot", ["priority"])
+    ADMISSION_REJECTED = Counter(
+        "chatbot_admission_rejected_total", "Requests refused by admission control", ["endpoint", "reason"]
+    )
+    QUERY_EMBEDDING_BATCH_SIZE = Histogram(
+        "chatbot_query_embedding_batch_size",
+        "Distinct queries per coalesced embedding call",
+        buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+    )
+    QUERY_EMBEDDING_QUEUE_WAIT = Histogram(
+        "chatbot_query_embedding_queue_wait_seconds",
+        "Time a query embedding waited for its batch to be sent",
+        buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+    )
+
+
+def stage_timer(stage: str):
+    """Context manager observing the wall time of one pipeline stage."""
+    if not ENABLED:
+        return _NOOP
+    return STAGE_SECONDS.labels(stage).time()
+
+
+def observe_stage(stage: str, seconds: float):
+    if ENABLED:
+        STAGE_SECONDS.labels(stage).observe(seconds)
+
+
+@contextmanager
+def _track_in_flight(endpoint: str):
+    gauge = IN_FLIGHT.labels(endpoint)
+    gauge.inc()
+    try:
+        yield
+    finally:
+        gauge.dec()
+
+
+def in_flight(endpoint: str):
+    if not ENABLED:
+        return _NOOP
+    return _track_in_flight(endpoint)
+
+
+def record_ingestion(pages: int, chunks: int):
+    if ENABLED:
+        PAGES_INGESTED.inc(pages)
+        CHUNKS_INGESTED.inc(chunks)
+
+
+def record_duplicate_chunks(chunks: int):
+    if ENABLED and chunks:
+        DUPLICATE_CHUNKS.inc(chunks)
+
+
+def record_retrieval(chunks: int):
+    if ENABLED:
+        CHUNKS_RETRIEVED.inc(chunks)
+
+
+def record_embedding_tokens(tokens: int):
+    """Count tokens sent to the embeddings API (the client doesn't report usage)."""
+    if ENABLED and tokens:
+        TOKENS.labels("embedding").inc(tokens)
+
+
+def record_rate_limited():
+    if ENABLED:
+        RATE_LIMITED.inc()
+
+
+def set_admission_queue_depth(priority: str, depth: int):
+    if ENABLED:
+        ADMISSION_QUEUE_DEPTH.labels(priority).set(depth)
+
+
+def record_admission_rejected(endpoint: str, reason: str):
+    if ENABLED:
+        ADMISSION_REJECTED.labels(endpoint, reason).inc()
+
+
+def record_query_embedding_batch(size: int, waits: list[float]):
+    if ENABLED:
+        QUERY_EMBEDDING_BATCH_SIZE.observe(size)
+        for wait in waits:
+            QUERY_EMBEDDING_QUEUE_WAIT.observe(wait)
+
+
+def record_llm_usage(prompt_tokens: int, completion_tokens: int):
+    if ENABLED:
+        TOKENS.labels("llm_prompt").inc(prompt_tokens)
+        TOKENS.labels("llm_completion").inc(completion_tokens)
+
+
+def llm_callbacks() -> list:
+    """Callbacks to pass in a runnable config so LLM token usage gets recorded."""
+    if not ENABLED:
+        return []
+    return [_UsageCallbackHandler()]
+
+
+if ENABLED:
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class _UsageCallbackHandler(BaseCallbackHandler):
+        def on_llm_end(self, response, **kwargs):
+            for generations in response.generations:
+                for generation in generations:
+                    usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                    if usage:
+                        record_llm_usage(usage.get("input_tokens", 0), usage.get("output_tokens", 0))
+                        return
+            usage = (response.llm_output or {}).get("token_usage") or {}
+            if usage:
+                record_llm_usage(usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0))
+
+
+def instrument_engine(engine):
+    """Time every SQL statement run through an (async) SQLAlchemy engine."""
+    if not ENABLED:
+        return
+    from sqlalchemy import event
+
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    # One statement runs at a time per connection, so a single start time is
+    # enough; it is dropped on failure, where after_cursor_execute never fires
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_started"] = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("query_started", None)
+        if started is not None:
+            STAGE_SECONDS.labels("postgres").observe(time.perf_counter() - started)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(exception_context):
+        if exception_context.connection is not None:
+            exception_context.connection.info.pop("query_started", None)
+
+
+def render_latest() -> tuple[bytes, str]:
+    return prometheus_client.generate_latest(), prometheus_client.CONTENT_TYPE_LATEST
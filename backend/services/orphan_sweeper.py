@@ -0,0 +1,68 @@
+# services/orphan_sweeper.py
+import asyncio
+import logging
+import os
+import uuid
+
+from db.database import async_session
+from services.rag_service import vector_store, chunk_signature_index
+from services.upload_service import referenced_chunk_file_ids, delete_chunk_duplicates
+
+logger = logging.getLogger(__name__)
+
+# How often to look for chunks whose files no longer exist (0 disables the sweep)
+ORPHAN_SWEEP_INTERVAL_SECONDS = int(os.getenv("ORPHAN_SWEEP_INTERVAL_SECONDS", "3600"))
+
+_sweeper_task = None
+
+
+async def sweep_orphaned_chunks() -> int:
+    """Delete vector-store chunks whose file record is gone; returns chunks removed.
+
+    Catches vectors left behind by deletions from before chunks were purged
+    with their files, and by ingestions that finished after their session was deleted.
+    """
+    stored = list(await asyncio.to_thread(vector_store.list_file_ids))
+    if not stored:
+        return 0
+
+    async with async_session() as db:
+        # Deduplicated uploads keep the chunks of the file they point at alive
+        known = {str(fid) for fid in await referenced_chunk_file_ids(db, [uuid.UUID(fid) for fid in stored])}
+
+    orphans = [fid for fid in stored if fid not in known]
+    if not orphans:
+        return 0
+    deleted = await asyncio.to_thread(vector_store.delete_files, orphans)
+    await asyncio.to_thread(chunk_signature_index.remove_files, orphans)
+    async with async_session() as db:
+        await delete_chunk_duplicates(db, [uuid.UUID(fid) for fid in orphans])
+        await db.commit()
+    logger.info("Removed %d orphaned chunks from %d files", deleted, len(orphans))
+    return deleted
+
+
+async def _sweep_forever():
+    while True:
+        try:
+            await sweep_orphaned_chunks()
+        except Exception:
+            logger.exception("Orphaned chunk sweep failed")
+        await asyncio.sleep(ORPHAN_SWEEP_INTERVAL_SECONDS)
+
+
+def start_orphan_sweeper():
+    global _sweeper_task
+    if ORPHAN_SWEEP_INTERVAL_SECONDS > 0 and _sweeper_task is None:
+        _sweeper_task = asyncio.create_task(_sweep_forever())
+
+
+async def stop_orphan_sweeper():
+    global _sweeper_task
+    if _sweeper_task is not None:
+        _sweeper_task.cancel()
+        try:
+            await _sweeper_task
+        except asyncio.CancelledError:
+            pass
+        _sweeper_task = None
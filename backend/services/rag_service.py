@@ -1,87 +1,241 @@
 # services/rag_service.py
+import hashlib
 import os
+import time
 import uuid
-from langchain_community.document_loaders import PyPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
-from db.database import weaviate_client
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+from services import clients, metrics
+from services.cache import TTLCache
+from services.chunk_dedupe import CHUNK_DEDUPE_ENABLED, ChunkDeduper, ChunkSignatureIndex
+from services.context_assembler import assemble_context
+from services.embedding_batcher import QueryEmbeddingBatcher
+from services.embedding_cache import EmbeddingCache, embed_documents_cached
+from services.pdf_parsing import iter_page_chunks
+from services.vector_store import create_vector_store
 
-# Import from the correct v4 locations
-import weaviate.classes.config as wvc
-from weaviate.classes.query import Filter  # <-- CORRECT IMPORT LOCATION FOR FILTER
-from weaviate.util import generate_uuid5
+# Weaviate or the local NumPy store, selected by VECTOR_STORE_BACKEND
+vector_store = create_vector_store()
 
-embeddings_model = OpenAIEmbeddings()
-COLLECTION_NAME = "DocumentChunk"
+# Chunk embeddings are cached on disk so re-uploaded documents aren't embedded again
+embedding_cache = EmbeddingCache(
+    os.getenv("EMBEDDING_CACHE_PATH", "cache/embeddings.sqlite3"),
+    max_entries=int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000")),
+)
+
+# MinHash/LSH index over each user's stored chunks, for near-duplicate detection
+chunk_signature_index = ChunkSignatureIndex(os.getenv("CHUNK_SIGNATURE_INDEX_PATH", "cache/chunk_signatures.sqlite3"))
+
+# Query-side caches: normalized query text -> embedding, and
+# (query vector, user, session files) -> retrieved chunks
+query_embedding_cache = TTLCache(
+    max_size=int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024")),
+    ttl_seconds=float(os.getenv("QUERY_EMBEDDING_CACHE_TTL", "3600")),
+)
+retrieval_cache = TTLCache(
+    max_size=int(os.getenv("RETRIEVAL_CACHE_SIZE", "1024")),
+    ttl_seconds=float(os.getenv("RETRIEVAL_CACHE_TTL", "300")),
+)
+
+# Concurrent query embeddings (cache misses) are sent together: a batch closes
+# QUERY_EMBEDDING_BATCH_WINDOW_MS after its first query or at QUERY_EMBEDDING_BATCH_SIZE
+query_embedder = QueryEmbeddingBatcher(
+    clients.get_embeddings_model,
+    window_ms=float(os.getenv("QUERY_EMBEDDING_BATCH_WINDOW_MS", "5")),
+    max_batch_size=int(os.getenv("QUERY_EMBEDDING_BATCH_SIZE", "64")),
+)
+
+# Retrieval over-fetches this many chunks, then packs the best into the prompt
+# context up to CONTEXT_TOKEN_BUDGET tokens (CONTEXT_DIVERSITY: 0 = pure relevance)
+CONTEXT_CANDIDATES = int(os.getenv("CONTEXT_CANDIDATES", "12"))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+CONTEXT_DIVERSITY = float(os.getenv("CONTEXT_DIVERSITY", "0.3"))
+
+# Chunks embedded and inserted per batch during ingestion
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "64"))
 
 def create_weaviate_schema():
-    if not weaviate_client.collections.exists(COLLECTION_NAME):
-        weaviate_client.collections.create(
-            name=COLLECTION_NAME,
-            # Use the updated 'vector_config' parameter name
-            vector_config=wvc.Configure.VectorIndex.hnsw(), 
-            properties=[
-                wvc.Property(name="content", data_type=wvc.DataType.TEXT),
-                wvc.Property(name="user_id", data_type=wvc.DataType.UUID),
-                wvc.Property(name="file_id", data_type=wvc.DataType.UUID),
-            ]
-        )
-
-def process_and_embed_file(file_path: str, user_id: uuid.UUID, file_id: uuid.UUID):
-    # Load PDF documents
-    loader = PyPDFLoader(file_path)
-    documents = loader.load()
-
-    # Optimized chunking: larger chunks for fewer API calls
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=2000,  # Increased from 1000
-        chunk_overlap=300,  # Increased from 150 for better context
-        separators=["\n\n", "\n", ". ", " ", ""]  # Prioritize paragraph breaks
-    )
-    chunks = text_splitter.split_documents(documents)
-
-    doc_chunks = weaviate_client.collections.get(COLLECTION_NAME)
-
-    # Batch processing for embeddings - collect all texts first
-    texts_to_embed = [chunk.page_content for chunk in chunks]
-
-    # Batch embed all texts at once (more efficient)
-    if texts_to_embed:
-        vectors = embeddings_model.embed_documents(texts_to_embed)
-
-        # Batch insert into Weaviate
-        with doc_chunks.batch.dynamic() as batch:
-            for i, (chunk, vector) in enumerate(zip(chunks, vectors)):
-                data_object = {
-                    "content": chunk.page_content,
-                    "user_id": user_id,
-                    "file_id": file_id,
-                }
-
-                batch.add_object(
-                    properties=data_object,
-                    vector=vector,
-                    uuid=generate_uuid5(data_object)
-                )
-
-    return len(chunks)
-
-def query_weaviate(query: str, user_id: uuid.UUID, file_ids: list[uuid.UUID]):
-    query_vector = embeddings_model.embed_query(query)
-    doc_chunks = weaviate_client.collections.get(COLLECTION_NAME)
-
-    # Convert UUIDs to strings for the filter
-    file_id_strs = [str(fid) for fid in file_ids]
-
-    response = doc_chunks.query.near_vector(
-        near_vector=query_vector,
-        # Filter by user AND the specific files in the session
-        filters=(
-            Filter.by_property("user_id").equal(user_id) &
-            Filter.by_property("file_id").contains_any(file_id_strs)
-        ),
-        limit=3,
-        return_properties=["content"]
-    )
-
-    return [obj.properties for obj in response.objects]
+    vector_store.create_schema()
+
+async def connect_vector_store():
+    await vector_store.aconnect()
+
+async def close_vector_store():
+    await vector_store.aclose()
+    vector_store.close()
+
+def _iter_chunk_texts(file_path: str, on_page=None):
+    # Pages are extracted and split lazily; big PDFs are parsed across a process pool
+    parse_seconds = 0.0
+    pages = iter_page_chunks(file_path)
+    while True:
+        started = time.perf_counter()
+        page = next(pages, None)
+        parse_seconds += time.perf_counter() - started
+        if page is None:
+            break
+        page_number, chunk_texts = page
+        if on_page:
+            on_page(page_number)
+        yield from chunk_texts
+    metrics.observe_stage("pdf_parse_split", parse_seconds)
+
+def _batched(items, batch_size: int):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+class IngestionResult(NamedTuple):
+    chunks: int  # chunks embedded and stored
+    total_chunks: int  # chunks the splitter produced
+    duplicates: list[dict]  # back-references for the near-duplicates that weren't stored
+
+    @property
+    def duplicate_fraction(self) -> float:
+        return len(self.duplicates) / self.total_chunks if self.total_chunks else 0.0
+
+def process_and_embed_file(file_path: str, user_id: uuid.UUID, file_id: uuid.UUID, progress_callback=None) -> IngestionResult:
+    """Stream a PDF through load -> split -> dedupe -> embed -> insert in fixed-size batches.
+
+    At most two batches are in memory at once: the vector store insert of batch N
+    runs on a helper thread while batch N+1 is being embedded. Near-duplicates of
+    chunks already stored for this file or the user's other files are skipped.
+    """
+    progress = {"pages": 0, "chunks": 0}
+    deduper = ChunkDeduper(chunk_signature_index, user_id, file_id) if CHUNK_DEDUPE_ENABLED else None
+
+    def on_page(page_number: int):
+        progress["pages"] = page_number
+
+    def insert_batch(chunk_indexes: list[int], texts: list[str], vectors: list[list[float]], pages_read: int):
+        with metrics.stage_timer("vector_insert"):
+            # chunk_index (the position in the file, gaps where duplicates were
+            # dropped) lets retrieval recognise neighbouring chunks of a file
+            chunks = [{"content": text, "chunk_index": index} for index, text in zip(chunk_indexes, texts)]
+            vector_store.add_chunks(user_id, file_id, chunks, vectors)
+        progress["chunks"] += len(texts)
+        if progress_callback:
+            progress_callback(pages_read, progress["chunks"])
+
+    chunk_texts = _iter_chunk_texts(file_path, on_page)
+    total_chunks = 0
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest-insert") as inserter:
+        pending_insert = None
+        for texts in _batched(chunk_texts, INGEST_BATCH_SIZE):
+            chunk_indexes = list(range(total_chunks, total_chunks + len(texts)))
+            total_chunks += len(texts)
+            if deduper:
+                with metrics.stage_timer("chunk_dedupe"):
+                    chunk_indexes, texts = deduper.filter(chunk_indexes, texts)
+                if not texts:
+                    continue
+            # Cached chunks skip the API call
+            with metrics.stage_timer("embed_documents"):
+                vectors = embed_documents_cached(clients.get_embeddings_model(), embedding_cache, texts)
+            if pending_insert:
+                # Surfaces insert errors and keeps only one batch in flight
+                pending_insert.result()
+            pending_insert = inserter.submit(insert_batch, chunk_indexes, texts, vectors, progress["pages"])
+        if pending_insert:
+            pending_insert.result()
+
+    duplicates = []
+    if deduper:
+        deduper.commit()
+        duplicates = deduper.duplicates
+    metrics.record_ingestion(progress["pages"], progress["chunks"])
+    metrics.record_duplicate_chunks(len(duplicates))
+    if progress_callback:
+        progress_callback(progress["pages"], progress["chunks"])
+
+    return IngestionResult(progress["chunks"], total_chunks, duplicates)
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.split()).lower()
+
+async def embed_query_cached(query: str) -> list[float]:
+    key = normalize_query(query)
+    query_vector = query_embedding_cache.get(key)
+    if query_vector is None:
+        started = time.perf_counter()
+        query_vector = await query_embedder.embed(key)
+        elapsed = time.perf_counter() - started
+        query_embedding_cache.set(key, query_vector, cost_seconds=elapsed)
+        metrics.observe_stage("embed_query", elapsed)
+    return query_vector
+
+def _retrieval_key(query_vector: list[float], user_id: uuid.UUID, file_ids: list[uuid.UUID]):
+    vector_digest = hashlib.sha1(array("f", query_vector).tobytes()).hexdigest()
+    return (vector_digest, str(user_id), tuple(sorted(str(fid) for fid in file_ids)))
+
+def invalidate_retrieval_cache(user_id: uuid.UUID):
+    """Drop cached search results for a user after their files change."""
+    user_key = str(user_id)
+    retrieval_cache.invalidate(lambda key: key[1] == user_key)
+
+def delete_file_chunks(user_id: uuid.UUID, file_ids: list[uuid.UUID]) -> int:
+    """Remove the stored chunks of deleted files and any cached searches over them."""
+    if not file_ids:
+        return 0
+    deleted = vector_store.delete_files(file_ids, user_id=user_id)
+    chunk_signature_index.remove_files(file_ids)
+    invalidate_retrieval_cache(user_id)
+    return deleted
+
+async def _search(query_vector, user_id: uuid.UUID, file_ids: list[uuid.UUID], limit: int, with_vectors: bool = False):
+    started = time.perf_counter()
+    # Filter by user AND the specific files in the session
+    chunks = await vector_store.asearch(query_vector, user_id, file_ids, limit=limit, with_vectors=with_vectors)
+    elapsed = time.perf_counter() - started
+    metrics.observe_stage("vector_search", elapsed)
+    metrics.record_retrieval(len(chunks))
+    return chunks, elapsed
+
+async def retrieve_context(query: str, user_id: uuid.UUID, file_ids: list[uuid.UUID],
+                           shared_chunks: list[tuple[uuid.UUID, int]] = ()) -> str:
+    """Prompt context for a question: CONTEXT_CANDIDATES chunks fetched, rescored,
+    overlap-merged and packed into CONTEXT_TOKEN_BUDGET tokens.
+
+    shared_chunks are (file_id, chunk_index) of chunks stored under other files
+    that the session's files reference as near-duplicates; they are searched too.
+    """
+    query_vector = await embed_query_cached(query)
+
+    # Only the chunks the session references may come from the other files
+    shared = {(str(fid), index) for fid, index in shared_chunks}
+    other_files = {fid for fid, _ in shared} - {str(fid) for fid in file_ids}
+    search_files = [*file_ids, *sorted(other_files)]
+
+    # Only the packed context is cached, not the candidates and their vectors
+    cache_key = _retrieval_key(query_vector, user_id, search_files)
+    context = retrieval_cache.get(cache_key)
+    if context is not None:
+        return context
+
+    # Over-fetch when other files' unreferenced chunks will be filtered out
+    limit = CONTEXT_CANDIDATES * 2 if other_files else CONTEXT_CANDIDATES
+    candidates, elapsed = await _search(query_vector, user_id, search_files, limit, with_vectors=True)
+    if other_files:
+        candidates = [
+            c for c in candidates
+            if str(c["file_id"]) not in other_files or (str(c["file_id"]), c.get("chunk_index")) in shared
+        ][:CONTEXT_CANDIDATES]
+    started = time.perf_counter()
+    context = assemble_context(query_vector, candidates, CONTEXT_TOKEN_BUDGET, diversity=CONTEXT_DIVERSITY)
+    assembly_seconds = time.perf_counter() - started
+    metrics.observe_stage("context_assembly", assembly_seconds)
+    retrieval_cache.set(cache_key, context, cost_seconds=elapsed + assembly_seconds)
+    return context
+
+def get_cache_stats():
+    return {
+        "embedding_cache": embedding_cache.stats(),
+        "query_embedding_cache": query_embedding_cache.stats(),
+        "retrieval_cache": retrieval_cache.stats(),
+    }
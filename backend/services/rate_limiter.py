@@ -0,0 +1,115 @@
+# services/rate_limiter.py
+"""Process-wide token-per-minute limiter for OpenAI embedding traffic.
+
+Every embedding call (ingestion batches on worker threads and query batches
+on the event loop) takes its tiktoken count from one shared bucket before it
+is sent, so concurrent uploads share the quota instead of tripping over it.
+Calls still answered with 429 are retried with exponential backoff.
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+
+from services import metrics
+from services.tokens import count_tokens_batch
+
+# 0 disables the limiter (retries on 429 still apply)
+EMBEDDING_TOKENS_PER_MINUTE = int(os.getenv("EMBEDDING_TOKENS_PER_MINUTE", "1000000"))
+EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "6"))
+RETRY_BASE_SECONDS = float(os.getenv("EMBEDDING_RETRY_BASE_SECONDS", "1"))
+RETRY_MAX_SECONDS = float(os.getenv("EMBEDDING_RETRY_MAX_SECONDS", "60"))
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at tokens_per_minute / 60 per second.
+
+    Holds at most one minute of tokens. A request larger than that waits for a
+    full bucket and then drives it negative, so later callers wait it off.
+    """
+
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = float(tokens_per_minute)
+        self.rate = tokens_per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _try_take(self, amount: int) -> float:
+        """Take amount and return 0, or return the seconds to wait before retrying."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            needed = min(amount, self.capacity)
+            if self.tokens >= needed:
+                self.tokens -= amount
+                return 0.0
+            return (needed - self.tokens) / self.rate
+
+    def acquire(self, amount: int) -> float:
+        """Block until amount tokens are available; returns the seconds waited."""
+        waited = 0.0
+        while (wait := self._try_take(amount)) > 0:
+            time.sleep(wait)
+            waited += wait
+        return waited
+
+    async def acquire_async(self, amount: int) -> float:
+        waited = 0.0
+        while (wait := self._try_take(amount)) > 0:
+            await asyncio.sleep(wait)
+            waited += wait
+        return waited
+
+
+embedding_limiter = TokenBucket(EMBEDDING_TOKENS_PER_MINUTE) if EMBEDDING_TOKENS_PER_MINUTE > 0 else None
+
+
+def _backoff_seconds(error: Exception, attempt: int) -> float:
+    # Prefer the server's hint when it sends one
+    retry_after = getattr(getattr(error, "response", None), "headers", {}).get("retry-after")
+    try:
+        if retry_after is not None:
+            return min(float(retry_after), RETRY_MAX_SECONDS)
+    except ValueError:
+        pass
+    return min(RETRY_BASE_SECONDS * 2 ** attempt, RETRY_MAX_SECONDS) * random.uniform(0.5, 1.0)
+
+
+def limited_embed_documents(embeddings_model, texts: list[str]) -> list[list[float]]:
+    """embed_documents through the shared limiter, retrying 429s (blocking)."""
+    # Imported here: the SDK is slow to import and the embedding client loads it anyway
+    from openai import RateLimitError
+
+    tokens = count_tokens_batch(texts)
+    metrics.record_embedding_tokens(tokens)
+    for attempt in range(EMBEDDING_MAX_RETRIES + 1):
+        if embedding_limiter:
+            metrics.observe_stage("embedding_rate_limit_wait", embedding_limiter.acquire(tokens))
+        try:
+            return embeddings_model.embed_documents(texts)
+        except RateLimitError as e:
+            metrics.record_rate_limited()
+            if attempt == EMBEDDING_MAX_RETRIES:
+                raise
+            time.sleep(_backoff_seconds(e, attempt))
+
+
+async def limited_aembed_documents(embeddings_model, texts: list[str]) -> list[list[float]]:
+    """Async variant of limited_embed_documents for the request path."""
+    from openai import RateLimitError
+
+    tokens = count_tokens_batch(texts)
+    metrics.record_embedding_tokens(tokens)
+    for attempt in range(EMBEDDING_MAX_RETRIES + 1):
+        if embedding_limiter:
+            metrics.observe_stage("embedding_rate_limit_wait", await embedding_limiter.acquire_async(tokens))
+        try:
+            return await embeddings_model.aembed_documents(texts)
+        except RateLimitError as e:
+            metrics.record_rate_limited()
+            if attempt == EMBEDDING_MAX_RETRIES:
+                raise
+            await asyncio.sleep(_backoff_seconds(e, attempt))
@@ -0,0 +1,41 @@
+# services/tenant_offloader.py
+import asyncio
+import logging
+import os
+
+from services.rag_service import vector_store
+
+logger = logging.getLogger(__name__)
+
+# How often idle per-user tenants are deactivated (only matters with WEAVIATE_MULTI_TENANCY)
+TENANT_SWEEP_INTERVAL_SECONDS = int(os.getenv("WEAVIATE_TENANT_SWEEP_INTERVAL_SECONDS", "300"))
+
+_offloader_task = None
+
+
+async def _offload_forever():
+    while True:
+        await asyncio.sleep(TENANT_SWEEP_INTERVAL_SECONDS)
+        try:
+            released = await asyncio.to_thread(vector_store.deactivate_idle_tenants)
+            if released:
+                logger.info("Deactivated %d idle tenants", released)
+        except Exception:
+            logger.exception("Idle tenant sweep failed")
+
+
+def start_tenant_offloader():
+    global _offloader_task
+    if TENANT_SWEEP_INTERVAL_SECONDS > 0 and _offloader_task is None:
+        _offloader_task = asyncio.create_task(_offload_forever())
+
+
+async def stop_tenant_offloader():
+    global _offloader_task
+    if _offloader_task is not None:
+        _offloader_task.cancel()
+        try:
+            await _offloader_task
+        except asyncio.CancelledError:
+            pass
+        _offloader_task = None
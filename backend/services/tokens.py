@@ -0,0 +1,29 @@
+# services/tokens.py
+_encoding = None
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            # Encoding used by gpt-3.5-turbo and the ada-002 embeddings
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            # tiktoken fetches its BPE file on first use; without it, estimate
+            _encoding = False
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    encoding = _get_encoding()
+    if encoding is False:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_tokens_batch(texts: list[str]) -> int:
+    encoding = _get_encoding()
+    if encoding is False:
+        return sum(len(text) // 4 + 1 for text in texts)
+    return sum(len(tokens) for tokens in encoding.encode_batch(texts, disallowed_special=()))
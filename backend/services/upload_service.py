@@ -0,0 +1,114 @@
+# services/upload_service.py
+import hashlib
+import os
+import tempfile
+import uuid
+
+from sqlalchemy import delete, exists, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from models.file import ChunkDuplicate, File as FileModel
+
+# Bytes copied (and hashed) per read while saving an upload
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+
+
+class UploadTooLarge(Exception):
+    def __init__(self, max_size: int):
+        super().__init__(f"Upload exceeds {max_size} bytes")
+        self.max_size = max_size
+
+
+def save_upload(source, upload_dir: str, max_size: int, suffix: str = ".pdf") -> tuple[str, str, int]:
+    """Stream a file object to a new unique file in upload_dir, hashing as it goes.
+
+    Returns (path, sha256 hex digest, size). Raises UploadTooLarge (and removes
+    the partial file) as soon as more than max_size bytes have been read.
+    """
+    fd, path = tempfile.mkstemp(dir=upload_dir, suffix=suffix)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := source.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLarge(max_size)
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path, digest.hexdigest(), size
+
+
+async def find_indexed_duplicate(db: AsyncSession, user_id: uuid.UUID, content_sha256: str) -> FileModel | None:
+    """A file of this user with identical content whose chunks are fully indexed."""
+    result = await db.execute(
+        select(FileModel)
+        .where(
+            FileModel.user_id == user_id,
+            FileModel.content_sha256 == content_sha256,
+            FileModel.chunk_count.isnot(None),
+        )
+        .limit(1)
+    )
+    return result.scalars().first()
+
+
+async def referenced_chunk_file_ids(db: AsyncSession, chunk_file_ids: list) -> set[uuid.UUID]:
+    """The subset of chunk_file_ids that some files row still uses for its chunks,
+    directly or through near-duplicate back-references of a file in use."""
+    referenced = set()
+    chunk_file_ids = list(chunk_file_ids)
+    file_in_use = exists().where(or_(FileModel.chunk_file_id == ChunkDuplicate.file_id, FileModel.id == ChunkDuplicate.file_id))
+    for i in range(0, len(chunk_file_ids), 1000):
+        batch = chunk_file_ids[i:i + 1000]
+        result = await db.execute(
+            select(FileModel.id, FileModel.chunk_file_id)
+            .where(or_(FileModel.chunk_file_id.in_(batch), FileModel.id.in_(batch)))
+        )
+        referenced.update(chunk_file_id or file_id for file_id, chunk_file_id in result.all())
+        result = await db.execute(
+            select(ChunkDuplicate.canonical_file_id)
+            .where(ChunkDuplicate.canonical_file_id.in_(batch), file_in_use)
+            .distinct()
+        )
+        referenced.update(result.scalars().all())
+    return referenced & set(chunk_file_ids)
+
+
+async def unreferenced_chunk_file_ids(db: AsyncSession, chunk_file_ids: list) -> list:
+    """chunk_file_ids whose chunks no files row uses any more (safe to purge).
+
+    Files the given ones referenced for near-duplicate chunks are checked too,
+    since they may have been kept only for those references.
+    """
+    chunk_file_ids = list(dict.fromkeys(chunk_file_ids))
+    if chunk_file_ids:
+        result = await db.execute(
+            select(ChunkDuplicate.canonical_file_id).where(ChunkDuplicate.file_id.in_(chunk_file_ids)).distinct()
+        )
+        chunk_file_ids += [fid for fid in result.scalars().all() if fid not in chunk_file_ids]
+    referenced = await referenced_chunk_file_ids(db, chunk_file_ids)
+    return [fid for fid in chunk_file_ids if fid not in referenced]
+
+
+async def delete_chunk_duplicates(db: AsyncSession, chunk_file_ids: list):
+    """Drop the near-duplicate back-references of purged chunk files (the caller commits)."""
+    if chunk_file_ids:
+        await db.execute(delete(ChunkDuplicate).where(ChunkDuplicate.file_id.in_(list(chunk_file_ids))))
+
+
+async def shared_chunks(db: AsyncSession, chunk_file_ids: list) -> list[tuple[uuid.UUID, int]]:
+    """(file_id, chunk_index) of chunks stored under other files that these files
+    reference as near-duplicates, for retrieval over the files."""
+    if not chunk_file_ids:
+        return []
+    result = await db.execute(
+        select(ChunkDuplicate.canonical_file_id, ChunkDuplicate.canonical_chunk_index)
+        .where(ChunkDuplicate.file_id.in_(chunk_file_ids), ChunkDuplicate.canonical_file_id.notin_(chunk_file_ids))
+        .distinct()
+    )
+    return [tuple(row) for row in result.all()]
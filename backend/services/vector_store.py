@@ -0,0 +1,209 @@
+# services/vector_store.py
+import asyncio
+import json
+import os
+import shutil
+import threading
+import uuid
+
+import numpy as np
+
+from db.database import VECTOR_STORE_BACKEND
+
+# Opt-in: one tenant per user in a separate multi-tenant collection
+WEAVIATE_MULTI_TENANCY = os.getenv("WEAVIATE_MULTI_TENANCY", "false").lower() == "true"
+
+
+class VectorStore:
+    """Interface the RAG service uses to store and search chunk vectors."""
+
+    def create_schema(self):
+        raise NotImplementedError
+
+    def add_chunks(self, user_id: uuid.UUID, file_id: uuid.UUID, chunks: list[dict], vectors: list[list[float]]):
+        """Store chunk property dicts (content, ...) with their vectors under a user/file."""
+        raise NotImplementedError
+
+    def search(self, query_vector: list[float], user_id: uuid.UUID, file_ids: list[uuid.UUID], limit: int = 3,
+               with_vectors: bool = False) -> list[dict]:
+        """Return the properties of the closest chunks belonging to user_id and file_ids.
+
+        with_vectors adds each chunk's stored "vector" and its "file_id", for
+        rescoring results locally.
+        """
+        raise NotImplementedError
+
+    async def asearch(self, query_vector: list[float], user_id: uuid.UUID, file_ids: list[uuid.UUID], limit: int = 3,
+                      with_vectors: bool = False) -> list[dict]:
+        """search() for the event loop; backends without an async client run it on a thread."""
+        return await asyncio.to_thread(self.search, query_vector, user_id, file_ids, limit, with_vectors)
+
+    def delete_files(self, file_ids: list[uuid.UUID], user_id: uuid.UUID | None = None) -> int:
+        """Delete every chunk of the given files; returns how many were removed.
+
+        Passing the files' owner lets partitioned stores skip other users' data.
+        """
+        raise NotImplementedError
+
+    def list_file_ids(self) -> set[str]:
+        """Ids of all files that have chunks stored."""
+        raise NotImplementedError
+
+    def deactivate_idle_tenants(self) -> int:
+        """Release per-user partitions that haven't been used lately; returns how many."""
+        return 0
+
+    def ping(self) -> bool:
+        """Whether the backend is reachable, for the readiness probe."""
+        return True
+
+    async def aconnect(self):
+        pass
+
+    def close(self):
+        pass
+
+    async def aclose(self):
+        pass
+
+
+class LocalVectorStore(VectorStore):
+    """In-process vector store for small deployments and tests.
+
+    Each (user, file) partition is a directory holding a flat float32 matrix
+    (vectors.f32, read back through np.memmap), the chunk properties as JSON lines
+    and the vector dimension. Search scores each requested partition with one
+    matrix-vector product and picks the top k cosine scores with argpartition.
+    """
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+        self._lock = threading.Lock()
+        # (user_id, file_id) -> (vector file size, memmapped matrix, inverse row norms, chunk properties)
+        self._partitions = {}
+
+    def _partition_dir(self, user_id, file_id) -> str:
+        return os.path.join(self.root_dir, str(user_id), str(file_id))
+
+    def create_schema(self):
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    def add_chunks(self, user_id, file_id, chunks, vectors):
+        if not chunks:
+            return
+        matrix = np.asarray(vectors, dtype=np.float32)
+        partition_dir = self._partition_dir(user_id, file_id)
+        with self._lock:
+            os.makedirs(partition_dir, exist_ok=True)
+            meta_path = os.path.join(partition_dir, "meta.json")
+            if os.path.exists(meta_path):
+                with open(meta_path) as f:
+                    dim = json.load(f)["dim"]
+                if dim != matrix.shape[1]:
+                    raise ValueError(f"Vector dimension {matrix.shape[1]} does not match partition dimension {dim}")
+            else:
+                with open(meta_path, "w") as f:
+                    json.dump({"dim": int(matrix.shape[1])}, f)
+
+            # Rows are matched to properties by position; _load_partition only
+            # reads as many rows as both files contain
+            with open(os.path.join(partition_dir, "chunks.jsonl"), "a", encoding="utf-8") as f:
+                for chunk in chunks:
+                    f.write(json.dumps(chunk) + "\n")
+            with open(os.path.join(partition_dir, "vectors.f32"), "ab") as f:
+                matrix.tofile(f)
+            self._partitions.pop((str(user_id), str(file_id)), None)
+
+    def _load_partition(self, user_id, file_id):
+        key = (str(user_id), str(file_id))
+        partition_dir = self._partition_dir(user_id, file_id)
+        vectors_path = os.path.join(partition_dir, "vectors.f32")
+        if not os.path.exists(vectors_path):
+            return None
+
+        size = os.path.getsize(vectors_path)
+        cached = self._partitions.get(key)
+        if cached and cached[0] == size:
+            return cached
+
+        with open(os.path.join(partition_dir, "meta.json")) as f:
+            dim = json.load(f)["dim"]
+        with open(os.path.join(partition_dir, "chunks.jsonl"), encoding="utf-8") as f:
+            chunks = [json.loads(line) for line in f]
+        rows = min(size // (4 * dim), len(chunks))
+        if rows == 0:
+            return None
+
+        vectors = np.memmap(vectors_path, dtype=np.float32, mode="r", shape=(rows, dim))
+        # Only the norms are kept in RAM; the vectors stay paged in from disk
+        inverse_norms = 1.0 / np.maximum(np.linalg.norm(vectors, axis=1), 1e-12)
+        partition = (size, vectors, inverse_norms, chunks[:rows])
+        self._partitions[key] = partition
+        return partition
+
+    def search(self, query_vector, user_id, file_ids, limit=3, with_vectors=False):
+        with self._lock:
+            loaded = [(str(fid), self._load_partition(user_id, fid)) for fid in file_ids]
+        partitions = [(fid, p) for fid, p in loaded if p]
+        if not partitions:
+            return []
+
+        query = np.asarray(query_vector, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        scores = np.concatenate([(vectors @ query) * inverse_norms for _, (_, vectors, inverse_norms, _) in partitions])
+        # Start offset of each partition in the concatenated scores
+        offsets = np.cumsum([0] + [len(p[3]) for _, p in partitions])
+
+        k = min(limit, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        results = []
+        for i in top:
+            which = int(np.searchsorted(offsets, i, side="right")) - 1
+            file_id, (_, vectors, _, chunks) = partitions[which]
+            row = int(i - offsets[which])
+            if with_vectors:
+                results.append({**chunks[row], "file_id": file_id, "vector": np.array(vectors[row])})
+            else:
+                results.append(dict(chunks[row]))
+        return results
+
+    def delete_files(self, file_ids, user_id=None):
+        targets = {str(fid) for fid in file_ids}
+        deleted = 0
+        with self._lock:
+            if not os.path.isdir(self.root_dir):
+                return 0
+            user_dirs = [str(user_id)] if user_id is not None else os.listdir(self.root_dir)
+            for user_dir in user_dirs:
+                if not os.path.isdir(os.path.join(self.root_dir, user_dir)):
+                    continue
+                for file_id in targets & set(os.listdir(os.path.join(self.root_dir, user_dir))):
+                    partition = self._load_partition(user_dir, file_id)
+                    deleted += len(partition[3]) if partition else 0
+                    self._partitions.pop((user_dir, file_id), None)
+                    shutil.rmtree(self._partition_dir(user_dir, file_id))
+        return deleted
+
+    def list_file_ids(self):
+        with self._lock:
+            if not os.path.isdir(self.root_dir):
+                return set()
+            return {
+                file_id
+                for user_dir in os.listdir(self.root_dir)
+                for file_id in os.listdir(os.path.join(self.root_dir, user_dir))
+            }
+
+
+def create_vector_store() -> VectorStore:
+    if VECTOR_STORE_BACKEND == "local":
+        return LocalVectorStore(os.getenv("LOCAL_VECTOR_STORE_DIR", "vector_store"))
+    if VECTOR_STORE_BACKEND == "weaviate":
+        # Imported here so the local backend never loads the Weaviate client library
+        from services.weaviate_store import MultiTenantWeaviateVectorStore, WeaviateVectorStore
+        # The clients connect on first use (create_schema in the app lifespan)
+        if WEAVIATE_MULTI_TENANCY:
+            return MultiTenantWeaviateVectorStore()
+        return WeaviateVectorStore()
+    raise ValueError(f"Unknown VECTOR_STORE_BACKEND: {VECTOR_STORE_BACKEND}")
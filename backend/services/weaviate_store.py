@@ -0,0 +1,315 @@
+# services/weaviate_store.py
+"""Weaviate-backed vector stores, imported only when VECTOR_STORE_BACKEND=weaviate."""
+import asyncio
+import os
+import threading
+import time
+
+# Import from the correct v4 locations
+import weaviate.classes.config as wvc
+from weaviate.classes.aggregate import GroupByAggregate
+from weaviate.classes.query import Filter  # <-- CORRECT IMPORT LOCATION FOR FILTER
+from weaviate.classes.tenants import Tenant, TenantActivityStatus
+from weaviate.exceptions import WeaviateBaseError
+from weaviate.util import generate_uuid5
+
+from db.database import get_weaviate_client, get_weaviate_async_client
+from services.vector_store import VectorStore
+
+COLLECTION_NAME = "DocumentChunk"
+TENANT_COLLECTION_NAME = os.getenv("WEAVIATE_TENANT_COLLECTION", "DocumentChunkTenant")
+TENANT_IDLE_SECONDS = int(os.getenv("WEAVIATE_TENANT_IDLE_SECONDS", "1800"))
+# INACTIVE keeps the tenant on local disk; OFFLOADED needs an offload module (e.g. offload-s3)
+TENANT_IDLE_STATUS = TenantActivityStatus(os.getenv("WEAVIATE_TENANT_IDLE_STATUS", "INACTIVE").upper())
+# File ids per delete_many filter, to keep the contains_any filter small
+DELETE_BATCH_FILES = int(os.getenv("VECTOR_DELETE_BATCH_FILES", "100"))
+
+
+class BatchWriteError(RuntimeError):
+    pass
+
+
+class WeaviateVectorStore(VectorStore):
+    collection_name = COLLECTION_NAME
+
+    def __init__(self, client=None, async_client=None):
+        # Left unset, the shared clients from db.database are used (and connected) on first access
+        self._client = client
+        self._async_client = async_client
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_weaviate_client()
+        return self._client
+
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            self._async_client = get_weaviate_async_client()
+        return self._async_client
+
+    def _collection_options(self) -> dict:
+        return {}
+
+    def create_schema(self):
+        if not self.client.collections.exists(self.collection_name):
+            self.client.collections.create(
+                name=self.collection_name,
+                # Use the updated 'vector_config' parameter name
+                vector_config=wvc.Configure.VectorIndex.hnsw(),
+                properties=[
+                    wvc.Property(name="content", data_type=wvc.DataType.TEXT),
+                    wvc.Property(name="user_id", data_type=wvc.DataType.UUID),
+                    wvc.Property(name="file_id", data_type=wvc.DataType.UUID),
+                    wvc.Property(name="chunk_index", data_type=wvc.DataType.INT),
+                ],
+                **self._collection_options(),
+            )
+            return
+        # Collections created before chunk_index existed
+        doc_chunks = self.client.collections.get(self.collection_name)
+        if not any(prop.name == "chunk_index" for prop in doc_chunks.config.get().properties):
+            doc_chunks.config.add_property(wvc.Property(name="chunk_index", data_type=wvc.DataType.INT))
+
+    def _collection(self, user_id, create: bool = False):
+        """Collection holding user_id's chunks (None if the user has none)."""
+        return self.client.collections.get(self.collection_name)
+
+    async def _async_collection(self, user_id):
+        return self.async_client.collections.get(self.collection_name)
+
+    def _maintenance_collections(self, user_id=None):
+        """Collections delete_files/list_file_ids work through."""
+        return [self.client.collections.get(self.collection_name)]
+
+    def add_chunks(self, user_id, file_id, chunks, vectors):
+        doc_chunks = self._collection(user_id, create=True)
+        with doc_chunks.batch.dynamic() as batch:
+            for chunk, vector in zip(chunks, vectors):
+                data_object = {**chunk, "user_id": user_id, "file_id": file_id}
+                batch.add_object(
+                    properties=data_object,
+                    vector=vector,
+                    uuid=generate_uuid5(data_object)
+                )
+        # Batch failures don't raise; fail the ingestion instead of reporting chunks that weren't stored
+        failed = doc_chunks.batch.failed_objects
+        if failed:
+            raise BatchWriteError(f"{len(failed)} of {len(chunks)} chunks failed to store: {failed[0].message}")
+
+    def _search_filter(self, user_id, file_ids):
+        # Convert UUIDs to strings for the filter
+        file_id_strs = [str(fid) for fid in file_ids]
+        # Filter by user AND the specific files in the session
+        return (
+            Filter.by_property("user_id").equal(user_id) &
+            Filter.by_property("file_id").contains_any(file_id_strs)
+        )
+
+    @staticmethod
+    def _query_options(with_vectors: bool) -> dict:
+        if with_vectors:
+            return {"return_properties": ["content", "file_id", "chunk_index"], "include_vector": True}
+        return {"return_properties": ["content"]}
+
+    @staticmethod
+    def _results(response, with_vectors: bool) -> list[dict]:
+        if not with_vectors:
+            return [obj.properties for obj in response.objects]
+        return [
+            {**obj.properties, "file_id": str(obj.properties["file_id"]), "vector": obj.vector["default"]}
+            for obj in response.objects
+        ]
+
+    def search(self, query_vector, user_id, file_ids, limit=3, with_vectors=False):
+        doc_chunks = self._collection(user_id)
+        if doc_chunks is None:
+            return []
+        response = doc_chunks.query.near_vector(
+            near_vector=query_vector,
+            filters=self._search_filter(user_id, file_ids),
+            limit=limit,
+            **self._query_options(with_vectors)
+        )
+        return self._results(response, with_vectors)
+
+    async def asearch(self, query_vector, user_id, file_ids, limit=3, with_vectors=False):
+        if self.async_client is None:
+            return await super().asearch(query_vector, user_id, file_ids, limit, with_vectors)
+        doc_chunks = await self._async_collection(user_id)
+        if doc_chunks is None:
+            return []
+        response = await doc_chunks.query.near_vector(
+            near_vector=query_vector,
+            filters=self._search_filter(user_id, file_ids),
+            limit=limit,
+            **self._query_options(with_vectors)
+        )
+        return self._results(response, with_vectors)
+
+    def delete_files(self, file_ids, user_id=None):
+        file_id_strs = [str(fid) for fid in file_ids]
+        deleted = 0
+        for doc_chunks in self._maintenance_collections(user_id):
+            for i in range(0, len(file_id_strs), DELETE_BATCH_FILES):
+                where = Filter.by_property("file_id").contains_any(file_id_strs[i:i + DELETE_BATCH_FILES])
+                # One call deletes at most QUERY_MAXIMUM_RESULTS objects; repeat until nothing matches
+                while True:
+                    result = doc_chunks.data.delete_many(where=where)
+                    deleted += result.successful
+                    if result.matches == 0 or result.successful == 0:
+                        break
+        return deleted
+
+    def list_file_ids(self):
+        file_ids = set()
+        for doc_chunks in self._maintenance_collections():
+            response = doc_chunks.aggregate.over_all(group_by=GroupByAggregate(prop="file_id", limit=1_000_000))
+            file_ids.update(str(group.grouped_by.value) for group in response.groups)
+        return file_ids
+
+    def ping(self) -> bool:
+        return self.client.is_ready()
+
+    async def aconnect(self):
+        await self.async_client.connect()
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.close()
+
+
+class MultiTenantWeaviateVectorStore(WeaviateVectorStore):
+    """One Weaviate tenant per user, so each user gets their own HNSW index.
+
+    Uses its own collection (multi-tenancy can't be switched on for an existing
+    one; see scripts/migrate_to_tenants.py). Tenants are created on a user's
+    first upload. Tenants not searched or written for TENANT_IDLE_SECONDS are
+    moved to TENANT_IDLE_STATUS by deactivate_idle_tenants(), freeing their
+    memory, and are activated again on next use.
+    """
+    collection_name = TENANT_COLLECTION_NAME
+
+    def __init__(self, client=None, async_client=None):
+        super().__init__(client, async_client)
+        self._lock = threading.Lock()
+        # tenant name -> last use (monotonic seconds) for tenants known to be active
+        self._active = {}
+
+    def _collection_options(self) -> dict:
+        return {"multi_tenancy_config": wvc.Configure.multi_tenancy(enabled=True)}
+
+    def _forget_inactive_tenant(self, user_id, error: Exception) -> bool:
+        """True if error says the user's tenant isn't active; it is then dropped
+        from _active so the next lookup activates it again.
+
+        _active is per process: another worker or replica may have deactivated
+        the tenant since we last used it.
+        """
+        if "tenant not active" not in str(error).lower():
+            return False
+        with self._lock:
+            self._active.pop(str(user_id), None)
+        return True
+
+    def _ensure_tenant(self, user_id, create: bool) -> str | None:
+        name = str(user_id)
+        with self._lock:
+            if name in self._active:
+                self._active[name] = time.monotonic()
+                return name
+        tenants = self.client.collections.get(self.collection_name).tenants
+        tenant = tenants.get_by_name(name)
+        if tenant is None:
+            if not create:
+                return None
+            tenants.create([Tenant(name=name)])
+        elif tenant.activity_status != TenantActivityStatus.ACTIVE:
+            tenants.activate(name)
+        with self._lock:
+            self._active[name] = time.monotonic()
+        return name
+
+    def _collection(self, user_id, create=False):
+        tenant = self._ensure_tenant(user_id, create)
+        if tenant is None:
+            return None
+        return self.client.collections.get(self.collection_name).with_tenant(tenant)
+
+    async def _async_collection(self, user_id):
+        name = str(user_id)
+        with self._lock:
+            known = name in self._active
+            if known:
+                self._active[name] = time.monotonic()
+        # Tenant lookups/activation only happen on a user's first search after startup or idling
+        tenant = name if known else await asyncio.to_thread(self._ensure_tenant, user_id, False)
+        if tenant is None:
+            return None
+        return self.async_client.collections.get(self.collection_name).with_tenant(tenant)
+
+    def add_chunks(self, user_id, file_id, chunks, vectors):
+        try:
+            return super().add_chunks(user_id, file_id, chunks, vectors)
+        except BatchWriteError as e:
+            if not self._forget_inactive_tenant(user_id, e):
+                raise
+        # Object uuids are deterministic, so chunks stored by the first attempt are just overwritten
+        return super().add_chunks(user_id, file_id, chunks, vectors)
+
+    def search(self, query_vector, user_id, file_ids, limit=3, with_vectors=False):
+        try:
+            return super().search(query_vector, user_id, file_ids, limit, with_vectors)
+        except WeaviateBaseError as e:
+            if not self._forget_inactive_tenant(user_id, e):
+                raise
+        return super().search(query_vector, user_id, file_ids, limit, with_vectors)
+
+    async def asearch(self, query_vector, user_id, file_ids, limit=3, with_vectors=False):
+        try:
+            return await super().asearch(query_vector, user_id, file_ids, limit, with_vectors)
+        except WeaviateBaseError as e:
+            if not self._forget_inactive_tenant(user_id, e):
+                raise
+        return await super().asearch(query_vector, user_id, file_ids, limit, with_vectors)
+
+    def delete_files(self, file_ids, user_id=None):
+        try:
+            return super().delete_files(file_ids, user_id)
+        except WeaviateBaseError as e:
+            if user_id is None or not self._forget_inactive_tenant(user_id, e):
+                raise
+        return super().delete_files(file_ids, user_id)
+
+    def _maintenance_collections(self, user_id=None):
+        collection = self.client.collections.get(self.collection_name)
+        if user_id is not None:
+            tenant = self._ensure_tenant(user_id, create=False)
+            return [collection.with_tenant(tenant)] if tenant else []
+        # Only active tenants: touching the others would load them back into memory
+        return [
+            collection.with_tenant(name)
+            for name, tenant in collection.tenants.get().items()
+            if tenant.activity_status == TenantActivityStatus.ACTIVE
+        ]
+
+    def _search_filter(self, user_id, file_ids):
+        # The tenant already scopes the search to the user
+        return Filter.by_property("file_id").contains_any([str(fid) for fid in file_ids])
+
+    def deactivate_idle_tenants(self, idle_seconds: float | None = None) -> int:
+        idle_seconds = TENANT_IDLE_SECONDS if idle_seconds is None else idle_seconds
+        cutoff = time.monotonic() - idle_seconds
+        with self._lock:
+            idle = [name for name, last_used in self._active.items() if last_used < cutoff]
+            for name in idle:
+                del self._active[name]
+        if idle:
+            tenants = self.client.collections.get(self.collection_name).tenants
+            tenants.update([Tenant(name=name, activity_status=TENANT_IDLE_STATUS) for name in idle])
+        return len(idle)
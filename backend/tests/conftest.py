@@ -0,0 +1,47 @@
+# tests/conftest.py
+import os
+import sys
+import tempfile
+import uuid
+from pathlib import Path
+
+import pytest
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.compiler import compiles
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Run against a throwaway SQLite file instead of Postgres
+_db_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_db_dir}/test.db"
+os.environ["EMBEDDING_CACHE_PATH"] = f"{_db_dir}/embeddings.sqlite3"
+os.environ["CHUNK_SIGNATURE_INDEX_PATH"] = f"{_db_dir}/chunk_signatures.sqlite3"
+# Use the in-process vector store so no Weaviate service is needed
+os.environ["VECTOR_STORE_BACKEND"] = "local"
+os.environ["LOCAL_VECTOR_STORE_DIR"] = f"{_db_dir}/vector_store"
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+# Tests run the orphan sweep explicitly
+os.environ["ORPHAN_SWEEP_INTERVAL_SECONDS"] = "0"
+
+@compiles(UUID, "sqlite")
+def _compile_uuid_for_sqlite(type_, compiler, **kw):
+    return "CHAR(36)"
+
+import main  # noqa: E402
+
+from fastapi.testclient import TestClient  # noqa: E402
+from models.user import User  # noqa: E402
+from routers import chat  # noqa: E402
+
+
+@pytest.fixture
+def test_user():
+    return User(id=uuid.uuid4(), email="tester@example.com", password_hash="x")
+
+
+@pytest.fixture
+def client(test_user):
+    main.app.dependency_overrides[chat.get_current_user] = lambda: test_user
+    with TestClient(main.app) as test_client:
+        yield test_client
+    main.app.dependency_overrides.clear()
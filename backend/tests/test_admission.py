@@ -0,0 +1,173 @@
+# tests/test_admission.py
+import asyncio
+import uuid
+
+import pytest
+from fastapi import Request
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from prometheus_client import REGISTRY
+
+import main
+from routers import chat
+from services.admission import CHAT, INGEST, INTERACTIVE, AdmissionController, AdmissionRejected, admission_controller
+
+
+def test_user_over_its_limit_is_refused_but_cheap_requests_pass():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=10, max_per_user=2, reserved_slots=0)
+        user = uuid.uuid4()
+        await controller.acquire(user, INGEST, "upload")
+        await controller.acquire(user, CHAT, "chat")
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire(user, CHAT, "chat")
+        await controller.acquire(user, INTERACTIVE, "chat_sessions")
+        # Other users are unaffected
+        await controller.acquire(uuid.uuid4(), CHAT, "chat")
+        return rejected.value, controller.stats()
+
+    rejected, stats = asyncio.run(scenario())
+
+    assert rejected.status_code == 429 and rejected.retry_after >= 1
+    assert stats["active"] == 4
+    assert stats["rejected"]["user_limit"] == 1
+
+
+def test_queued_requests_count_against_the_user_limit():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_per_user=2, reserved_slots=0, max_queue=5, queue_timeout=5)
+        flooder = uuid.uuid4()
+        await controller.acquire(flooder, CHAT, "chat")
+        waiting = asyncio.create_task(controller.acquire(flooder, CHAT, "chat"))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire(flooder, CHAT, "chat")
+        other = asyncio.create_task(controller.acquire(uuid.uuid4(), CHAT, "chat"))
+        await asyncio.sleep(0)
+        queued = controller.stats()["queued"]["chat"]
+        waiting.cancel()
+        other.cancel()
+        await asyncio.gather(waiting, other, return_exceptions=True)
+        return rejected.value, queued
+
+    rejected, queued = asyncio.run(scenario())
+
+    assert (rejected.status_code, rejected.reason) == (429, "user_limit")
+    # The other user's request got a queue place instead of a 503
+    assert queued == 2
+
+
+def test_queued_requests_are_admitted_by_priority():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_per_user=5, reserved_slots=0, queue_timeout=5)
+        holder = uuid.uuid4()
+        await controller.acquire(holder, CHAT, "chat")
+        order = []
+
+        async def request(priority):
+            await controller.acquire(uuid.uuid4(), priority, "test")
+            order.append(priority)
+
+        waiting = [asyncio.create_task(request(INGEST)), asyncio.create_task(request(INTERACTIVE))]
+        await asyncio.sleep(0)
+        queued = controller.stats()["queued"]
+        controller.release(holder, CHAT)
+        await asyncio.sleep(0.01)
+        first_admitted = list(order)
+        controller.release(None, INTERACTIVE)
+        await asyncio.gather(*waiting)
+        return queued, first_admitted, order
+
+    queued, first_admitted, order = asyncio.run(scenario())
+
+    assert queued == {"interactive": 1, "chat": 0, "ingest": 1}
+    assert first_admitted == [INTERACTIVE]
+    assert order == [INTERACTIVE, INGEST]
+
+
+def test_saturated_queue_sheds_load_with_503():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_per_user=5, reserved_slots=0, max_queue=1, queue_timeout=0.05)
+        await controller.acquire(uuid.uuid4(), CHAT, "chat")
+        waiting = asyncio.create_task(controller.acquire(uuid.uuid4(), CHAT, "chat"))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as full:
+            await controller.acquire(uuid.uuid4(), CHAT, "chat")
+        with pytest.raises(AdmissionRejected) as timed_out:
+            await waiting
+        return full.value, timed_out.value, controller.stats()
+
+    full, timed_out, stats = asyncio.run(scenario())
+
+    assert (full.status_code, full.reason) == (503, "queue_full")
+    assert (timed_out.status_code, timed_out.reason) == (503, "queue_timeout")
+    assert stats["active"] == 1 and sum(stats["queued"].values()) == 0
+
+
+def test_reserved_slots_keep_session_listing_available(client, monkeypatch):
+    monkeypatch.setattr(admission_controller, "max_concurrent", 1)
+    monkeypatch.setattr(admission_controller, "reserved_slots", 1)
+    monkeypatch.setattr(admission_controller, "queue_timeout", 0.05)
+
+    busy = client.post("/api/chat", json={"query": "hi", "session_id": str(uuid.uuid4())})
+    assert busy.status_code == 503
+    assert busy.headers["Retry-After"] == str(admission_controller.retry_after)
+
+    assert client.get("/api/chat/sessions").status_code == 200
+    stats = client.get("/api/admission/stats").json()
+    assert stats["active"] == 0
+    assert stats["rejected"]["queue_timeout"] >= 1
+
+
+def in_flight(endpoint: str) -> float:
+    return REGISTRY.get_sample_value("chatbot_in_flight_requests", {"endpoint": endpoint})
+
+
+def test_stream_holds_its_slot_until_the_stream_ends(client, test_user, monkeypatch):
+    held = []
+    fake_llm = GenericFakeChatModel(messages=iter([AIMessage(content="one two three")]))
+    main.app.dependency_overrides[chat.get_chat_llm] = lambda: fake_llm
+    real_save = chat.save_chat_messages
+
+    async def save_and_record(db, *messages):
+        if messages[0].role == "assistant":
+            held.append((admission_controller.stats()["active"], in_flight("chat_stream")))
+        await real_save(db, *messages)
+
+    monkeypatch.setattr(chat, "save_chat_messages", save_and_record)
+    response = client.post("/api/chat/stream", json={"query": "hi", "session_id": str(uuid.uuid4())})
+
+    assert response.status_code == 200
+    # The request still counts as in flight while the answer is being saved
+    assert held == [(1, 1)]
+    assert admission_controller.stats()["active"] == 0
+    assert in_flight("chat_stream") == 0
+
+
+def test_upload_is_refused_while_the_user_has_too_many_files_processing(client, monkeypatch):
+    monkeypatch.setattr(chat, "MAX_PENDING_INGESTIONS_PER_USER", 0)
+
+    response = client.post(
+        "/api/upload",
+        data={"session_id": str(uuid.uuid4())},
+        files={"file": ("doc.pdf", b"%PDF-1.4", "application/pdf")},
+    )
+
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+
+
+def test_refused_upload_is_turned_away_before_its_body_is_read(client, monkeypatch):
+    monkeypatch.setattr(admission_controller, "max_per_user", 0)
+    form_reads = []
+    real_form = Request.form
+    monkeypatch.setattr(Request, "form", lambda self, **kwargs: form_reads.append(self.url.path) or real_form(self, **kwargs))
+
+    response = client.post(
+        "/api/upload",
+        data={"session_id": str(uuid.uuid4())},
+        files={"file": ("doc.pdf", b"%PDF-1.4", "application/pdf")},
+    )
+
+    assert response.status_code == 429
+    assert form_reads == []
@@ -0,0 +1,69 @@
+# tests/test_chat_history.py
+import uuid
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+import main
+from routers import chat
+from services import chat_history_service
+
+
+class RecordingChatModel(GenericFakeChatModel):
+    prompts: list = []
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.prompts.append([(m.type, m.content) for m in messages])
+        return super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+
+def make_llm(count: int) -> RecordingChatModel:
+    return RecordingChatModel(messages=iter([AIMessage(content=f"answer {i}") for i in range(count)]), prompts=[])
+
+
+def test_history_pages_backwards_with_cursor(client):
+    llm = make_llm(4)
+    main.app.dependency_overrides[chat.get_chat_llm] = lambda: llm
+    session_id = str(uuid.uuid4())
+    for i in range(4):
+        client.post("/api/chat", json={"query": f"question {i}", "session_id": session_id})
+
+    pages, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        body = client.get(f"/api/chat/history/{session_id}", params=params).json()
+        pages.append([m["message"] for m in body["messages"]])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    assert [len(page) for page in pages] == [3, 3, 2]
+    # Pages are newest first, each page oldest first
+    messages = [m for page in reversed(pages) for m in page]
+    assert messages == [text for i in range(4) for text in (f"question {i}", f"answer {i}")]
+
+
+def test_history_rejects_bad_cursor(client):
+    response = client.get(f"/api/chat/history/{uuid.uuid4()}", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+def test_memory_includes_earlier_turns_within_budget(client, monkeypatch):
+    llm = make_llm(3)
+    main.app.dependency_overrides[chat.get_chat_llm] = lambda: llm
+    session_id = str(uuid.uuid4())
+    for i in range(3):
+        client.post("/api/chat", json={"query": f"question {i}", "session_id": session_id})
+
+    assert llm.prompts[0] == [("human", "question 0")]
+    assert llm.prompts[2] == [
+        ("human", "question 0"), ("ai", "answer 0"),
+        ("human", "question 1"), ("ai", "answer 1"),
+        ("human", "question 2"),
+    ]
+
+    # A budget that only fits the latest turn drops the older ones
+    monkeypatch.setattr(chat_history_service, "CHAT_MEMORY_TOKEN_BUDGET", 3)
+    llm.messages = iter([AIMessage(content="answer 3")])
+    client.post("/api/chat", json={"query": "question 3", "session_id": session_id})
+    assert llm.prompts[3] == [("ai", "answer 2"), ("human", "question 3")]
@@ -0,0 +1,106 @@
+# tests/test_chat_history_buffer.py
+import asyncio
+import uuid
+
+from fastapi.testclient import TestClient
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from sqlalchemy import func, select
+
+import main
+from db.database import async_session
+from models.chat import ChatHistory
+from routers import chat
+from services import chat_history_buffer
+from services.chat_history_buffer import history_buffer
+from services.chat_history_service import fetch_history_page, load_conversation_memory, new_chat_message
+
+
+def make_llm(count: int) -> GenericFakeChatModel:
+    return GenericFakeChatModel(messages=iter([AIMessage(content=f"answer {i}") for i in range(count)]))
+
+
+def stored_messages(client, session_id: str) -> int:
+    async def count():
+        async with async_session() as db:
+            query = select(func.count()).select_from(ChatHistory).where(ChatHistory.session_id == uuid.UUID(session_id))
+            return (await db.execute(query)).scalar()
+    return client.portal.call(count)
+
+
+def test_buffered_turns_are_readable_before_they_are_flushed(client, test_user, monkeypatch):
+    monkeypatch.setattr(chat_history_buffer, "CHAT_HISTORY_WRITE_BEHIND", True)
+    llm = make_llm(2)
+    main.app.dependency_overrides[chat.get_chat_llm] = lambda: llm
+    session_id = str(uuid.uuid4())
+
+    client.post("/api/chat", json={"query": "question 0", "session_id": session_id})
+    client.portal.call(history_buffer.flush)
+    client.post("/api/chat", json={"query": "question 1", "session_id": session_id})
+    assert stored_messages(client, session_id) == 2
+
+    async def memory():
+        async with async_session() as db:
+            pending = history_buffer.pending(test_user.id, uuid.UUID(session_id))
+            return await load_conversation_memory(db, test_user.id, uuid.UUID(session_id), pending=pending)
+    assert [message for _, message in client.portal.call(memory)] == ["question 0", "answer 0", "question 1", "answer 1"]
+
+    # Pages merge stored and buffered messages
+    pages, cursor = [], None
+    while True:
+        body = client.get(f"/api/chat/history/{session_id}", params={"limit": 1, **({"cursor": cursor} if cursor else {})}).json()
+        pages.append(body["messages"][0]["message"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert pages == ["answer 1", "question 1", "answer 0", "question 0"]
+
+    # Listing sessions writes the user's buffered messages first
+    sessions = client.get("/api/chat/sessions").json()
+    assert sessions[0]["message_count"] == 4
+    assert stored_messages(client, session_id) == 4
+    assert len(history_buffer) == 0
+
+
+def test_messages_stay_readable_while_their_flush_is_running(client, test_user, monkeypatch):
+    session_id = uuid.uuid4()
+    real_upsert = chat_history_buffer.upsert_chat_sessions
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def slow_upsert(db, messages):
+            await release.wait()
+            await real_upsert(db, messages)
+
+        monkeypatch.setattr(chat_history_buffer, "upsert_chat_sessions", slow_upsert)
+        history_buffer.add(new_chat_message(test_user.id, session_id, "user", "question"))
+        flush = asyncio.create_task(history_buffer.flush())
+        await asyncio.sleep(0.05)
+        async with async_session() as db:
+            messages, _ = await fetch_history_page(
+                db, test_user.id, session_id, 10, pending=history_buffer.pending(test_user.id, session_id),
+            )
+        release.set()
+        await flush
+        return [m.message for m in messages]
+
+    assert client.portal.call(scenario) == ["question"]
+    assert history_buffer.pending(test_user.id, session_id) == []
+    assert stored_messages(client, str(session_id)) == 1
+
+
+def test_shutdown_flushes_buffered_messages(test_user, monkeypatch):
+    monkeypatch.setattr(chat_history_buffer, "CHAT_HISTORY_WRITE_BEHIND", True)
+    monkeypatch.setattr(chat_history_buffer, "CHAT_HISTORY_FLUSH_INTERVAL_MS", 60_000)
+    main.app.dependency_overrides[chat.get_current_user] = lambda: test_user
+    main.app.dependency_overrides[chat.get_chat_llm] = lambda: make_llm(1)
+    session_id = str(uuid.uuid4())
+
+    with TestClient(main.app) as client:
+        client.post("/api/chat", json={"query": "question", "session_id": session_id})
+        assert len(history_buffer) == 2
+    main.app.dependency_overrides.clear()
+
+    with TestClient(main.app) as client:
+        assert stored_messages(client, session_id) == 2
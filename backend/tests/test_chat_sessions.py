@@ -0,0 +1,101 @@
+# tests/test_chat_sessions.py
+import uuid
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from sqlalchemy import delete
+
+import main
+from db.database import async_session
+from models.chat import ChatSession
+from models.user import User
+from routers import chat
+from services.chat_history_service import backfill_chat_sessions
+
+
+def ask(client, session_id: str, query: str, answer: str, stream: bool = False):
+    main.app.dependency_overrides[chat.get_chat_llm] = lambda: GenericFakeChatModel(messages=iter([AIMessage(content=answer)]))
+    client.post("/api/chat/stream" if stream else "/api/chat", json={"query": query, "session_id": session_id})
+
+
+def test_sessions_summary_tracks_inserts(client):
+    first, second = str(uuid.uuid4()), str(uuid.uuid4())
+    ask(client, first, "Hello there", "Hi")
+    ask(client, second, "Other topic", "Sure")
+    ask(client, first, "Follow up", "Answer", stream=True)
+
+    sessions = client.get("/api/chat/sessions").json()
+    assert [s["id"] for s in sessions] == [first, second]
+    assert sessions[0]["title"] == "Hello there"
+    assert sessions[0]["last_message"] == "Answer"
+    assert sessions[0]["message_count"] == 4
+    assert sessions[1]["message_count"] == 2
+
+    assert client.delete(f"/api/chat/sessions/{first}").status_code == 200
+    assert [s["id"] for s in client.get("/api/chat/sessions").json()] == [second]
+
+
+def test_backfill_rebuilds_summaries_from_history(client, test_user):
+    session_id = str(uuid.uuid4())
+    ask(client, session_id, "First question", "First answer")
+    ask(client, session_id, "Second question", "Second answer")
+    expected = client.get("/api/chat/sessions").json()
+
+    async def wipe_and_backfill():
+        async with async_session() as db:
+            await db.execute(delete(ChatSession))
+            await db.commit()
+            written = await backfill_chat_sessions(db)
+            # A populated table is left alone
+            return written, await backfill_chat_sessions(db)
+
+    written, second_run = client.portal.call(wipe_and_backfill)
+    assert written >= 1
+    assert second_run == 0
+    assert client.get("/api/chat/sessions").json() == expected
+
+
+def test_backfill_keeps_rows_written_after_its_empty_check(client, test_user):
+    session_id = str(uuid.uuid4())
+    ask(client, session_id, "Question", "Answer")
+
+    async def race_backfill():
+        async with async_session() as db:
+            await db.execute(delete(ChatSession))
+            await db.commit()
+            real_execute = db.execute
+
+            async def execute(statement, *args, **kwargs):
+                result = await real_execute(statement, *args, **kwargs)
+                if db.execute is execute:
+                    # Another worker's backfill lands between the check and the insert
+                    db.execute = real_execute
+                    async with async_session() as other:
+                        await backfill_chat_sessions(other)
+                return result
+
+            db.execute = execute
+            return await backfill_chat_sessions(db)
+
+    assert client.portal.call(race_backfill) == 0
+    sessions = client.get("/api/chat/sessions").json()
+    assert [(s["id"], s["message_count"]) for s in sessions] == [(session_id, 2)]
+
+
+def test_session_ids_are_scoped_per_user(client, test_user):
+    session_id = str(uuid.uuid4())
+    ask(client, session_id, "Owner question", "Owner answer")
+
+    intruder = User(id=uuid.uuid4(), email="other@example.com", password_hash="x")
+    main.app.dependency_overrides[chat.get_current_user] = lambda: intruder
+    ask(client, session_id, "Intruder question", "Intruder answer")
+    intruder_sessions = client.get("/api/chat/sessions").json()
+
+    main.app.dependency_overrides[chat.get_current_user] = lambda: test_user
+    owner_sessions = client.get("/api/chat/sessions").json()
+
+    assert [(s["id"], s["last_message"], s["message_count"]) for s in intruder_sessions] == [
+        (session_id, "Intruder answer", 2),
+    ]
+    owner_row = next(s for s in owner_sessions if s["id"] == session_id)
+    assert (owner_row["last_message"], owner_row["message_count"]) == ("Owner answer", 2)
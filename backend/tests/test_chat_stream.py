@@ -0,0 +1,61 @@
+# tests/test_chat_stream.py
+import json
+import uuid
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+import main
+from routers import chat
+
+
+def parse_sse(body: str) -> list[tuple[str, str]]:
+    events = []
+    for block in body.replace("\r\n", "\n").strip().split("\n\n"):
+        event, data = "message", []
+        for line in block.split("\n"):
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                value = line[len("data:"):]
+                data.append(value[1:] if value.startswith(" ") else value)
+        events.append((event, "\n".join(data)))
+    return events
+
+
+def test_chat_stream_sends_tokens_then_persisted_id(client):
+    fake_llm = GenericFakeChatModel(messages=iter([AIMessage(content="Streaming is working fine")]))
+    main.app.dependency_overrides[chat.get_chat_llm] = lambda: fake_llm
+    session_id = str(uuid.uuid4())
+
+    response = client.post("/api/chat/stream", json={"query": "Does it stream?", "session_id": session_id})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(response.text)
+    tokens = [data for event, data in events if event == "token"]
+    assert len(tokens) > 1
+    assert "".join(tokens) == "Streaming is working fine"
+
+    event, data = events[-1]
+    assert event == "done"
+    done = json.loads(data)
+    assert done["response"] == "Streaming is working fine"
+
+    history = client.get(f"/api/chat/history/{session_id}").json()["messages"]
+    assert [m["role"] for m in history] == ["user", "assistant"]
+    assert history[1]["id"] == done["chat_history_id"]
+    assert history[1]["message"] == "Streaming is working fine"
+
+
+def test_chat_stream_reports_llm_errors(client):
+    fake_llm = GenericFakeChatModel(messages=iter([]))
+    main.app.dependency_overrides[chat.get_chat_llm] = lambda: fake_llm
+    session_id = str(uuid.uuid4())
+
+    response = client.post("/api/chat/stream", json={"query": "Anyone there?", "session_id": session_id})
+
+    events = parse_sse(response.text)
+    assert events[-1][0] == "error"
+    history = client.get(f"/api/chat/history/{session_id}").json()["messages"]
+    assert [m["role"] for m in history] == ["user"]
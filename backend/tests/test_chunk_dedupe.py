@@ -0,0 +1,134 @@
+# tests/test_chunk_dedupe.py
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import delete
+
+from benchmarks.fakes import FakeEmbeddings
+from db.database import async_session
+from models.file import ChunkDuplicate, File as FileModel
+from services import clients, ingestion_queue, rag_service
+from services.chunk_dedupe import ChunkDeduper, ChunkSignatureIndex, minhash, similarity
+from services.upload_service import unreferenced_chunk_file_ids
+from services.vector_store import LocalVectorStore
+
+DISCLAIMER = (
+    "This document is provided for information purposes only and does not constitute legal, tax or "
+    "investment advice. Past performance is no guarantee of future results. Reproduction or distribution "
+    "in whole or in part without the prior written consent of the publisher is strictly prohibited."
+)
+
+
+def topic(name: str) -> str:
+    return " ".join(f"{name} fact number {i} is about {name} detail {i * 7}." for i in range(20))
+
+
+def test_signatures_estimate_similarity():
+    near = DISCLAIMER.replace("strictly prohibited", "prohibited")
+    assert similarity(minhash(DISCLAIMER), minhash(DISCLAIMER)) == 1.0
+    assert similarity(minhash(DISCLAIMER), minhash(near)) > 0.8
+    assert similarity(minhash(DISCLAIMER), minhash(topic("rockets"))) < 0.1
+
+
+def test_duplicates_within_a_file_are_dropped_with_back_references():
+    deduper = ChunkDeduper(None, uuid.uuid4(), file_id := uuid.uuid4(), threshold=0.9)
+
+    indexes, texts = deduper.filter([0, 1, 2], [DISCLAIMER, topic("rockets"), DISCLAIMER])
+    more_indexes, _ = deduper.filter([3, 4], [topic("oceans"), DISCLAIMER + " "])
+
+    assert indexes + more_indexes == [0, 1, 3]
+    assert texts == [DISCLAIMER, topic("rockets")]
+    assert [(d["chunk_index"], d["canonical_file_id"], d["canonical_chunk_index"]) for d in deduper.duplicates] == [
+        (2, file_id, 0), (4, file_id, 0),
+    ]
+
+
+def test_duplicates_of_earlier_files_are_found_per_user(tmp_path):
+    index = ChunkSignatureIndex(str(tmp_path / "signatures.sqlite3"))
+    user, first_file = uuid.uuid4(), uuid.uuid4()
+    first = ChunkDeduper(index, user, first_file)
+    first.filter([0, 1], [topic("rockets"), DISCLAIMER])
+    first.commit()
+
+    second = ChunkDeduper(index, user, uuid.uuid4())
+    assert second.filter([0, 1], [DISCLAIMER, topic("oceans")]) == ([1], [topic("oceans")])
+    assert second.duplicates[0]["canonical_file_id"] == first_file
+    assert second.duplicates[0]["canonical_chunk_index"] == 1
+
+    # Other users' chunks are never matched, nor those of deleted files
+    assert ChunkDeduper(index, uuid.uuid4(), uuid.uuid4()).filter([0], [DISCLAIMER]) == ([0], [DISCLAIMER])
+    index.remove_files([first_file])
+    assert ChunkDeduper(index, user, uuid.uuid4()).filter([0], [DISCLAIMER]) == ([0], [DISCLAIMER])
+
+
+def test_shared_chunks_are_retrieved_from_the_file_storing_them(monkeypatch, tmp_path):
+    pages = {
+        "first": [[topic("rockets"), DISCLAIMER]],
+        "second": [[DISCLAIMER, topic("oceans")]],
+    }
+    monkeypatch.setattr(rag_service, "iter_page_chunks", lambda path: enumerate(pages[path], start=1))
+    monkeypatch.setattr(clients, "embeddings_model", FakeEmbeddings())
+    monkeypatch.setattr(rag_service, "vector_store", store := LocalVectorStore(str(tmp_path / "vectors")))
+    monkeypatch.setattr(rag_service, "chunk_signature_index", ChunkSignatureIndex(str(tmp_path / "signatures.sqlite3")))
+    rag_service.retrieval_cache.clear()
+    user, first_file, second_file = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+
+    rag_service.process_and_embed_file("first", user, first_file)
+    result = rag_service.process_and_embed_file("second", user, second_file)
+
+    assert (result.chunks, result.total_chunks, result.duplicate_fraction) == (1, 2, 0.5)
+    assert [c["content"] for c in store.search([1.0] * 256, user, [second_file], limit=10)] == [topic("oceans")]
+
+    shared = [(first_file, 1)]
+    context = asyncio.run(rag_service.retrieve_context("legal advice disclaimer", user, [second_file], shared))
+    assert DISCLAIMER in context
+    # The other file's own chunks stay out of this session's context
+    assert topic("rockets") not in context
+
+
+def test_files_stay_referenced_while_their_chunks_are_shared(client, test_user):
+    first_file, second_file = uuid.uuid4(), uuid.uuid4()
+
+    async def scenario():
+        async with async_session() as db:
+            db.add_all([
+                FileModel(id=first_file, user_id=test_user.id, session_id=uuid.uuid4(), chunk_file_id=first_file),
+                FileModel(id=second_file, user_id=test_user.id, session_id=uuid.uuid4(), chunk_file_id=second_file),
+                ChunkDuplicate(user_id=test_user.id, file_id=second_file, chunk_index=0,
+                               canonical_file_id=first_file, canonical_chunk_index=1),
+            ])
+            await db.commit()
+
+            await db.execute(delete(FileModel).where(FileModel.id == first_file))
+            # The second file still uses one of the first file's chunks
+            kept = await unreferenced_chunk_file_ids(db, [first_file])
+            await db.execute(delete(FileModel).where(FileModel.id == second_file))
+            # Deleting the second file releases both
+            released = await unreferenced_chunk_file_ids(db, [second_file])
+            await db.commit()
+            return kept, released
+
+    kept, released = client.portal.call(scenario)
+    assert kept == []
+    assert released == [second_file, first_file]
+
+
+def test_upload_job_reports_the_duplicates_it_skipped(client, monkeypatch):
+    def fake_ingestion(file_path, user_id, file_id, progress_callback=None):
+        duplicate = {"chunk_index": 3, "canonical_file_id": file_id, "canonical_chunk_index": 0, "similarity": 0.95}
+        return rag_service.IngestionResult(3, 4, [duplicate])
+
+    monkeypatch.setattr(ingestion_queue, "process_and_embed_file", fake_ingestion)
+    response = client.post(
+        "/api/upload",
+        data={"session_id": str(uuid.uuid4())},
+        files={"file": ("doc.pdf", b"%PDF-1.4 duplicate chunks", "application/pdf")},
+    )
+    job = response.json()
+    while job["state"] in ("queued", "running"):
+        time.sleep(0.05)
+        job = client.get(f"/api/upload/jobs/{job['job_id']}").json()
+
+    assert job["state"] == "completed"
+    assert (job["chunks_processed"], job["duplicate_chunks"], job["duplicate_fraction"]) == (3, 1, 0.25)
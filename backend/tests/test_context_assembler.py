@@ -0,0 +1,52 @@
+# tests/test_context_assembler.py
+from services.context_assembler import SEPARATOR, assemble_context, merge_adjacent, rerank
+from services.pdf_parsing import make_text_splitter
+from services.tokens import count_tokens
+
+
+def sentence_text(count: int) -> str:
+    return " ".join(f"Sentence number {i} talks about topic {i % 7}." for i in range(count))
+
+
+def test_adjacent_chunks_merge_without_repeating_the_overlap():
+    text = sentence_text(200)
+    chunks = make_text_splitter().split_text(text)
+    assert len(chunks) >= 3
+
+    merged = merge_adjacent(merge_adjacent(chunks[0], chunks[1]), chunks[2])
+
+    assert text.startswith(merged)
+    assert len(merged) < sum(len(c) for c in chunks[:3])
+
+
+def test_unrelated_chunks_are_joined_as_is():
+    assert merge_adjacent("first part", "second part") == "first part\nsecond part"
+
+
+def test_rerank_prefers_diverse_chunks():
+    candidates = [
+        {"content": "a", "vector": [1.0, 0.0, 0.0]},
+        {"content": "a-copy", "vector": [0.999, -0.01, 0.0]},
+        {"content": "b", "vector": [0.7, 0.7, 0.0]},
+    ]
+    assert [c["content"] for c in rerank([1.0, 0.3, 0.0], candidates, diversity=0.5)] == ["a", "b", "a-copy"]
+    assert [c["content"] for c in rerank([1.0, 0.3, 0.0], candidates, diversity=0.0)] == ["a", "a-copy", "b"]
+
+
+def test_context_merges_neighbours_dedupes_and_fits_the_budget():
+    chunks = make_text_splitter().split_text(sentence_text(200))
+    candidates = [
+        {"content": chunks[1], "file_id": "f1", "chunk_index": 1, "vector": [1.0, 0.0]},
+        {"content": chunks[0], "file_id": "f1", "chunk_index": 0, "vector": [0.9, 0.1]},
+        {"content": chunks[0], "file_id": "f2", "chunk_index": 0, "vector": [0.9, 0.1]},
+        {"content": chunks[4], "file_id": "f1", "chunk_index": 4, "vector": [0.5, 0.5]},
+    ]
+
+    context = assemble_context([1.0, 0.0], candidates, token_budget=10_000, diversity=0.0)
+    spans = context.split(SEPARATOR)
+    assert spans == [merge_adjacent(chunks[0], chunks[1]), chunks[4]]
+
+    budget = count_tokens(merge_adjacent(chunks[0], chunks[1])) + 5
+    small = assemble_context([1.0, 0.0], candidates, token_budget=budget, diversity=0.0)
+    assert count_tokens(small) <= budget
+    assert small == merge_adjacent(chunks[0], chunks[1])
@@ -0,0 +1,56 @@
+# tests/test_embedding_batcher.py
+import asyncio
+
+import pytest
+
+from services.embedding_batcher import QueryEmbeddingBatcher
+
+
+class RecordingEmbeddings:
+    def __init__(self, fail: bool = False):
+        self.batches = []
+        self.fail = fail
+
+    async def aembed_documents(self, texts):
+        self.batches.append(list(texts))
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("rate limited")
+        return [[float(len(text))] for text in texts]
+
+    async def aembed_query(self, text):
+        return (await self.aembed_documents([text]))[0]
+
+
+def test_concurrent_queries_share_one_call():
+    embeddings = RecordingEmbeddings()
+    batcher = QueryEmbeddingBatcher(lambda: embeddings, window_ms=20, max_batch_size=64)
+
+    async def run():
+        return await asyncio.gather(*(batcher.embed(text) for text in ["a", "bb", "a", "ccc"]))
+
+    assert asyncio.run(run()) == [[1.0], [2.0], [1.0], [3.0]]
+    assert embeddings.batches == [["a", "bb", "ccc"]]
+
+
+def test_full_batch_is_sent_without_waiting_for_the_window():
+    embeddings = RecordingEmbeddings()
+    batcher = QueryEmbeddingBatcher(lambda: embeddings, window_ms=60_000, max_batch_size=2)
+
+    async def run():
+        return await asyncio.wait_for(asyncio.gather(*(batcher.embed(str(i)) for i in range(4))), timeout=5)
+
+    assert len(asyncio.run(run())) == 4
+    assert embeddings.batches == [["0", "1"], ["2", "3"]]
+
+
+def test_errors_reach_every_caller_in_the_batch():
+    batcher = QueryEmbeddingBatcher(lambda: RecordingEmbeddings(fail=True), window_ms=5, max_batch_size=8)
+
+    async def run():
+        return await asyncio.gather(batcher.embed("x"), batcher.embed("y"), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    with pytest.raises(RuntimeError):
+        asyncio.run(batcher.embed("z"))
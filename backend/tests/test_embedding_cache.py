@@ -0,0 +1,47 @@
+# tests/test_embedding_cache.py
+from services.embedding_cache import EmbeddingCache, embed_documents_cached
+
+
+class CountingEmbeddings:
+    model = "fake-embedding"
+
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text)), 1.0, 0.5] for text in texts]
+
+
+def test_only_misses_are_embedded(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite3"))
+    embeddings = CountingEmbeddings()
+
+    first = embed_documents_cached(embeddings, cache, ["alpha", "beta", "alpha"])
+    second = embed_documents_cached(embeddings, cache, ["beta", "gamma"])
+
+    assert embeddings.calls == [["alpha", "beta"], ["gamma"]]
+    assert first == [[5.0, 1.0, 0.5], [4.0, 1.0, 0.5], [5.0, 1.0, 0.5]]
+    assert second == [[4.0, 1.0, 0.5], [5.0, 1.0, 0.5]]
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 4
+    assert stats["entries"] == 3
+
+
+def test_cache_persists_and_evicts_least_recently_used(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = EmbeddingCache(path, max_entries=10)
+    embeddings = CountingEmbeddings()
+    embed_documents_cached(embeddings, cache, [f"chunk {i}" for i in range(10)])
+    embed_documents_cached(embeddings, cache, ["chunk 0"])
+    embed_documents_cached(embeddings, cache, ["chunk 10"])
+
+    # Reopened from disk: the recently used chunk survived, older ones were evicted
+    reopened = EmbeddingCache(path, max_entries=10)
+    assert reopened.stats()["entries"] == 9
+    calls_before = len(embeddings.calls)
+    embed_documents_cached(embeddings, reopened, ["chunk 0", "chunk 10"])
+    assert len(embeddings.calls) == calls_before
+    embed_documents_cached(embeddings, reopened, ["chunk 1"])
+    assert embeddings.calls[-1] == ["chunk 1"]
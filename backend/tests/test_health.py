@@ -0,0 +1,43 @@
+# tests/test_health.py
+import time
+
+from services.rag_service import vector_store
+
+
+def wait_until_ready(client, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        response = client.get("/readyz")
+        if response.status_code == 200 or time.monotonic() > deadline:
+            return response
+        time.sleep(0.05)
+
+
+def test_healthz_is_always_ok(client):
+    assert client.get("/healthz").json() == {"status": "ok"}
+
+
+def test_readyz_reports_each_dependency(client):
+    response = wait_until_ready(client)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "ready"
+    assert set(body["checks"]) == {"database", "vector_store", "openai_clients"}
+    assert all(check["ready"] for check in body["checks"].values())
+
+
+def test_readyz_is_unavailable_while_a_dependency_is_down(client, monkeypatch):
+    wait_until_ready(client)
+
+    def unreachable():
+        raise ConnectionError("connection refused")
+
+    monkeypatch.setattr(vector_store, "ping", unreachable)
+    response = client.get("/readyz")
+
+    assert response.status_code == 503
+    checks = response.json()["checks"]
+    assert not checks["vector_store"]["ready"]
+    assert checks["vector_store"]["error"] == "connection refused"
+    assert checks["database"]["ready"]
@@ -0,0 +1,39 @@
+# tests/test_ingestion_pipeline.py
+import uuid
+
+from services import clients, rag_service
+from services.pdf_parsing import make_text_splitter
+
+
+class FakeEmbeddings:
+    model = "fake-embedding"
+
+    def embed_documents(self, texts):
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+def test_pipeline_embeds_and_inserts_in_batches(monkeypatch):
+    splitter = make_text_splitter()
+    pages = [splitter.split_text(f"Page {n} " + "word " * 500) for n in range(5)]
+
+    def fake_iter_page_chunks(file_path):
+        yield from enumerate(pages, start=1)
+
+    inserted, progress = [], []
+    monkeypatch.setattr(rag_service, "iter_page_chunks", fake_iter_page_chunks)
+    monkeypatch.setattr(clients, "embeddings_model", FakeEmbeddings())
+    monkeypatch.setattr(rag_service, "INGEST_BATCH_SIZE", 4)
+    # The pages are near-duplicates of each other; this test is about batching
+    monkeypatch.setattr(rag_service, "CHUNK_DEDUPE_ENABLED", False)
+    monkeypatch.setattr(rag_service.vector_store, "add_chunks", lambda u, f, chunks, vectors: inserted.append(chunks))
+
+    result = rag_service.process_and_embed_file("unused.pdf", uuid.uuid4(), uuid.uuid4(), progress_callback=lambda p, c: progress.append((p, c)))
+    total = result.chunks
+
+    expected = [text for page in pages for text in page]
+    assert total == len(expected)
+    assert [chunk["content"] for batch in inserted for chunk in batch] == expected
+    assert all(len(batch) <= 4 for batch in inserted)
+    assert len(progress) == len(inserted) + 1
+    assert progress[-1] == (5, total)
+    assert [c for _, c in progress] == sorted(c for _, c in progress)
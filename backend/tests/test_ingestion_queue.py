@@ -0,0 +1,78 @@
+# tests/test_ingestion_queue.py
+import asyncio
+import threading
+import uuid
+from datetime import timedelta
+
+from db.database import async_session
+from models.chat import utcnow
+from models.file import File as FileModel
+from services import ingestion_queue
+from services.rag_service import IngestionResult
+
+
+def test_shutdown_drops_queued_jobs_and_waits_for_running_ones(client, test_user, monkeypatch, tmp_path):
+    monkeypatch.setattr(ingestion_queue, "MAX_CONCURRENT_INGESTIONS", 1)
+    monkeypatch.setattr(ingestion_queue, "MAX_CONCURRENT_INGESTIONS_PER_USER", 1)
+    monkeypatch.setattr(ingestion_queue, "_slots", None)
+    release = threading.Event()
+
+    def slow_ingestion(file_path, user_id, file_id, progress_callback=None):
+        release.wait(5)
+        return IngestionResult(1, 1, [])
+
+    monkeypatch.setattr(ingestion_queue, "process_and_embed_file", slow_ingestion)
+    file_ids = [uuid.uuid4(), uuid.uuid4()]
+    paths = [tmp_path / "running.pdf", tmp_path / "queued.pdf"]
+
+    async def scenario():
+        async with async_session() as db:
+            db.add_all([
+                FileModel(id=fid, user_id=test_user.id, session_id=uuid.uuid4(), content_sha256="0" * 64, chunk_file_id=fid)
+                for fid in file_ids
+            ])
+            await db.commit()
+        for path in paths:
+            path.write_bytes(b"%PDF-1.4")
+        running, queued = (
+            ingestion_queue.submit_ingestion(str(path), test_user.id, fid, path.name) for path, fid in zip(paths, file_ids)
+        )
+        while running["state"] != "running":
+            await asyncio.sleep(0.01)
+
+        shutdown = asyncio.create_task(ingestion_queue.shutdown_ingestion())
+        await asyncio.sleep(0.05)
+        queued_state = queued["state"]
+        release.set()
+        await shutdown
+        async with async_session() as db:
+            remaining = [fid for fid in file_ids if await db.get(FileModel, fid)]
+        return running["state"], queued_state, remaining
+
+    running_state, queued_state, remaining = client.portal.call(scenario)
+
+    assert (running_state, queued_state) == ("completed", "cancelled")
+    assert remaining == [file_ids[0]]
+    assert not paths[1].exists()
+
+
+def test_interrupted_uploads_are_removed_on_startup(client, test_user):
+    stale, recent, finished = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    long_ago = utcnow() - timedelta(seconds=ingestion_queue.INTERRUPTED_INGESTION_SECONDS + 60)
+
+    async def scenario():
+        async with async_session() as db:
+            db.add_all([
+                FileModel(id=stale, user_id=test_user.id, content_sha256="1" * 64, uploaded_at=long_ago),
+                FileModel(id=recent, user_id=test_user.id, content_sha256="2" * 64, uploaded_at=utcnow()),
+                FileModel(id=finished, user_id=test_user.id, content_sha256="3" * 64, uploaded_at=long_ago, chunk_count=4),
+            ])
+            await db.commit()
+        removed = await ingestion_queue.remove_interrupted_ingestions()
+        async with async_session() as db:
+            return removed, [fid for fid in (stale, recent, finished) if await db.get(FileModel, fid)]
+
+    removed, remaining = client.portal.call(scenario)
+
+    assert removed == 1
+    assert remaining == [recent, finished]
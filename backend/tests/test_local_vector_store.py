@@ -0,0 +1,59 @@
+# tests/test_local_vector_store.py
+import uuid
+
+from services.vector_store import LocalVectorStore
+
+
+def test_search_ranks_by_cosine_within_user_and_files(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    store.create_schema()
+    user, other_user = uuid.uuid4(), uuid.uuid4()
+    file_a, file_b, file_c = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    store.add_chunks(user, file_a, [{"content": "a-x"}, {"content": "a-y"}], [[1.0, 0.0], [0.0, 1.0]])
+    store.add_chunks(user, file_b, [{"content": "b-xy"}], [[2.0, 2.0]])
+    store.add_chunks(user, file_c, [{"content": "c-x"}], [[5.0, 0.1]])
+    store.add_chunks(other_user, file_a, [{"content": "other"}], [[1.0, 0.0]])
+
+    results = store.search([1.0, 0.1], user, [file_a, file_b], limit=2)
+
+    assert [r["content"] for r in results] == ["a-x", "b-xy"]
+    assert store.search([1.0, 0.0], user, [uuid.uuid4()]) == []
+
+
+def test_appends_and_reloads_from_disk(tmp_path):
+    user, file_id = uuid.uuid4(), uuid.uuid4()
+    store = LocalVectorStore(str(tmp_path))
+    store.add_chunks(user, file_id, [{"content": "first"}], [[0.0, 1.0]])
+    assert store.search([0.0, 1.0], user, [file_id])[0]["content"] == "first"
+    store.add_chunks(user, file_id, [{"content": "second"}], [[1.0, 0.0]])
+
+    reopened = LocalVectorStore(str(tmp_path))
+    results = reopened.search([1.0, 0.0], user, [file_id], limit=5)
+    assert [r["content"] for r in results] == ["second", "first"]
+
+
+def test_delete_files_removes_partitions(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    user = uuid.uuid4()
+    keep, drop = uuid.uuid4(), uuid.uuid4()
+    store.add_chunks(user, keep, [{"content": "keep"}], [[1.0, 0.0]])
+    store.add_chunks(user, drop, [{"content": "drop-1"}, {"content": "drop-2"}], [[1.0, 0.0], [0.5, 0.5]])
+    assert store.search([1.0, 0.0], user, [drop])
+
+    assert store.delete_files([drop]) == 2
+    assert store.list_file_ids() == {str(keep)}
+    assert store.search([1.0, 0.0], user, [drop]) == []
+
+
+def test_search_with_vectors_reports_file_and_vector(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    user, file_a, file_b = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    store.add_chunks(user, file_a, [{"content": "a", "chunk_index": 0}], [[1.0, 0.0]])
+    store.add_chunks(user, file_b, [{"content": "b0", "chunk_index": 0}, {"content": "b1", "chunk_index": 1}], [[0.0, 1.0], [0.6, 0.8]])
+
+    results = store.search([0.0, 1.0], user, [file_a, file_b], limit=3, with_vectors=True)
+
+    assert [(r["content"], r["file_id"], r["chunk_index"]) for r in results] == [
+        ("b0", str(file_b), 0), ("b1", str(file_b), 1), ("a", str(file_a), 0),
+    ]
+    assert list(results[1]["vector"]) == [0.6000000238418579, 0.800000011920929]
@@ -0,0 +1,35 @@
+# tests/test_metrics.py
+import uuid
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+import main
+from db.database import engine
+from routers import chat
+
+
+def test_metrics_endpoint_reports_stage_histograms(client):
+    fake_llm = GenericFakeChatModel(messages=iter([AIMessage(content="measured answer")]))
+    main.app.dependency_overrides[chat.get_chat_llm] = lambda: fake_llm
+    client.post("/api/chat", json={"query": "How long?", "session_id": str(uuid.uuid4())})
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'chatbot_stage_duration_seconds_count{stage="llm"}' in body
+    assert 'chatbot_stage_duration_seconds_count{stage="postgres"}' in body
+    assert 'chatbot_in_flight_requests{endpoint="chat"} 0.0' in body
+
+
+def test_failed_statements_leave_no_timer_behind(client):
+    async def run_bad_statement():
+        async with engine.connect() as conn:
+            with pytest.raises(Exception):
+                await conn.exec_driver_sql("SELECT * FROM no_such_table")
+            return dict(conn.sync_connection.info)
+
+    assert "query_started" not in client.portal.call(run_bad_statement)
@@ -0,0 +1,23 @@
+# tests/test_pdf_parsing.py
+from langchain_community.document_loaders import PyPDFLoader
+
+from benchmarks.synthetic_pdf import write_synthetic_pdf
+from services.pdf_parsing import iter_page_chunks, make_text_splitter
+
+
+def test_parallel_parse_matches_sequential(tmp_path):
+    pdf_path = write_synthetic_pdf(str(tmp_path / "doc.pdf"), pages=12, seed=3)
+
+    sequential = list(iter_page_chunks(pdf_path, parallel=False))
+    parallel = list(iter_page_chunks(pdf_path, parallel=True, pages_per_task=5))
+
+    assert [page for page, _ in sequential] == list(range(1, 13))
+    assert parallel == sequential
+
+
+def test_chunks_match_pypdfloader_split(tmp_path):
+    pdf_path = write_synthetic_pdf(str(tmp_path / "doc.pdf"), pages=4, seed=1)
+
+    expected = [c.page_content for c in make_text_splitter().split_documents(PyPDFLoader(pdf_path).load())]
+
+    assert [text for _, texts in iter_page_chunks(pdf_path, parallel=False) for text in texts] == expected
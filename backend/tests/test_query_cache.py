@@ -0,0 +1,39 @@
+# tests/test_query_cache.py
+import asyncio
+import uuid
+from unittest import mock
+
+from services import clients, rag_service
+
+
+class CountingQueryEmbeddings:
+    def __init__(self):
+        self.queries = []
+
+    async def aembed_documents(self, texts):
+        self.queries.extend(texts)
+        return [[0.1, 0.2, float(len(text))] for text in texts]
+
+
+def test_repeated_queries_hit_both_cache_levels(monkeypatch):
+    embeddings = CountingQueryEmbeddings()
+    monkeypatch.setattr(clients, "embeddings_model", embeddings)
+    rag_service.query_embedding_cache.clear()
+    rag_service.retrieval_cache.clear()
+    user_id, file_a, file_b = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    chunk = {"content": "chunk", "file_id": str(file_a), "chunk_index": 0, "vector": [0.1, 0.2, 12.0]}
+    search = mock.AsyncMock(return_value=[chunk])
+    monkeypatch.setattr(rag_service.vector_store, "asearch", search)
+
+    first = asyncio.run(rag_service.retrieve_context("What is  RAG?", user_id, [file_a, file_b]))
+    second = asyncio.run(rag_service.retrieve_context("what is rag?", user_id, [file_b, file_a]))
+
+    assert first == second == "chunk"
+    assert embeddings.queries == ["what is rag?"]
+    assert search.call_count == 1
+    assert rag_service.retrieval_cache.stats()["hits"] == 1
+
+    rag_service.invalidate_retrieval_cache(user_id)
+    asyncio.run(rag_service.retrieve_context("what is rag?", user_id, [file_a, file_b]))
+    assert embeddings.queries == ["what is rag?"]
+    assert search.call_count == 2
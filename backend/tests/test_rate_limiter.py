@@ -0,0 +1,100 @@
+# tests/test_rate_limiter.py
+import time
+
+import httpx
+import pytest
+from openai import RateLimitError
+
+from services import rate_limiter
+from services.rate_limiter import TokenBucket, limited_embed_documents
+
+
+def rate_limit_error(retry_after: str | None = None) -> RateLimitError:
+    headers = {"retry-after": retry_after} if retry_after else {}
+    response = httpx.Response(429, headers=headers, request=httpx.Request("POST", "http://test/embeddings"))
+    return RateLimitError("rate limited", response=response, body=None)
+
+
+class FlakyEmbeddings:
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise rate_limit_error("0")
+        return [[1.0] for _ in texts]
+
+
+def test_bucket_waits_once_the_minute_is_spent():
+    bucket = TokenBucket(tokens_per_minute=600)  # 10 tokens/second
+    assert bucket.acquire(600) == 0
+
+    started = time.monotonic()
+    waited = bucket.acquire(2)
+    assert waited == pytest.approx(0.2, abs=0.05)
+    assert time.monotonic() - started >= 0.15
+
+
+def test_oversized_request_drains_the_bucket_instead_of_hanging():
+    bucket = TokenBucket(tokens_per_minute=600)
+    assert bucket.acquire(1000) == 0
+    assert bucket._try_take(1) > 0
+
+
+def test_429_is_retried_until_it_succeeds(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "embedding_limiter", None)
+    embeddings = FlakyEmbeddings(failures=2)
+
+    assert limited_embed_documents(embeddings, ["a", "b"]) == [[1.0], [1.0]]
+    assert embeddings.calls == 3
+
+
+def test_429_gives_up_after_max_retries(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "embedding_limiter", None)
+    monkeypatch.setattr(rate_limiter, "EMBEDDING_MAX_RETRIES", 1)
+    embeddings = FlakyEmbeddings(failures=5)
+
+    with pytest.raises(RateLimitError):
+        limited_embed_documents(embeddings, ["a"])
+    assert embeddings.calls == 2
+
+
+def test_backoff_prefers_retry_after():
+    assert rate_limiter._backoff_seconds(rate_limit_error("3"), attempt=0) == 3
+    assert rate_limiter._backoff_seconds(rate_limit_error(), attempt=0) <= rate_limiter.RETRY_BASE_SECONDS
+
+
+def test_each_http_attempt_takes_from_the_bucket(monkeypatch):
+    from services import clients
+
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if len(requests) == 1:
+            return httpx.Response(429, headers={"retry-after": "0"}, json={"error": {"message": "slow down"}})
+        return httpx.Response(200, json={
+            "object": "list",
+            "model": "text-embedding-3-small",
+            "data": [{"object": "embedding", "index": 0, "embedding": [1.0, 0.0]}],
+            "usage": {"prompt_tokens": 1, "total_tokens": 1},
+        })
+
+    transport = httpx.MockTransport(handler)
+    monkeypatch.setattr(clients, "embeddings_model", None)
+    monkeypatch.setattr(clients, "_http_clients", lambda: (httpx.Client(transport=transport), httpx.AsyncClient(transport=transport)))
+    bucket = TokenBucket(tokens_per_minute=1_000_000)
+    acquisitions = []
+    real_acquire = bucket.acquire
+    monkeypatch.setattr(bucket, "acquire", lambda amount: acquisitions.append(amount) or real_acquire(amount))
+    monkeypatch.setattr(rate_limiter, "embedding_limiter", bucket)
+
+    embeddings = clients.get_embeddings_model()
+    # Skip client-side tokenization so the only requests are the embedding calls
+    monkeypatch.setattr(embeddings, "check_embedding_ctx_length", False)
+
+    assert limited_embed_documents(embeddings, ["a"]) == [[1.0, 0.0]]
+    assert len(requests) == 2
+    assert len(acquisitions) == len(requests)
@@ -0,0 +1,26 @@
+# tests/test_session_auth.py
+import uuid
+
+from fastapi.testclient import TestClient
+
+import main
+from services.auth_service import session_cache
+
+
+def test_session_lookup_is_cached_and_logout_revokes_it():
+    email = f"{uuid.uuid4().hex}@example.com"
+    with TestClient(main.app) as client:
+        assert client.post("/auth/signup", json={"email": email, "password": "pw123456"}).status_code == 201
+        assert client.post("/auth/login", json={"email": email, "password": "pw123456"}).status_code == 200
+        hits_before = session_cache.hits
+
+        assert client.get("/api/chat/sessions").status_code == 200
+        assert client.get("/api/chat/sessions").status_code == 200
+        assert session_cache.hits == hits_before + 1
+
+        token = client.cookies.get("session_token")
+        assert client.post("/auth/logout").status_code == 200
+        assert session_cache.pop(token) is None
+
+        client.cookies.set("session_token", token)
+        assert client.get("/api/chat/sessions").status_code == 401
@@ -0,0 +1,45 @@
+# tests/test_session_cleanup.py
+import uuid
+
+from db.database import async_session
+from models.chat import ChatHistory
+from models.file import File as FileModel
+from services.orphan_sweeper import sweep_orphaned_chunks
+from services.rag_service import vector_store
+
+
+def test_delete_session_purges_rows_and_chunks(client, test_user):
+    session_id = uuid.uuid4()
+    file_id = uuid.uuid4()
+
+    async def seed():
+        async with async_session() as db:
+            db.add(FileModel(id=file_id, user_id=test_user.id, session_id=session_id, filename="doc.pdf"))
+            db.add(ChatHistory(user_id=test_user.id, session_id=session_id, role="user", message="hi"))
+            await db.commit()
+
+    client.portal.call(seed)
+    vector_store.add_chunks(test_user.id, file_id, [{"content": "chunk"}], [[1.0, 0.0]])
+
+    assert client.delete(f"/api/chat/sessions/{session_id}").status_code == 200
+    assert str(file_id) not in vector_store.list_file_ids()
+    assert client.get(f"/api/chat/history/{session_id}").json()["messages"] == []
+    assert client.delete(f"/api/chat/sessions/{session_id}").status_code == 404
+
+
+def test_sweep_removes_only_orphaned_chunks(client, test_user):
+    live_file, orphan_file = uuid.uuid4(), uuid.uuid4()
+
+    async def seed():
+        async with async_session() as db:
+            db.add(FileModel(id=live_file, user_id=test_user.id, session_id=uuid.uuid4(), filename="live.pdf"))
+            await db.commit()
+
+    client.portal.call(seed)
+    vector_store.add_chunks(test_user.id, live_file, [{"content": "live"}], [[1.0, 0.0]])
+    vector_store.add_chunks(test_user.id, orphan_file, [{"content": "a"}, {"content": "b"}], [[1.0, 0.0], [0.0, 1.0]])
+
+    assert client.portal.call(sweep_orphaned_chunks) >= 2
+    stored = vector_store.list_file_ids()
+    assert str(live_file) in stored
+    assert str(orphan_file) not in stored
@@ -0,0 +1,92 @@
+# tests/test_tenant_vector_store.py
+import uuid
+from unittest import mock
+
+import pytest
+
+from weaviate.classes.tenants import TenantActivityStatus
+from weaviate.exceptions import WeaviateQueryError
+
+from services.weaviate_store import BatchWriteError, MultiTenantWeaviateVectorStore
+
+
+def make_store():
+    client = mock.MagicMock()
+    collection = client.collections.get.return_value
+    collection.tenants.get_by_name.return_value = None
+    collection.with_tenant.return_value.batch.failed_objects = []
+    return MultiTenantWeaviateVectorStore(client), collection
+
+
+def test_tenants_are_created_on_first_write_only():
+    store, collection = make_store()
+    user_id = uuid.uuid4()
+
+    # Searching for a user without a tenant doesn't create one
+    assert store.search([1.0, 0.0], user_id, [uuid.uuid4()]) == []
+    collection.tenants.create.assert_not_called()
+
+    store.add_chunks(user_id, uuid.uuid4(), [{"content": "a"}], [[1.0, 0.0]])
+    collection.tenants.create.assert_called_once()
+    assert collection.tenants.create.call_args.args[0][0].name == str(user_id)
+    collection.with_tenant.assert_called_with(str(user_id))
+
+    # Known tenants skip the lookup
+    store.add_chunks(user_id, uuid.uuid4(), [{"content": "b"}], [[0.0, 1.0]])
+    assert collection.tenants.get_by_name.call_count == 2
+
+
+def test_idle_tenants_are_deactivated_and_reactivated_on_use():
+    store, collection = make_store()
+    user_id = uuid.uuid4()
+    store.add_chunks(user_id, uuid.uuid4(), [{"content": "a"}], [[1.0, 0.0]])
+
+    assert store.deactivate_idle_tenants(idle_seconds=3600) == 0
+    assert store.deactivate_idle_tenants(idle_seconds=0) == 1
+    updated = collection.tenants.update.call_args.args[0]
+    assert [(t.name, t.activity_status) for t in updated] == [(str(user_id), TenantActivityStatus.INACTIVE)]
+
+    collection.tenants.get_by_name.return_value = mock.Mock(activity_status=TenantActivityStatus.INACTIVE)
+    store.search([1.0, 0.0], user_id, [uuid.uuid4()])
+    collection.tenants.activate.assert_called_once_with(str(user_id))
+
+
+def test_tenant_deactivated_elsewhere_is_reactivated_and_searched_again():
+    store, collection = make_store()
+    user_id = uuid.uuid4()
+    store.add_chunks(user_id, uuid.uuid4(), [{"content": "a"}], [[1.0, 0.0]])
+
+    # Another worker deactivated the tenant; this process still thinks it is active
+    collection.tenants.get_by_name.return_value = mock.Mock(activity_status=TenantActivityStatus.INACTIVE)
+    near_vector = collection.with_tenant.return_value.query.near_vector
+    near_vector.side_effect = [
+        WeaviateQueryError(f'tenant not active: "{user_id}"', "GRPC"),
+        mock.Mock(objects=[mock.Mock(properties={"content": "a"})]),
+    ]
+
+    assert store.search([1.0, 0.0], user_id, [uuid.uuid4()]) == [{"content": "a"}]
+    collection.tenants.activate.assert_called_once_with(str(user_id))
+    assert near_vector.call_count == 2
+
+
+def test_writes_to_a_tenant_deactivated_elsewhere_are_retried():
+    store, collection = make_store()
+    user_id = uuid.uuid4()
+    store.add_chunks(user_id, uuid.uuid4(), [{"content": "a"}], [[1.0, 0.0]])
+
+    collection.tenants.get_by_name.return_value = mock.Mock(activity_status=TenantActivityStatus.INACTIVE)
+    batch = collection.with_tenant.return_value.batch
+    inactive = [mock.Mock(message=f'tenant not active: "{user_id}"')]
+    type(batch).failed_objects = mock.PropertyMock(side_effect=[inactive, []])
+
+    store.add_chunks(user_id, uuid.uuid4(), [{"content": "b"}], [[0.0, 1.0]])
+    collection.tenants.activate.assert_called_once_with(str(user_id))
+
+
+def test_other_batch_failures_raise():
+    store, collection = make_store()
+    collection.with_tenant.return_value.batch.failed_objects = [mock.Mock(message="vector dimension mismatch")]
+
+    with pytest.raises(BatchWriteError, match="vector dimension mismatch"):
+        store.add_chunks(uuid.uuid4(), uuid.uuid4(), [{"content": "a"}], [[1.0, 0.0]])
+    collection.tenants.activate.assert_not_called()
@@ -0,0 +1,104 @@
+# tests/test_upload_dedupe.py
+import hashlib
+import io
+import os
+import time
+import uuid
+
+import pytest
+
+from benchmarks.fakes import FakeEmbeddings
+from benchmarks.synthetic_pdf import write_synthetic_pdf
+from routers import chat
+from services import clients
+from services.rag_service import vector_store
+from services.upload_service import UploadTooLarge, save_upload
+
+
+def upload(client, pdf_bytes: bytes, session_id: str) -> dict:
+    response = client.post("/api/upload", data={"session_id": session_id}, files={"file": ("doc.pdf", pdf_bytes, "application/pdf")})
+    assert response.status_code == 200, response.text
+    body = response.json()
+    while body["state"] in ("queued", "running"):
+        time.sleep(0.05)
+        body = {**body, **client.get(f"/api/upload/jobs/{body['job_id']}").json()}
+    return body
+
+
+def test_identical_upload_reuses_indexed_chunks(client, monkeypatch, tmp_path):
+    embeddings = FakeEmbeddings()
+    monkeypatch.setattr(clients, "embeddings_model", embeddings)
+    with open(write_synthetic_pdf(str(tmp_path / "doc.pdf"), pages=3, seed=7), "rb") as f:
+        pdf_bytes = f.read()
+    first_session, second_session = str(uuid.uuid4()), str(uuid.uuid4())
+
+    first = upload(client, pdf_bytes, first_session)
+    assert first["state"] == "completed" and not first["deduplicated"], first["error"]
+    calls_after_first = embeddings.calls
+
+    second = upload(client, pdf_bytes, second_session)
+    assert second["deduplicated"] and second["job_id"] is None
+    assert second["chunks_processed"] == first["chunks_processed"]
+    assert embeddings.calls == calls_after_first
+    assert str(second["file_id"]) not in vector_store.list_file_ids()
+
+    # The shared chunks survive deleting the session that owns them...
+    assert client.delete(f"/api/chat/sessions/{first_session}").status_code == 200
+    assert str(first["file_id"]) in vector_store.list_file_ids()
+    # ...and go with the last file using them
+    assert client.delete(f"/api/chat/sessions/{second_session}").status_code == 200
+    assert str(first["file_id"]) not in vector_store.list_file_ids()
+
+
+def test_oversized_upload_is_rejected_without_leaving_a_file(client, monkeypatch):
+    monkeypatch.setattr(chat, "MAX_FILE_SIZE", 1024)
+    before = set(os.listdir(chat.UPLOAD_DIR))
+
+    response = client.post(
+        "/api/upload",
+        data={"session_id": str(uuid.uuid4())},
+        files={"file": ("big.pdf", b"%PDF-" + b"x" * 4096, "application/pdf")},
+    )
+
+    assert response.status_code == 413
+    assert set(os.listdir(chat.UPLOAD_DIR)) == before
+
+
+def test_save_upload_stops_at_the_size_limit(tmp_path):
+    path, digest, size = save_upload(io.BytesIO(b"a" * 3000), str(tmp_path), max_size=4096)
+    assert (size, digest) == (3000, hashlib.sha256(b"a" * 3000).hexdigest())
+    assert open(path, "rb").read() == b"a" * 3000
+
+    with pytest.raises(UploadTooLarge):
+        save_upload(io.BytesIO(b"a" * 5000), str(tmp_path), max_size=4096)
+    assert os.listdir(tmp_path) == [os.path.basename(path)]
+
+
+def test_batch_upload_queues_each_file_and_reports_rejections(client, monkeypatch, tmp_path):
+    monkeypatch.setattr(clients, "embeddings_model", FakeEmbeddings())
+    pdfs = []
+    for seed in (1, 2):
+        with open(write_synthetic_pdf(str(tmp_path / f"doc{seed}.pdf"), pages=2, seed=seed), "rb") as f:
+            pdfs.append(("files", (f"doc{seed}.pdf", f.read(), "application/pdf")))
+    pdfs.append(("files", ("notes.txt", b"not a pdf", "text/plain")))
+
+    response = client.post("/api/upload/batch", data={"session_id": str(uuid.uuid4())}, files=pdfs)
+
+    assert response.status_code == 200, response.text
+    first, second, rejected = response.json()["files"]
+    assert rejected["state"] == "rejected" and rejected["status_code"] == 400
+    for body in (first, second):
+        while body["state"] in ("queued", "running"):
+            time.sleep(0.05)
+            body = {**body, **client.get(f"/api/upload/jobs/{body['job_id']}").json()}
+        assert body["state"] == "completed", body["error"]
+        assert str(body["file_id"]) in vector_store.list_file_ids()
+
+
+def test_batch_upload_rejects_too_many_files(client, monkeypatch):
+    monkeypatch.setattr(chat, "MAX_BATCH_FILES", 1)
+    files = [("files", (f"doc{i}.pdf", b"%PDF-", "application/pdf")) for i in range(2)]
+
+    response = client.post("/api/upload/batch", data={"session_id": str(uuid.uuid4())}, files=files)
+
+    assert response.status_code == 400
@@ -154,6 +154,9 @@ const EmptyState = memo(function EmptyState() {
 // --- Main Page Component ---
 export default function ChatPage() {
   const [messages, setMessages] = useState<Message[]>([]);
+  // Cursor of the next older history page, null once the session is fully loaded
+  const [historyCursor, setHistoryCursor] = useState<string | null>(null);
+  const [isLoadingOlder, setIsLoadingOlder] = useState(false);
   const [chatSessions, setChatSessions] = useState<ChatSession[]>([]);
   const [activeSessionId, setActiveSessionId] = useState<string | null>(null);
   const [input, setInput] = useState("");
@@ -218,10 +221,13 @@ export default function ChatPage() {
     setActiveSessionId(sessionId);
     setIsLoading(true);
     setMessages([]);
+    setHistoryCursor(null);
     try {
       const response = await axios.get(`http://localhost:8000/api/chat/history/${sessionId}`, { withCredentials: true });
-      const formatted = response.data.map((msg: any) => ({ role: msg.role, message: msg.message }));
+      // The newest page of messages, oldest first
+      const formatted = response.data.messages.map((msg: any) => ({ role: msg.role, message: msg.message }));
       setMessages(formatted);
+      setHistoryCursor(response.data.next_cursor);
     } catch {
       setMessages([{ role: "assistant", message: "⚠️ Error loading chat history." }]);
     } finally {
@@ -229,7 +235,32 @@ export default function ChatPage() {
     }
   };
 
-  const handleNewChat = () => { setActiveSessionId(null); setMessages([]); setInput(""); };
+  const loadOlderMessages = async () => {
+    if (!activeSessionId || !historyCursor || isLoadingOlder) return;
+    setIsLoadingOlder(true);
+    try {
+      const response = await axios.get(`http://localhost:8000/api/chat/history/${activeSessionId}`, {
+        params: { cursor: historyCursor },
+        withCredentials: true,
+      });
+      const older = response.data.messages.map((msg: any) => ({ role: msg.role, message: msg.message }));
+      // Keep the messages on screen in place while the older ones are added above them
+      const viewport = scrollViewportRef.current;
+      const previousHeight = viewport?.scrollHeight ?? 0;
+      setMessages((prev) => [...older, ...prev]);
+      setHistoryCursor(response.data.next_cursor);
+      requestAnimationFrame(() => {
+        if (viewport) viewport.scrollTop += viewport.scrollHeight - previousHeight;
+      });
+    } catch {
+      setMessages((prev) => [{ role: "assistant", message: "⚠️ Error loading older messages." }, ...prev]);
+      setHistoryCursor(null);
+    } finally {
+      setIsLoadingOlder(false);
+    }
+  };
+
+  const handleNewChat = () => { setActiveSessionId(null); setMessages([]); setHistoryCursor(null); setInput(""); };
   const handleFileChange = (event: ChangeEvent<HTMLInputElement>) => { if (event.target.files) handleFileUpload(event.target.files[0]); };
 
   const handleFileUpload = async (file: File) => {
@@ -244,7 +275,18 @@ export default function ChatPage() {
     setIsLoading(true);
     setMessages((prev) => [...prev, { role: "assistant", message: `📂 Uploading ${file.name}...` }]);
     try {
-      await axios.post("http://localhost:8000/api/upload", formData, { withCredentials: true });
+      const uploadResponse = await axios.post("http://localhost:8000/api/upload", formData, { withCredentials: true });
+
+      // Ingestion runs in the background; poll the job until it settles
+      const jobId = uploadResponse.data.job_id;
+      let job = uploadResponse.data;
+      while (job.state === "queued" || job.state === "running") {
+        await new Promise((resolve) => setTimeout(resolve, 1500));
+        const jobResponse = await axios.get(`http://localhost:8000/api/upload/jobs/${jobId}`, { withCredentials: true });
+        job = jobResponse.data;
+      }
+      if (job.state !== "completed") throw new Error(job.error || "Processing failed");
+
       setMessages((prev) => [...prev, { role: "assistant", message: `✅ Uploaded ${file.name}. You can now ask about it.` }]);
     } catch {
       setMessages((prev) => [...prev, { role: "assistant", message: `❌ Error uploading ${file.name}. Try again.` }]);
@@ -268,6 +310,7 @@ export default function ChatPage() {
       if (activeSessionId === sessionId) {
         setActiveSessionId(null);
         setMessages([]);
+        setHistoryCursor(null);
         setInput("");
       }
 
@@ -293,9 +336,40 @@ export default function ChatPage() {
     const sessionIdToSend = activeSessionId || crypto.randomUUID();
 
     try {
-      const response = await axios.post("http://localhost:8000/api/chat", { query: currentInput, session_id: sessionIdToSend }, { withCredentials: true });
-      const botMsg: Message = { role: "assistant", message: response.data.response };
-      setMessages((prev) => [...prev, botMsg]);
+      const response = await fetch("http://localhost:8000/api/chat/stream", {
+        method: "POST",
+        credentials: "include",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ query: currentInput, session_id: sessionIdToSend }),
+      });
+      if (!response.ok || !response.body) throw new Error(`Chat request failed: ${response.status}`);
+
+      // Append an empty assistant message and grow it as tokens arrive
+      setMessages((prev) => [...prev, { role: "assistant", message: "" }]);
+      const appendToken = (token: string) =>
+        setMessages((prev) => [...prev.slice(0, -1), { role: "assistant", message: prev[prev.length - 1].message + token }]);
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true }).replace(/\r\n/g, "\n");
+        const events = buffer.split("\n\n");
+        buffer = events.pop() ?? "";
+        for (const rawEvent of events) {
+          let eventName = "message";
+          const dataLines: string[] = [];
+          for (const line of rawEvent.split("\n")) {
+            if (line.startsWith("event:")) eventName = line.slice(6).trim();
+            else if (line.startsWith("data:")) dataLines.push(line.slice(5).replace(/^ /, ""));
+          }
+          if (eventName === "token") appendToken(dataLines.join("\n"));
+          else if (eventName === "error") throw new Error(JSON.parse(dataLines.join("\n")).detail);
+        }
+      }
+
       if (!activeSessionId) {
         setActiveSessionId(sessionIdToSend);
         setChatSessions((prev) => [{ id: sessionIdToSend, title: currentInput }, ...prev]);
@@ -328,6 +402,13 @@ export default function ChatPage() {
           style={{ scrollbarWidth: 'thin', scrollbarColor: 'rgb(75 85 99) rgb(31 41 55)' }}
         >
           <div className="max-w-3xl mx-auto px-4 py-8 space-y-4">
+            {historyCursor && (
+              <div className="flex justify-center">
+                <Button variant="ghost" size="sm" onClick={loadOlderMessages} disabled={isLoadingOlder} className="text-gray-400 hover:text-white hover:bg-gray-800">
+                  {isLoadingOlder ? "Loading..." : "Load older messages"}
+                </Button>
+              </div>
+            )}
             {messages.length === 0 && !isLoading ? (
               <EmptyState />
             ) : (